@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+persistent.py
+
+    DESCRIPTION:
+        Benchmarks executions per second of a harness compiled in `fork` mode against the
+        same harness compiled in `persistent` mode. A workspace is initialized for each mode
+        in a scratch testbed (with the templated harness, or a harness given on the command
+        line), its image is built, and the harness is compiled and fuzzed inside a container
+        for a fixed duration, after which executions are read out of AFL's `fuzzer_stats`.
+
+        Requires a Docker engine with the `deepstate:latest` base image. A harness given on the
+        command line must define the `FUZZBED_PERSISTENT_AFL` driver of the persistent template.
+
+    USAGE:
+        python benchmarks/persistent.py [--seconds N] [--harness PATH]
+"""
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzbed_cli import templates
+from fuzzbed_cli.client import Client
+
+from typing import Dict, Optional
+
+
+# only AFL reports executions in `fuzzer_stats`
+EXECUTOR = "afl"
+
+# compiles harness, fuzzes it for a duration, and prints its statistics
+BENCH_SCRIPT = """
+deepstate-{TOOL} --compile_test {WS_NAME}/{HARNESS} --out_test_name {WS_NAME}/bench {COMPILER_ARGS} >/dev/null 2>&1 || exit 1
+deepstate-{TOOL} --input_seeds {WS_NAME}/{SEEDS} --output_test_dir /tmp/bench_out --timeout {SECONDS} {NO_FORK} {WS_NAME}/bench.{TOOL} >/dev/null 2>&1
+cat /tmp/bench_out/fuzzer_stats
+"""
+
+
+def execs_per_sec(stats: Dict[str, str]) -> float:
+    """
+    Average executions per second over a run, rather than AFL's instantaneous `execs_per_sec`.
+    """
+    elapsed: int = int(stats["last_update"]) - int(stats["start_time"])
+    return int(stats["execs_done"]) / max(1, elapsed)
+
+
+def bench(docker_client, testbed: str, mode: str, seconds: int, harness: Optional[str]) -> Dict[str, str]:
+    """
+    Initializes, builds and fuzzes a workspace compiled in a mode, returning its fuzzer statistics.
+    """
+    os.environ["TESTBED"] = testbed
+    ws_name: str = "bench_{}".format(mode)
+    ws_path: str = Client().init_ws(ws_name, harness_paths=[harness] if harness else [], template=mode)
+
+    seeds: str = "in"
+    with open(os.path.join(ws_path, seeds, "seed"), "wb") as f:
+        f.write(b"fuzzbed")
+
+    compiler_args: str = templates.PERSISTENT_ARGS[EXECUTOR] if mode == "persistent" else ""
+    script: str = BENCH_SCRIPT \
+        .replace("{TOOL}", EXECUTOR) \
+        .replace("{WS_NAME}", ws_name) \
+        .replace("{HARNESS}", os.path.basename(harness) if harness else templates.DEFAULT_HARNESS_NAME) \
+        .replace("{COMPILER_ARGS}", "--compiler_args \"{}\"".format(compiler_args) if compiler_args else "") \
+        .replace("{SEEDS}", seeds) \
+        .replace("{SECONDS}", str(seconds)) \
+        .replace("{NO_FORK}", "--no_fork" if mode == "persistent" else "")
+
+    tag: str = "fuzzbed/{}".format(ws_name)
+    docker_client.images.build(path=ws_path, tag=tag, rm=True)
+    output: bytes = docker_client.containers.run(tag, command=["sh", "-c", script], remove=True)
+
+    stats: Dict[str, str] = dict()
+    for line in output.decode("utf-8", errors="replace").splitlines():
+        key, _, value = line.partition(":")
+        stats[key.strip()] = value.strip()
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks exec/s of persistent over fork mode")
+    parser.add_argument("--seconds", type=int, default=60, help="Duration to fuzz each mode for (default is 60).")
+    parser.add_argument("--harness", type=str, default=None, help="Harness to benchmark (default is the templated one).")
+    args = parser.parse_args()
+
+    import docker
+    docker_client = docker.from_env()
+
+    testbed: str = tempfile.mkdtemp(prefix="fuzzbed_bench_")
+    results: Dict[str, float] = dict()
+    print("Mode\t\t|\tExecs\t\t|\tExec/s")
+    try:
+        for mode in templates.COMPILE_MODES:
+            stats: Dict[str, str] = bench(docker_client, testbed, mode, args.seconds, args.harness)
+            if "execs_done" not in stats:
+                print("{}\t\t|\tfailed to fuzz, no `fuzzer_stats` written".format(mode))
+                return 1
+
+            results[mode] = execs_per_sec(stats)
+            print("{}\t\t|\t{}\t\t|\t{:.1f}".format(mode, stats["execs_done"], results[mode]))
+    finally:
+        shutil.rmtree(testbed, ignore_errors=True)
+
+    print("\nPersistent mode speedup: {:.2f}x".format(results["persistent"] / max(results["fork"], 1e-9)))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
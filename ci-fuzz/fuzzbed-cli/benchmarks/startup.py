@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+startup.py
+
+    DESCRIPTION:
+        Benchmarks startup time of `fuzzbed-cli` for each subcommand. A cold invocation runs
+        with an empty bytecode and configuration cache, while warm invocations reuse both.
+        `init` re-initializes one workspace from the same configuration on every run (removing
+        it in between, untimed), such that warm runs hit the configuration cache. Subcommands
+        that communicate with the orchestrator are measured through `--help`, such that only
+        startup (imports and argument parsing) is timed.
+
+    USAGE:
+        python benchmarks/startup.py [--runs N]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzbed_cli import templates
+
+from typing import List, Dict, Tuple
+
+
+# name of the workspace re-initialized by `init`, and listed by `list`
+WS_NAME = "bench"
+
+# subcommands to benchmark, with arguments
+COMMANDS: Dict[str, List[str]] = dict({
+    "init": ["init", "--name", WS_NAME, "--config", "{CONFIG}", "--tests", "{HARNESS}"],
+    "list": ["list", "--out_tests"],
+    "start": ["start", "--help"],
+    "ps": ["ps", "--help"],
+})
+
+
+def invoke(args: List[str], env: Dict[str, str]) -> Tuple[float, int]:
+    """
+    Runs the CLI once, returning wall time in milliseconds and exit code.
+    """
+    start: float = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-m", "fuzzbed_cli"] + args, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return ((time.perf_counter() - start) * 1000.0, proc.returncode)
+
+
+def reset(name: str, env: Dict[str, str]) -> None:
+    """
+    Removes the workspace initialized by a previous `init` run, such that it can be re-initialized.
+    """
+    if name == "init":
+        shutil.rmtree(os.path.join(env["TESTBED"], WS_NAME), ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks fuzzbed-cli startup time")
+    parser.add_argument("--runs", type=int, default=10, help="Number of warm invocations per subcommand (default is 10).")
+    args = parser.parse_args()
+
+    root: str = tempfile.mkdtemp(prefix="fuzzbed_bench_")
+    env: Dict[str, str] = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "PYTHONPYCACHEPREFIX": os.path.join(root, "pycache"),
+        "FUZZBED_CACHE": os.path.join(root, "cache"),
+        "FUZZBED_LOG": "ERROR",
+        "TESTBED": os.path.join(root, "testbed"),
+    })
+    os.mkdir(env["TESTBED"])
+
+    # configuration and harness every `init` run initializes from, written once by a default `init`
+    config_path: str = os.path.join(root, "config.ini")
+    harness_path: str = os.path.join(root, templates.DEFAULT_HARNESS_NAME)
+    _, code = invoke(["init", "--name", "bench_template"], env)
+    if code != 0:
+        print("[!] Unable to initialize a workspace, is DeepState installed?")
+        shutil.rmtree(root, ignore_errors=True)
+        return 1
+    shutil.copy(os.path.join(env["TESTBED"], "bench_template", "config.ini"), config_path)
+    shutil.copy(os.path.join(env["TESTBED"], "bench_template", templates.DEFAULT_HARNESS_NAME), harness_path)
+    shutil.rmtree(os.path.join(env["TESTBED"], "bench_template"))
+
+    print("Subcommand\t|\tCold (ms)\t|\tWarm median (ms)\t|\tExit")
+    try:
+        for (name, command) in COMMANDS.items():
+            for cache in ["pycache", "cache"]:
+                shutil.rmtree(os.path.join(root, cache), ignore_errors=True)
+
+            argv: List[str] = [arg.replace("{CONFIG}", config_path).replace("{HARNESS}", harness_path) for arg in command]
+            reset(name, env)
+            cold, code = invoke(argv, env)
+
+            # `init` parses the same configuration on every warm run, hitting its cache
+            warm: List[float] = []
+            for _ in range(args.runs):
+                reset(name, env)
+                elapsed, warm_code = invoke(argv, env)
+                warm.append(elapsed)
+                code = code or warm_code
+
+            print("{}\t\t|\t{:.1f}\t\t|\t{:.1f}\t\t\t|\t{}".format(name, cold, statistics.median(warm), code))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -45,6 +45,10 @@ def main() -> int:
         "--tests", default=[], nargs=argparse.REMAINDER, required = "--config" in sys.argv,
         help="Define harness or harnesses to reside in testbed workspace. Will create a single templated harness if not specified.")
 
+    init_parser.add_argument(
+        "-t", "--template", type=str, default="fork", choices=["fork", "persistent"],
+        help="Compile mode of templated configuration and harness, `persistent` executes inputs in-process (default is `fork`).")
+
 
     # `list` - provides different output facilities for reporting various components of
     list_parser = subparsers.add_parser("list")
@@ -60,19 +64,113 @@ def main() -> int:
     # `start` - provisions a container for analysis.
     start_parser = subparsers.add_parser("start")
     start_parser.add_argument(
-        "--target", type=str, required=True,
-        help="Name of workspace to parse configuration and spin up container.")
+        "--target", type=str, nargs="+", required=True,
+        help="Name of workspace(s) to parse configuration and spin up container.")
+
+    start_parser.add_argument(
+        "--replicas", type=int, default=1,
+        help="Number of worker jobs to spin up per target workspace, all in a single request (default is 1).")
+
+    start_parser.add_argument(
+        "--executor", type=str, default=None,
+        help="Executor to fuzz with, out of those compiled into the workspace image (default is the manifest's).")
 
     start_parser.add_argument(
         "--job_name", type=str, default="worker_" + "".join([random.choice(string.ascii_letters + string.digits) for n in range(5)]),
         help="Name of worker job for target workspace that identifies deployed container for testing.")
 
 
+    # `import` - imports a directory of inputs into the corpus store for a workspace.
+    import_parser = subparsers.add_parser("import")
+    import_parser.add_argument(
+        "--target", type=str, required=True,
+        help="Name of workspace to import inputs for.")
+
+    import_parser.add_argument(
+        "--path", type=str, required=True,
+        help="Path to directory of inputs to import.")
+
+    import_parser.add_argument(
+        "--prefix", type=str,
+        help="Path in workspace to import inputs under (default is the workspace's input seeds).")
+
+
+    # `export` - exports inputs of a workspace from the corpus store to a directory.
+    export_parser = subparsers.add_parser("export")
+    export_parser.add_argument(
+        "--target", type=str, required=True,
+        help="Name of workspace to export inputs of.")
+
+    export_parser.add_argument(
+        "--out", type=str, required=True,
+        help="Path to directory to export inputs to.")
+
+    export_parser.add_argument(
+        "--prefix", type=str, default="",
+        help="Path in workspace of inputs to export, ie. `input` (default is all inputs).")
+
+
+    # `render` - renders Kubernetes Jobs for workspaces, sized from measured usage.
+    render_parser = subparsers.add_parser("render")
+    render_parser.add_argument(
+        "--target", type=str, nargs="+", required=True,
+        help="Name of workspace(s) to render Jobs for.")
+
+    render_parser.add_argument(
+        "-o", "--out", type=str, default=None,
+        help="Path to write manifests to (default is stdout).")
+
+
+    # `totals` - provides totals over every job that fuzzed workspaces.
+    totals_parser = subparsers.add_parser("totals")
+    totals_parser.add_argument(
+        "--target", type=str, nargs="+", required=True,
+        help="Name of workspace(s) to provide totals of.")
+
+
+    # `pull` - downloads artifacts of a worker job as a tar archive, resuming partial downloads.
+    pull_parser = subparsers.add_parser("pull")
+    pull_parser.add_argument(
+        "--job_name", type=str, required=True,
+        help="Name of worker job to pull artifacts of.")
+
+    pull_parser.add_argument(
+        "-o", "--out", type=str,
+        help="Path to write archive to (default is `<job_name>.tar`).")
+
+    pull_parser.add_argument(
+        "--corpus", action="store_true",
+        help="Include the job's corpus in addition to crashes and hangs.")
+
+    pull_parser.add_argument(
+        "--since", type=float,
+        help="Only pull artifacts modified after a UNIX timestamp.")
+
+
+    # `push` - uploads changes to a workspace to a remote orchestrator (`$SERVER`) without a shared volume.
+    push_parser = subparsers.add_parser("push")
+    push_parser.add_argument(
+        "--target", type=str, required=True,
+        help="Name of workspace to upload.")
+
+
     # `ps` - lists out worker jobs and their statuses that are deployed and actively fuzzing.
     ps_parser = subparsers.add_parser("ps")
     ps_parser.add_argument(
-        "--job_name", type=str,
-        help="Name of active worker job to introspect.")
+        "--job_name", type=str, nargs="*", default=[],
+        help="Name of active worker job(s) to introspect, all in a single request.")
+
+    ps_parser.add_argument(
+        "-f", "--follow", action="store_true",
+        help="Follow log lines and statistics of worker job(s) as they happen, until interrupted.")
+
+    ps_parser.add_argument(
+        "--filter", type=str, action="append", default=[],
+        help="Only list jobs with a `workspace`, `executor` or `state`, ie. `state=running` (repeatable, comma-seperate values).")
+
+    ps_parser.add_argument(
+        "--fields", type=str, default=None,
+        help="Comma-seperated fields to list, ie. `name,state,crashes_found` (default is name, workspace, executor and state).")
 
     args = parser.parse_args()
 
@@ -80,7 +178,7 @@ def main() -> int:
 
 
     if args.command == "init":
-        ws_path = client.init_ws(args.name, args.config, args.tests)
+        ws_path = client.init_ws(args.name, args.config, args.tests, args.template)
         print("\n[*] Initialized new workspace at `{}` [*]\n".format(ws_path))
         sys.exit(0)
 
@@ -94,30 +192,123 @@ def main() -> int:
                 sys.exit(1)
 
             print("Workspace Name\t|\tWorkspace Path")
-            print("".join(["{}\t|\t{}\n".format(name, path) for (name, path) in client.workspaces]))
+            print("".join(["{}\t|\t{}\n".format(ws["name"], ws["path"]) for ws in client.workspaces]))
             print("\n")
 
         # otherwise request against orchestrator to retrieve information about jobs
         elif args.out_jobs:
-            cient.list_jobs()
+            print("\n".join(client.get_processes([])))
 
         sys.exit(0)
 
 
     elif args.command == "start":
-        if client.execute(args.target, args.job_name) is None:
-            print("\n[!] Unable to start worker job for `{}` target [!]\n".format(args.target))
-            sys.exit(1)
+        jobs = client.init_containers(args.target, args.replicas, args.job_name, args.executor)
+
+        failed = [job for job in jobs if job["status"] != "success"]
+        for job in failed:
+            print("\n[!] Unable to start worker job `{}`: {} [!]\n".format(job["job_name"], job["reason"]))
 
-        print("[*] Worker job for `{}` successfully started. Call `fuzzbed-cli ps --job_name {}` to view status [*]"
-            .format(args.target, args.job_name))
+        for job in jobs:
+            if job["status"] == "success":
+                print("[*] Worker job `{}` successfully started. Call `fuzzbed-cli ps --job_name {}` to view status [*]"
+                    .format(job["job_name"], job["job_name"]))
+
+        sys.exit(1 if len(failed) > 0 else 0)
+
+
+    elif args.command == "import":
+        count = client.import_corpus(args.target, args.path, args.prefix)
+        print("\n[*] Imported {} inputs for `{}` into the corpus store [*]\n".format(count, args.target))
+        sys.exit(0)
+
+
+    elif args.command == "export":
+        client.export_corpus(args.target, args.out, args.prefix)
+        print("\n[*] Exported inputs of `{}` to `{}` [*]\n".format(args.target, args.out))
+        sys.exit(0)
+
+
+    elif args.command == "render":
+        manifests = client.render(args.target)
+        if args.out is None:
+            print(manifests)
+        else:
+            with open(args.out, "w") as f:
+                f.write(manifests)
+            print("\n[*] Rendered {} Job(s) to `{}` [*]\n".format(len(args.target), args.out))
+        sys.exit(0)
+
+
+    elif args.command == "totals":
+        for target in args.target:
+            totals = client.totals(target)
+            print("{}: {} jobs, {} execs, {} crashes, {} unique crash buckets".format(target,
+                totals["jobs"], totals["execs_done"], totals["unique_crashes"], totals["crash_buckets"]))
+        sys.exit(0)
+
+
+    elif args.command == "pull":
+        out_path = args.out or "{}.tar".format(args.job_name)
+        size = client.pull(args.job_name, out_path, args.corpus, args.since)
+        print("\n[*] Pulled {} bytes of artifacts for `{}` to `{}` [*]\n".format(size, args.job_name, out_path))
+        sys.exit(0)
+
+
+    elif args.command == "push":
+        counts = client.push_ws(args.target)
+        print("\n[*] Pushed `{}`: {} files written, {} unchanged, {} removed [*]\n"
+            .format(args.target, counts["written"], counts["unchanged"], counts["removed"]))
         sys.exit(0)
 
 
     elif args.command == "ps":
-        job_ps = client.get_process(args.job)
-        if job_ps is None:
-            print("\n[!] No worker job with name `{}` available [!]\n".format(job_ps))
+
+        # stream events from orchestrator rather than polling
+        if args.follow:
+            if len(args.job_name) == 0:
+                print("\n[!] Specify worker job(s) to follow with `--job_name` [!]\n")
+                sys.exit(1)
+
+            try:
+                for (event, data) in client.follow(args.job_name):
+                    if event == "log":
+                        print("[{}/{}] {}".format(data["job"], data["worker"], data["line"]))
+                    elif event == "stats":
+                        print("[{}/{}] {}".format(data["job"], data["worker"],
+                            " ".join(["{}={}".format(k, v) for (k, v) in data["delta"].items()])))
+                    elif event == "artifact":
+                        kind = "crash" if data["kind"] == "crashes" else "hang"
+                        print("[{}/{}] new {}: {}".format(data["job"], data["worker"], kind, data["name"]))
+            except KeyboardInterrupt:
+                pass
+            sys.exit(0)
+
+        # list every job, filtered and projected by the orchestrator
+        if len(args.job_name) == 0:
+            filters = dict()
+            for spec in args.filter:
+                key, _, values = spec.partition("=")
+                filters.setdefault(key, []).extend(values.split(","))
+
+            fields = args.fields.split(",") if args.fields else None
+            header = False
+            for job in client.list_jobs(filters, fields):
+                if not header:
+                    print("\t".join(job.keys()))
+                    header = True
+                print("\t".join("-" if value is None else value for value in job.values()))
+            sys.exit(0)
+
+        job_ps = client.get_processes(args.job_name)
+
+        for job_name in args.job_name:
+            if job_name not in job_ps:
+                print("\n[!] No worker job with name `{}` available [!]\n".format(job_name))
+                continue
+
+            print("{}:".format(job_name))
+            print("".join(["\t{}\t|\t{}\n".format(key, value) for (key, value) in job_ps[job_name].items()]))
 
         sys.exit(0)
 
@@ -0,0 +1,64 @@
+"""
+cache.py
+
+    DESCRIPTION:
+        Caches parsed workspace configurations in a compact serialized form, keyed by the
+        path and modification time of the configuration file. Parsing through DeepState's
+        AnalysisBackend requires importing DeepState, which dominates CLI startup, so it is
+        only done when a configuration changes.
+
+    USAGE:
+        config = cache.load_config("/path/to/workspace/config.ini")
+"""
+import os
+import json
+
+from typing import Dict, Any
+
+ConfigType = Dict[str, Dict[str, Any]]
+
+
+# directory storing cached configurations, overridable with $FUZZBED_CACHE
+CACHE_DIR = os.environ.get("FUZZBED_CACHE",
+    os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "fuzzbed", "configs"))
+
+
+def _cache_path(conf_path: str) -> str:
+    import hashlib
+    digest: str = hashlib.sha1(os.path.abspath(conf_path).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, "{}.json".format(digest))
+
+
+def load_config(conf_path: str) -> ConfigType:
+    """
+    Returns a parsed configuration, from the cache if the file has not been modified since it was
+    last parsed. Otherwise parses with AnalysisBackend, and stores the result in the cache.
+
+    :param conf_path: path to configuration file
+    """
+    stat = os.stat(conf_path)
+    key: str = "{}:{}".format(stat.st_mtime_ns, stat.st_size)
+    cache_path: str = _cache_path(conf_path)
+
+    try:
+        with open(cache_path, "r") as f:
+            cached: Dict[str, Any] = json.load(f)
+        if cached["key"] == key:
+            return cached["config"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    from deepstate.core.base import AnalysisBackend
+    config: ConfigType = AnalysisBackend.build_from_config(conf_path, include_sections=True)
+
+    # caching is best-effort, ie. the cache directory may not be writable
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path: str = "{}.{}".format(cache_path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(dict({"key": key, "config": config}), f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError):
+        pass
+
+    return config
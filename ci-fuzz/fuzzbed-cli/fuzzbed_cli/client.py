@@ -19,14 +19,16 @@ import json
 import string
 import random
 import shutil
-import subprocess
-import requests
-import configparser
 
+from fuzzbed_cli import compact
+from fuzzbed_cli import cache
 from fuzzbed_cli import templates
-from deepstate.core.base import AnalysisBackend
 
-from typing import Optional, List, Dict, Any, Union, Tuple
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Union, Tuple, Iterator
+
+# heavy imports are deferred to the commands that need them, to keep CLI startup fast
+if TYPE_CHECKING:
+    import requests
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
@@ -34,6 +36,10 @@ LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
 # TODO: somehow import from core api
 ConfigType = Dict[str, Dict[str, Any]]
 
+# bounds on retries of failed requests against the orchestrator, and size of the keep-alive connection pool
+MAX_RETRIES = 3
+POOL_SIZE = 16
+
 
 class ClientError(Exception):
     pass
@@ -44,7 +50,7 @@ class Client(object):
     A Client is an object that encapsulates an interface for interacting with the testing environment,
     """
 
-    def __init__(self, test_env: str = "TESTBED", server_env) -> None:
+    def __init__(self, test_env: str = "TESTBED") -> None:
         """
         Initializes a client to interface testing. Uses a default envvar to specify
         the path to the "testbed" of testing harnesses and artifacts.
@@ -62,20 +68,61 @@ class Client(object):
         self.env: str = env
         LOGGER.debug("Path to testbed env: {}".format(self.env))
 
-        # get all test workspaces from testbed directory
-        self.test_paths: List[str] = [testdir[0] for testdir in os.walk(env)]
+        # test workspaces from testbed directory, lazily listed
+        self._test_paths: Optional[List[str]] = None
 
         # get env for overwritten service host and port
         server_env: Optional[str] = os.environ.get("SERVER")
         self.server_addr: str = "0.0.0.0:1234" if server_env is None else server_env
 
+        # lazily initialized, since not every command communicates with the orchestrator
+        self._session: Optional["requests.Session"] = None
+
+
+    @property
+    def test_paths(self) -> List[str]:
+        """
+        Paths to all test workspaces in the testbed directory. Only the top level is listed, since
+        workspaces may contain large output directories.
+        """
+        if self._test_paths is None:
+            self._test_paths = [entry.path for entry in os.scandir(self.env) if entry.is_dir()]
+        return self._test_paths
+
+
+    @property
+    def session(self) -> "requests.Session":
+        """
+        Pooled keep-alive session shared by all requests against the orchestrator. Connection errors
+        are retried for every method, while server errors are only retried for idempotent ones.
+        """
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(total=MAX_RETRIES, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+
+            self._session = requests.Session()
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
+
+
+    def _url(self, path: str) -> str:
+        if "://" in self.server_addr:
+            return "{}{}".format(self.server_addr, path)
+        return "http://{}{}".format(self.server_addr, path)
+
 
     @staticmethod
-    def _init_config(ws_path: str) -> Optional[ConfigType]:
+    def _init_config(ws_path: str, compile_mode: str = "fork") -> Optional[ConfigType]:
         """
         Helper method that takes an input path and generates a serializable configuration from a default dict.
 
         :param ws_path: absolute path to directory to initialize with default config name
+        :param compile_mode: how harness is built for execution, persistent mode executes without forking
         """
 
         # define abspath to config file
@@ -83,16 +130,20 @@ class Client(object):
         LOGGER.debug("Path to configuration to write: {}".format(conf_path))
 
         # initialize a parser to write
+        import configparser
         parser = configparser.ConfigParser()
         parser.update(templates.DEFAULT_CONFIG)
+        parser["manifest"]["compile_mode"] = compile_mode
+        parser["test"]["no_fork"] = str(compile_mode == "persistent")
         with open(conf_path, "w") as conf_file:
             parser.write(conf_file)
 
         # with file on disk, re-initialize with AnalysisBackend helper
-        return AnalysisBackend.build_from_config(conf_path, include_sections=True)
+        return cache.load_config(conf_path)
 
 
-    def init_ws(self, _ws_name: str, config_path: Optional[str] = None, harness_paths: List[str] = []) -> str:
+    def init_ws(self, _ws_name: str, config_path: Optional[str] = None, harness_paths: List[str] = [],
+                template: str = "fork") -> str:
         """
         Creates a new workspace in the testbed environment path. If no configuration and harness(es) is provided,
         the client will initialize default ones for the user. Returns the abspath to the new testbed if successfully
@@ -101,8 +152,12 @@ class Client(object):
         :param ws_name: name of workspace directory.
         :param config_path: optional path to configuration file to consume be consumed by DeepState executor.
         :param harness_paths: optional paths to existing DeepState test harnesses
+        :param template: compile mode of default config and harness to write, if not specified
         """
 
+        if template not in templates.COMPILE_MODES:
+            raise ClientError("{} template not found".format(template))
+
         # check if abspath to workspace already exists
         ws_name: str = os.path.join(self.env, _ws_name)
         if ws_name in self.test_paths:
@@ -116,7 +171,7 @@ class Client(object):
         # initialize new config to workspace or copy over config_path
         if config_path is None:
             LOGGER.info("Initializing a new default configuration.")
-            config = Client._init_config(ws_name)
+            config = Client._init_config(ws_name, template)
         else:
 
             # copy configuration file to testbed path
@@ -124,7 +179,7 @@ class Client(object):
             shutil.copy(config_path, ws_name)
 
             # initialize user-specified path as configuration, and sanity-check
-            config = AnalysisBackend.build_from_config(config_path, include_sections=True)
+            config = cache.load_config(config_path)
 
             # ensure manifest section exists
             if "manifest" not in config.keys():
@@ -173,6 +228,58 @@ class Client(object):
         else:
             dockerfile = dockerfile.replace("{PROVISION_STEPS}", " ")
 
+        # every executor the harness is compiled for at build time, sharing the one provisioned image
+        tools: List[str] = [executor]
+        for tool in json.loads(manifest.get("executors", "[]")):
+            if tool not in templates.ALLOWED or tool == "ensemble":
+                raise ClientError("{} executor cannot be compiled for".format(tool))
+            elif tool not in tools:
+                tools.append(tool)
+
+        # persistent harnesses require executor support, and additional compiler arguments
+        compile_mode: str = manifest.get("compile_mode", "fork")
+        if compile_mode not in templates.COMPILE_MODES:
+            raise ClientError("{} compile mode not found".format(compile_mode))
+        for tool in tools:
+            if compile_mode == "persistent" and tool not in templates.PERSISTENT_ARGS:
+                raise ClientError("{} executor does not support persistent mode".format(tool))
+
+        # if multiplexing tests, persistent or multi-executor, compile the harness once at build time
+        multiplex: bool = str(manifest.get("multiplex", False)).lower() in ["1", "true", "yes"]
+        harness: str = config["compile"].get("compile_test", config["compile"].get("compile_harness"))
+        compile_step: str = ""
+        if multiplex or compile_mode == "persistent" or len(tools) > 1:
+            LOGGER.info("Compiling `{}` mode harness for {} into image.".format(compile_mode, ", ".join(tools)))
+            compiles: List[str] = []
+            for tool in tools:
+                compiler_args: str = config["compile"].get("compiler_args", "")
+                if compile_mode == "persistent":
+                    compiler_args = " ".join([compiler_args, templates.PERSISTENT_ARGS[tool]]).strip()
+
+                template: str = templates.COMPILE_STEP if len(tools) == 1 else templates.PARALLEL_COMPILE
+                compiles.append(template \
+                    .replace("{TOOL}", tool) \
+                    .replace("{WS_NAME}", _ws_name) \
+                    .replace("{HARNESS}", harness) \
+                    .replace("{COMPILER_ARGS}", "--compiler_args \"{}\"".format(compiler_args) if compiler_args else ""))
+
+            if len(tools) == 1:
+                compile_step += compiles[0]
+            else:
+                compile_step += templates.PARALLEL_COMPILE_STEP.replace("{COMPILES}", "".join(compiles))
+
+        # if a sanitizer build is declared, compile it alongside for cross-validating the fast build's outputs
+        sanitizer: str = manifest.get("sanitizer", "")
+        if sanitizer:
+            LOGGER.info("Compiling `{}` sanitizer harness into image.".format(sanitizer))
+            compile_step += templates.SANITIZER_COMPILE_STEP \
+                .replace("{SANITIZER}", sanitizer) \
+                .replace("{WS_NAME}", _ws_name) \
+                .replace("{HARNESS}", harness) \
+                .replace("{COMPILER_ARGS}", config["compile"].get("compiler_args", ""))
+
+        dockerfile = dockerfile.replace("{COMPILE_STEP}", compile_step or " ")
+
         # write finalized Dockerfile to workspace for container deployment
         with open(os.path.join(ws_name, "Dockerfile"), "w") as f:
             f.write(dockerfile)
@@ -183,8 +290,10 @@ class Client(object):
         # if no existing harnesses are specified, write a single default one
         if len(harness_paths) == 0:
             LOGGER.info("Writing new default test harness.")
+            harness_template: str = templates.PERSISTENT_TEST_HARNESS if compile_mode == "persistent" \
+                                    else templates.DEFAULT_TEST_HARNESS
             with open(os.path.join(ws_name, templates.DEFAULT_HARNESS_NAME), "w") as f:
-                f.write(templates.DEFAULT_TEST_HARNESS.replace("{HARNESS_NAME}", templates.DEFAULT_HARNESS_NAME))
+                f.write(harness_template.replace("{HARNESS_NAME}", templates.DEFAULT_HARNESS_NAME))
 
         # if not, copy harnesses over to workspace
         else:
@@ -198,39 +307,63 @@ class Client(object):
         return ws_name
 
 
-    def init_container(ws_name: str, _job_name: Optional[str]) -> Union[bool, Tuple[bool, str]]:
+    def init_containers(self, ws_names: List[str], replicas: int = 1,
+                        _job_name: Optional[str] = None, executor: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Sends a POST request to /api/init in order to provision a new
-        container job.
+        Sends a single batched POST request to /api/init in order to provision container jobs
+        for every workspace, each replicated a number of times. Returns status of each job.
 
-        :param ws_name: string name of workspace to test
-        :param job_name: optional identifier
+        :param ws_names: string names of workspaces to test
+        :param replicas: number of jobs to provision per workspace
+        :param job_name: optional identifier, suffixed by workspace and replica if provisioning multiple jobs
+        :param executor: optional executor compiled into the workspace images to fuzz with
         """
 
         # create pseudorandom id if not specified
-        job_name: str = "worker_".format(random.choice(string.ascii_lowercase + string.digits) for _ in range(4)) \
+        job_name: str = "worker_" + "".join(random.choice(string.ascii_lowercase + string.digits) for _ in range(4)) \
                         if not _job_name else _job_name
         LOGGER.debug("Job name: {}".format(job_name))
 
-        # send a POST request with necessary parameters
         # TODO: fine-grained config, like specific harness and/or test
-        payload: Dict[str, str] = dict({
-            "job_name": job_name,
-            "test": ws_name
-        })
+        single: bool = len(ws_names) == 1 and replicas == 1
+        jobs: List[Dict[str, str]] = [
+            dict({
+                "job_name": job_name if single else "{}_{}_{}".format(job_name, ws_name, replica),
+                "test": ws_name
+            })
+            for ws_name in ws_names
+            for replica in range(replicas)
+        ]
 
-        LOGGER.debug("Payload info: {}".format(payload))
+        if executor is not None:
+            for job in jobs:
+                job["executor"] = executor
 
-        r = requests.post(self.server_addr, data=payload)
+        LOGGER.debug("Payload info: {}".format(jobs))
+
+        r = self.session.post(self._url("/api/init"), json={"jobs": jobs})
 
         # check for correct status code
         status = r.status_code
         if status != 200:
-            reason: str = "failed with status {}".format(status)
-            return (False, str(reason))
+            raise ClientError("failed with status {}".format(status))
+
+        return r.json()["jobs"]
+
+
+    def init_container(self, ws_name: str, _job_name: Optional[str]) -> Union[bool, Tuple[bool, str]]:
+        """
+        Sends a POST request to /api/init in order to provision a new
+        container job.
+
+        :param ws_name: string name of workspace to test
+        :param job_name: optional identifier
+        """
+        try:
+            response = self.init_containers([ws_name], 1, _job_name)[0]
+        except ClientError as e:
+            return (False, str(e))
 
-        # now parse out response
-        response = vars(r.json())
         if response["status"] != "success":
             return (False, response["reason"])
 
@@ -258,11 +391,283 @@ class Client(object):
         return workspaces
 
 
+    def list_jobs(self, filters: Optional[Dict[str, List[str]]] = None, fields: Optional[List[str]] = None,
+                  use_compact: bool = True, page_size: Optional[int] = None) -> Iterator[Dict[str, Optional[str]]]:
+        """
+        Sends GET requests to /api/info in order to list jobs a page at a time, ordered by name and
+        filtered by the orchestrator. Yields each job with the selected fields, following cursors.
+
+        :param filters: optional fields (`workspace`, `executor` or `state`) mapped to values to filter jobs by
+        :param fields: optional fields to list, ie. `name` or `crashes_found` (default is orchestrator's)
+        :param use_compact: request the compact binary encoding rather than JSON
+        :param page_size: optional number of jobs per page (default is orchestrator's)
+        """
+        params: Dict[str, str] = dict((key, ",".join(values)) for (key, values) in (filters or dict()).items())
+        if fields:
+            params["fields"] = ",".join(fields)
+        if page_size is not None:
+            params["limit"] = str(page_size)
+        if use_compact:
+            params["format"] = "compact"
+
+        cursor: Optional[str] = None
+        while True:
+            if cursor is not None:
+                params["cursor"] = cursor
+
+            r = self.session.get(self._url("/api/info"), params=params)
+            if r.status_code != 200:
+                raise ClientError("failed with status {}".format(r.status_code))
+
+            if r.headers.get("Content-Type", "").startswith(compact.MIMETYPE):
+                rows, _, cursor = compact.decode(r.content)
+            else:
+                response = r.json()
+                if response.get("status") == "failed":
+                    raise ClientError(response["reason"])
+                rows, cursor = response["jobs"], response["next"]
+
+            for row in rows:
+                yield row
+            if cursor is None:
+                return
+
+
+    def get_processes(self, job_names: List[str]) -> Union[Dict[str, Any], List[str]]:
+        """
+        Sends a single GET request to /api/info in order to retrieve information about many processes
+        in bulk. If no job names are specified, the names of every single job are returned.
+
+        :param job_names: names of worker jobs that are active to introspect
+        """
+        if len(job_names) == 0:
+            return [job["name"] for job in self.list_jobs(fields=["name"])]
+
+        params: Dict[str, str] = dict({"jobs": ",".join(job_names)})
+
+        r = self.session.get(self._url("/api/info"), params=params)
+        if r.status_code != 200:
+            raise ClientError("failed with status {}".format(r.status_code))
+        return r.json()
+
+
     def get_process(self, job_name: Optional[str]) -> Dict[str, Any]:
         """
-        Sends a GET request to /api/process/<job_name> in order to retrieve specific information about a process.
+        Sends a GET request to /api/info/<job_name> in order to retrieve specific information about a process.
         If job_name is not specified, general information will be outputted regarding every single active worker.
 
         :param job_name: name of worker job that is active to introspect
         """
-        r = request.get(self.server_addr)
+        if job_name is None:
+            return self.get_processes([])
+        return self.get_processes([job_name]).get(job_name)
+
+
+    def follow(self, job_names: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Sends a GET request to /api/stream in order to follow log lines and statistics deltas of
+        many processes over a single connection. Yields each event type with its data as it arrives.
+
+        :param job_names: names of worker jobs that are active to follow
+        """
+        r = self.session.get(self._url("/api/stream"), params={"jobs": ",".join(job_names)}, stream=True)
+        if r.status_code != 200:
+            raise ClientError("failed with status {}".format(r.status_code))
+
+        # parse out server-sent events, ignoring keep-alive comments
+        event: Optional[str] = None
+        for line in r.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:") and event is not None:
+                yield (event, json.loads(line[len("data:"):]))
+                event = None
+
+
+    def import_corpus(self, ws_name: str, src_dir: str, prefix: Optional[str] = None) -> int:
+        """
+        Sends a POST request to /api/corpus/<ws_name> in order to import a directory of inputs into the
+        content-addressed corpus store. Inputs are uploaded as a single compressed tar stream, spooled
+        to disk rather than buffered in memory. Returns number of inputs imported.
+
+        :param ws_name: name of workspace to import inputs for
+        :param src_dir: path to directory of inputs
+        :param prefix: optional path in workspace to import under, default is its input seeds
+        """
+        import tarfile
+        import tempfile
+
+        if not os.path.isdir(src_dir):
+            raise ClientError("`{}` is not a directory of inputs".format(src_dir))
+
+        params: Dict[str, str] = dict({"prefix": prefix}) if prefix is not None else dict()
+        with tempfile.TemporaryFile() as upload:
+            with tarfile.open(fileobj=upload, mode="w:gz") as archive:
+                archive.add(src_dir, arcname=".")
+            upload.seek(0)
+
+            r = self.session.post(self._url("/api/corpus/{}".format(ws_name)), data=upload, params=params,
+                                  headers={"Content-Type": "application/x-tar"})
+
+        if r.status_code != 200:
+            raise ClientError("failed with status {}".format(r.status_code))
+
+        response = r.json()
+        if response["status"] != "success":
+            raise ClientError(response["reason"])
+        return response["imported"]
+
+
+    def export_corpus(self, ws_name: str, out_dir: str, prefix: str = "") -> None:
+        """
+        Sends a GET request to /api/corpus/<ws_name> in order to export inputs of a workspace from the
+        corpus store, extracting the streamed tar archive into a directory.
+
+        :param ws_name: name of workspace to export inputs of
+        :param out_dir: path to directory to extract inputs to
+        :param prefix: optional path in workspace to export, default is all inputs
+        """
+        import tarfile
+
+        r = self.session.get(self._url("/api/corpus/{}".format(ws_name)), params={"prefix": prefix}, stream=True)
+        if r.status_code != 200:
+            raise ClientError("failed with status {}".format(r.status_code))
+
+        os.makedirs(out_dir, exist_ok=True)
+        root: str = os.path.realpath(out_dir)
+        with tarfile.open(fileobj=r.raw, mode="r|") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+
+                # resolved against the destination, including any links already in it, such that paths cannot escape it
+                path: str = os.path.realpath(os.path.join(root, member.name))
+                if os.path.commonpath([root, path]) != root or path == root:
+                    LOGGER.warning("Skipping exported input with unsafe path `{}`.".format(member.name))
+                    continue
+                member.name = os.path.relpath(path, root)
+                archive.extract(member, root)
+
+
+    def render(self, ws_names: List[str]) -> str:
+        """
+        Sends a GET request to /api/render in order to render Kubernetes Job manifests for workspaces,
+        sized from their manifests and usage measured by the orchestrator. Returns a multi-document YAML stream.
+
+        :param ws_names: names of workspaces to render Jobs for
+        """
+        r = self.session.get(self._url("/api/render"), params={"workspaces": ",".join(ws_names)})
+        if r.status_code != 200:
+            raise ClientError("failed with status {}".format(r.status_code))
+        elif r.headers.get("Content-Type", "").startswith("application/json"):
+            raise ClientError(r.json()["reason"])
+        return r.text
+
+
+    def totals(self, ws_name: str) -> Dict[str, Any]:
+        """
+        Sends a GET request to /api/target/<ws_name> in order to retrieve totals over every job that fuzzed a
+        workspace, ie. executions and unique crashes, as aggregated by the orchestrator's store.
+
+        :param ws_name: name of workspace to retrieve totals of
+        """
+        r = self.session.get(self._url("/api/target/{}".format(ws_name)))
+        if r.status_code != 200:
+            raise ClientError("failed with status {}".format(r.status_code))
+        return r.json()
+
+
+    def pull(self, job_name: str, out_path: str, corpus: bool = False, since: Optional[float] = None) -> int:
+        """
+        Sends a GET request to /api/pull/<job_name> in order to download a job's artifacts as a single tar
+        archive, streamed to disk in chunks. A partial download is resumed from where it left off, with
+        the same snapshot bound, as long as its `.part` and `.until` files are present. Returns the number
+        of bytes in the archive.
+
+        :param job_name: name of job to pull artifacts of
+        :param out_path: path to write archive to
+        :param corpus: whether to include the job's corpus
+        :param since: optional timestamp, only artifacts modified after it are included
+        """
+        part_path: str = out_path + ".part"
+        until_path: str = out_path + ".until"
+
+        params: Dict[str, str] = dict({"corpus": str(corpus)})
+        if since is not None:
+            params["since"] = str(since)
+
+        headers: Dict[str, str] = dict()
+        offset: int = 0
+        if os.path.isfile(part_path) and os.path.isfile(until_path):
+            with open(until_path, "r") as f:
+                params["until"] = f.read().strip()
+            offset = os.path.getsize(part_path)
+            headers["Range"] = "bytes={}-".format(offset)
+            LOGGER.info("Resuming pull of `{}` from byte {}.".format(job_name, offset))
+
+        r = self.session.get(self._url("/api/pull/{}".format(job_name)), params=params, headers=headers, stream=True)
+        if r.status_code == 416:
+
+            # previous transfer already received the whole archive
+            if r.headers.get("Content-Range") == "bytes */{}".format(offset):
+                os.replace(part_path, out_path)
+                os.remove(until_path)
+                return offset
+
+            # snapshot of previous transfer expired, so start over
+            LOGGER.info("Unable to resume pull of `{}`, starting over.".format(job_name))
+            os.remove(part_path)
+            os.remove(until_path)
+            return self.pull(job_name, out_path, corpus, since)
+        if r.status_code not in [200, 206]:
+            raise ClientError("failed with status {}".format(r.status_code))
+
+        # server ignored range, so start over
+        if r.status_code == 200:
+            offset = 0
+        with open(until_path, "w") as f:
+            f.write(r.headers["X-Fuzzbed-Until"])
+
+        with open(part_path, "ab" if offset > 0 else "wb") as f:
+            for chunk in r.iter_content(chunk_size=256 * 1024):
+                f.write(chunk)
+
+        size: int = os.path.getsize(part_path)
+        os.replace(part_path, out_path)
+        os.remove(until_path)
+        return size
+
+
+    def push_ws(self, ws_name: str) -> Dict[str, int]:
+        """
+        Uploads a workspace to a remote orchestrator that does not share the testbed volume, through the
+        delta sync protocol. Only chunks missing from the orchestrator's chunk cache are transferred, and
+        only changed files are rewritten. Fuzzer output directories are not uploaded. Returns counts of
+        files written, unchanged and removed by the orchestrator.
+
+        :param ws_name: name of workspace in testbed to upload
+        """
+        ws_path: str = os.path.join(self.env, ws_name)
+        if not os.path.isdir(ws_path):
+            raise ClientError("workspace `{}` does not exist in testbed path.".format(ws_name))
+
+        from fuzzbed_cli import sync
+        manifest = sync.build_manifest(ws_path, exclude=sync.output_dirs(ws_path))
+        digests: List[str] = sorted(set(c for entry in manifest.values() for c in entry["chunks"]))
+
+        def _post(path: str, **kwargs) -> Dict[str, Any]:
+            r = self.session.post(self._url("/api/sync/{}/{}".format(ws_name, path)), **kwargs)
+            if r.status_code != 200:
+                raise ClientError("failed with status {}".format(r.status_code))
+            response = r.json()
+            if response["status"] != "success":
+                raise ClientError(response["reason"])
+            return response
+
+        missing: List[str] = _post("missing", json={"chunks": digests})["missing"]
+        LOGGER.info("Uploading {} of {} chunks for `{}`.".format(len(missing), len(digests), ws_name))
+        if len(missing) > 0:
+            _post("chunks", data=sync.frame_chunks(ws_path, manifest, missing),
+                  headers={"Content-Type": "application/octet-stream"})
+
+        return _post("commit", json={"files": manifest})["files"]
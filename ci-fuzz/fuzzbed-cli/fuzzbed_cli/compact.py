@@ -0,0 +1,59 @@
+"""
+compact.py
+
+    DESCRIPTION:
+        Decodes pages of jobs listed by the orchestrator in its compact binary encoding, which lists
+        field names once rather than per job: magic, total count of matching jobs, next cursor, field
+        names and rows, with strings length-prefixed and values in the order of field names.
+
+    USAGE:
+        rows, total, cursor = compact.decode(response.content)
+"""
+import struct
+
+from typing import Optional, List, Dict, Tuple
+
+
+MIMETYPE = "application/x-fuzzbed-compact"
+MAGIC = b"FBC1"
+NULL = 0xFFFF
+COUNT = struct.Struct(">I")
+LENGTH = struct.Struct(">H")
+
+
+def _decode_string(data: bytes, offset: int) -> Tuple[Optional[str], int]:
+    (length,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    if length == NULL:
+        return (None, offset)
+    return (data[offset:offset + length].decode("utf-8", "replace"), offset + length)
+
+
+def decode(data: bytes) -> Tuple[List[Dict[str, Optional[str]]], int, Optional[str]]:
+    """
+    Decodes a page of jobs, returning the jobs, total count of matching jobs, and the next cursor if any.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError("not a compact job listing")
+
+    offset: int = len(MAGIC)
+    (total,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    next_cursor, offset = _decode_string(data, offset)
+
+    (num_fields,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    fields: List[str] = []
+    for _ in range(num_fields):
+        field, offset = _decode_string(data, offset)
+        fields.append(field)
+
+    (num_rows,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    rows: List[Dict[str, Optional[str]]] = []
+    for _ in range(num_rows):
+        row: Dict[str, Optional[str]] = dict()
+        for field in fields:
+            row[field], offset = _decode_string(data, offset)
+        rows.append(row)
+    return (rows, total, next_cursor)
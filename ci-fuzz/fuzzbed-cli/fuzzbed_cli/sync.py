@@ -0,0 +1,88 @@
+"""
+sync.py
+
+    DESCRIPTION:
+        Sending end of the delta sync protocol, for uploading a workspace to a remote orchestrator
+        that does not share the testbed volume. Files are split into fixed-size chunks identified by
+        their SHA-256, and only chunks missing from the orchestrator's chunk cache are uploaded.
+        Editing a single harness then only transfers the chunks of that file. Only imported by
+        `push`, such that it stays off the startup path of every other command.
+
+    USAGE:
+        manifest = sync.build_manifest("/path/to/workspace", exclude=["out"])
+"""
+import os
+import struct
+import hashlib
+
+from typing import List, Dict, Any, Iterator, Tuple
+
+
+CHUNK_SIZE = 64 * 1024
+
+FRAME_HEADER = struct.Struct(">32sI")
+
+# name of file in workspace tracking its last committed manifest, never uploaded
+STATE_NAME = ".fuzzbed_sync.json"
+
+
+def chunk_file(path: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yields hash and content of each chunk of a file.
+    """
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            yield (hashlib.sha256(block).hexdigest(), block)
+
+
+def output_dirs(ws_path: str) -> List[str]:
+    """
+    Returns directories of a workspace written to by fuzzers, which are not synced.
+    """
+    import configparser
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(os.path.join(ws_path, "config.ini"))
+    return [parser.get("test", "output_test_dir", fallback="out")]
+
+
+def build_manifest(ws_path: str, exclude: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Maps relative paths of every file in a workspace to its mode and chunk hashes.
+
+    :param ws_path: path to workspace
+    :param exclude: top-level directories of workspace to skip
+    """
+    manifest: Dict[str, Dict[str, Any]] = dict()
+    for (dirpath, dirnames, filenames) in os.walk(ws_path):
+        if dirpath == ws_path:
+            dirnames[:] = [d for d in dirnames if d not in exclude and not d.startswith(".")]
+
+        for filename in filenames:
+            path: str = os.path.join(dirpath, filename)
+            if filename == STATE_NAME or not os.path.isfile(path):
+                continue
+
+            manifest[os.path.relpath(path, ws_path)] = dict({
+                "mode": os.stat(path).st_mode & 0o777,
+                "chunks": [digest for (digest, _) in chunk_file(path)]
+            })
+    return manifest
+
+
+def frame_chunks(ws_path: str, manifest: Dict[str, Dict[str, Any]], wanted: List[str]) -> Iterator[bytes]:
+    """
+    Yields framed chunks for upload, re-reading files such that only one chunk is in memory at a time.
+
+    :param ws_path: path to workspace
+    :param manifest: manifest built for workspace
+    :param wanted: hashes of chunks to upload
+    """
+    remaining = set(wanted)
+    for rel_path in manifest.keys():
+        if not remaining.intersection(manifest[rel_path]["chunks"]):
+            continue
+
+        for (digest, block) in chunk_file(os.path.join(ws_path, rel_path)):
+            if digest in remaining:
+                remaining.discard(digest)
+                yield FRAME_HEADER.pack(bytes.fromhex(digest), len(block)) + block
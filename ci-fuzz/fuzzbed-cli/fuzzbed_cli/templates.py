@@ -23,6 +23,19 @@ ALLOWED = [
 NOT_SUPPORTED = ["manticore", "angr", "libfuzzer"]
 
 
+# compile modes for building a harness, either forking per input (default),
+# or executing inputs in a loop within a single persistent process
+COMPILE_MODES = ["fork", "persistent"]
+
+
+# executors that support persistent mode, and compiler arguments for
+# building the persistent harness with each
+PERSISTENT_ARGS = {
+    "afl": "-DFUZZBED_PERSISTENT_AFL",
+    "honggfuzz": "-ldeepstate_LF"
+}
+
+
 # defines the default manifest section to write to harness
 # TODO: define as custom AttrDict type
 MANIFEST_CONFIG = {
@@ -37,22 +50,60 @@ MANIFEST_CONFIG = {
     "provision_steps": []
 }
 
+# optional manifest entries, not required to be present in a user-specified config
+MANIFEST_OPTIONS = {
+
+    # fuzz every `TEST()` in the harness, each on its own core and time budget,
+    # with a single image and harness binary shared between them
+    "multiplex": False,
+
+    # number of cores to multiplex tests over (default is all available)
+    "cores": "",
+
+    # size of tmpfs (ie. `512m`) to write fuzzer outputs to rather than the shared volume,
+    # periodically flushed by the orchestrator (default is disabled)
+    "output_tmpfs": "",
+
+    # how the harness is built for execution, see COMPILE_MODES
+    "compile_mode": "fork",
+
+    # extract a dictionary from the harness, binary and seeds before fuzzing,
+    # for executors that accept one
+    "dictionary": True,
+
+    # sanitizers (ie. `address,undefined`) to build a second harness with, re-executing each output
+    # of the fast build that is fuzzed in the background (default is disabled)
+    "sanitizer": "",
+
+    # additional executors (ie. `["honggfuzz", "eclipser"]`) to compile the harness for at build time,
+    # in parallel and after provisioning once, such that the image can be fuzzed by any of them
+    "executors": [],
+
+    # memory (ie. `4g`) to request at least for each worker when deployed to Kubernetes, otherwise
+    # sized from usage measured in previous runs
+    "memory": "",
+
+    # seed jobs from the minimized union of past jobs' queues on the same harness (or test),
+    # along with the workspace's own seeds
+    "warm_start": True,
+}
+
 # default configuration file to be generated for a fresh workspace
 DEFAULT_CONFIG = {
-    "manifest": MANIFEST_CONFIG,
+    "manifest": dict(MANIFEST_CONFIG, **MANIFEST_OPTIONS),
     "internal": {
         "server_addr": "0.0.0.0",
         "server_port": 123
     },
     "compile": {
         "compile_test": DEFAULT_HARNESS_NAME,
-        "compile_args": "",
+        "compiler_args": "",
     },
     "test": {
         "input_seeds": "in",
         "output_test_dir": "out",
         "timeout": "3600",
-        "no_fork": True
+        "no_fork": False
     }
 }
 
@@ -75,12 +126,39 @@ COPY . /home/{USER}/{WS_NAME}
 {PROVISION_STEPS}
 
 
+# Compile step for building the harness once into the image, such that
+# every worker launched off of it shares the same binary
+{COMPILE_STEP}
+
+
 # Run the fuzzer executor with the target's corresponding
 # configuration path
 CMD ["deepstate-{TOOL}", "--config", "{CONF_FILE}"]
 """
 
 
+# compiles harness at build time, output under `{WS_NAME}/harness` with a suffix chosen by the executor's
+# frontend (ie. `harness.afl`, `harness.hfuzz`, or `harness.fast.angora` and `harness.taint.angora`)
+COMPILE_STEP = """RUN deepstate-{TOOL} --compile_test {WS_NAME}/{HARNESS} --out_test_name {WS_NAME}/harness {COMPILER_ARGS}
+"""
+
+
+# compiles harness for several executors in parallel at build time, each output under `{WS_NAME}/harness` with
+# its frontend's suffix (see COMPILE_STEP), failing the build if any of them fails
+PARALLEL_COMPILE_STEP = """RUN pids=""; \\
+{COMPILES}    for pid in $pids; do wait $pid || exit 1; done
+"""
+
+# single background compile within PARALLEL_COMPILE_STEP
+PARALLEL_COMPILE = """    deepstate-{TOOL} --compile_test {WS_NAME}/{HARNESS} --out_test_name {WS_NAME}/harness {COMPILER_ARGS} & pids="$pids $!"; \\
+"""
+
+
+# compiles a native DeepState harness with sanitizers, output as `{WS_NAME}/harness.san`
+SANITIZER_COMPILE_STEP = """RUN clang++ -g -O1 -fno-omit-frame-pointer -fsanitize={SANITIZER} {WS_NAME}/{HARNESS} -o {WS_NAME}/harness.san -ldeepstate {COMPILER_ARGS}
+"""
+
+
 DEFAULT_TEST_HARNESS = """// {HARNESS_NAME}
 //
 
@@ -95,3 +173,46 @@ TEST(Unit, TestName) {
     // .. include test logic here
 }
 """
+
+
+# harness template for persistent mode, where the process is reused across inputs
+PERSISTENT_TEST_HARNESS = """// {HARNESS_NAME}
+//
+// Harness built for persistent mode (`compile_mode = persistent`), where inputs
+// are executed in a loop within one process rather than forking per input.
+
+#include <deepstate/DeepState.hpp>
+
+using namespace deepstate;
+
+
+TEST(Unit, TestName) {
+    LOG(TRACE) << "Running unit test";
+
+    // .. include test logic here. Any global state must be reset by
+    // the test, since the process is reused across inputs.
+}
+
+
+#ifdef FUZZBED_PERSISTENT_AFL
+
+// number of inputs executed before the AFL fork server respawns the process
+#define FUZZBED_PERSISTENT_ITERS 1000
+
+int main(int argc, char *argv[]) {
+    DeepState_InitOptions(argc, argv);
+    DeepState_Setup();
+
+    while (__AFL_LOOP(FUZZBED_PERSISTENT_ITERS)) {
+        DeepState_RunSingleSavedTestCase();
+    }
+
+    DeepState_Teardown();
+    return 0;
+}
+
+#endif
+
+// honggfuzz drives the `LLVMFuzzerTestOneInput` entry point from DeepState's
+// libFuzzer build in-process, so no main is needed
+"""
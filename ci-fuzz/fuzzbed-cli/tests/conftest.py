@@ -0,0 +1,14 @@
+"""
+conftest.py
+
+    DESCRIPTION:
+        Shared setup for CLI tests. Tests run against the `fuzzbed_cli` package in this tree,
+        and need neither DeepState nor an orchestrator.
+
+    USAGE:
+        $ cd fuzzbed-cli && python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,67 @@
+"""
+test_client.py
+
+    DESCRIPTION:
+        Tests for the client's handling of responses from the orchestrator, against a fake session.
+"""
+import io
+import os
+import tarfile
+
+import pytest
+
+from fuzzbed_cli.client import Client
+
+
+class FakeSession(object):
+    """
+    Session replying to every request with a canned body.
+    """
+
+    class Response(object):
+        def __init__(self, body):
+            self.status_code = 200
+            self.raw = io.BytesIO(body)
+
+    def __init__(self, body):
+        self.body = body
+
+    def get(self, url, **kwargs):
+        return FakeSession.Response(self.body)
+
+
+def make_tar(files):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as archive:
+        for (name, data) in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("TESTBED", str(tmp_path))
+    return Client()
+
+
+def test_export_corpus_stays_in_destination(client, tmp_path):
+    out_dir = tmp_path / "export"
+    os.makedirs(str(out_dir))
+    os.symlink(str(tmp_path), str(out_dir / "link"))
+
+    client._session = FakeSession(make_tar({
+        "input/a": b"a",
+        "input/../b": b"b",
+        "input/../../escape": b"x",
+        "/abs": b"x",
+        "link/escape": b"x",
+        ".": b"x",
+    }))
+    client.export_corpus("json", str(out_dir))
+
+    assert (out_dir / "input" / "a").read_bytes() == b"a"
+    assert (out_dir / "b").read_bytes() == b"b"
+    assert sorted(os.listdir(str(tmp_path))) == ["export"]
+    assert sorted(os.listdir(str(out_dir))) == ["b", "input", "link"]
@@ -0,0 +1,38 @@
+"""
+test_compact.py
+
+    DESCRIPTION:
+        Tests for decoding job listings in the orchestrator's compact encoding.
+"""
+import struct
+
+import pytest
+
+from fuzzbed_cli import compact
+
+
+# a page as encoded by the orchestrator (see orchestrator/tests/test_listing.py)
+COMPACT_PAGE = (
+    b"FBC1\x00\x00\x00\x05\x00\x08Y2lfeG1s\x00\x02\x00\x04name\x00\rcrashes_found"
+    b"\x00\x00\x00\x02\x00\x07ci_json\x00\x012\x00\x06ci_xml\xff\xff"
+)
+
+
+def test_decode():
+    rows, total, cursor = compact.decode(COMPACT_PAGE)
+    assert rows == [{"name": "ci_json", "crashes_found": "2"}, {"name": "ci_xml", "crashes_found": None}]
+    assert total == 5
+    assert cursor == "Y2lfeG1s"
+
+
+def test_decode_last_page():
+    data = compact.MAGIC + compact.COUNT.pack(0) + compact.LENGTH.pack(compact.NULL) \
+        + compact.LENGTH.pack(1) + compact.LENGTH.pack(4) + b"name" + compact.COUNT.pack(0)
+    assert compact.decode(data) == ([], 0, None)
+
+
+def test_decode_invalid():
+    with pytest.raises(ValueError):
+        compact.decode(b'{"jobs": []}')
+    with pytest.raises(struct.error):
+        compact.decode(COMPACT_PAGE[:12])
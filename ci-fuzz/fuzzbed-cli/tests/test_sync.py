@@ -0,0 +1,77 @@
+"""
+test_sync.py
+
+    DESCRIPTION:
+        Tests for the sending end of the delta sync protocol: chunking, manifests and framing.
+"""
+import os
+import hashlib
+
+from fuzzbed_cli import sync
+
+
+def make_workspace(tmp_path, harness=b"int main() {}"):
+    ws_path = tmp_path / "json"
+    os.makedirs(str(ws_path / "input"))
+    os.makedirs(str(ws_path / "results" / "queue"))
+    os.makedirs(str(ws_path / ".git"))
+    (ws_path / "config.ini").write_text("[test]\noutput_test_dir = results\n")
+    (ws_path / "harness.cpp").write_bytes(harness)
+    (ws_path / "input" / "seed").write_bytes(b"seed")
+    (ws_path / "results" / "queue" / "id:000000").write_bytes(b"output")
+    (ws_path / ".git" / "HEAD").write_bytes(b"ref")
+    (ws_path / sync.STATE_NAME).write_text("{}")
+    return str(ws_path)
+
+
+def unframe(data):
+    blocks = dict()
+    offset = 0
+    while offset < len(data):
+        digest, length = sync.FRAME_HEADER.unpack_from(data, offset)
+        offset += sync.FRAME_HEADER.size
+        blocks[digest.hex()] = data[offset:offset + length]
+        offset += length
+    return blocks
+
+
+def test_chunk_file(tmp_path):
+    path = tmp_path / "big"
+    data = os.urandom(sync.CHUNK_SIZE * 2 + 10)
+    path.write_bytes(data)
+
+    chunks = list(sync.chunk_file(str(path)))
+    assert [len(block) for (_, block) in chunks] == [sync.CHUNK_SIZE, sync.CHUNK_SIZE, 10]
+    assert all(digest == hashlib.sha256(block).hexdigest() for (digest, block) in chunks)
+    assert b"".join(block for (_, block) in chunks) == data
+
+
+def test_output_dirs(tmp_path):
+    assert sync.output_dirs(make_workspace(tmp_path)) == ["results"]
+    assert sync.output_dirs(str(tmp_path / "missing")) == ["out"]
+
+
+def test_build_manifest_skips_outputs_and_state(tmp_path):
+    ws_path = make_workspace(tmp_path)
+    os.chmod(os.path.join(ws_path, "input", "seed"), 0o755)
+
+    manifest = sync.build_manifest(ws_path, exclude=sync.output_dirs(ws_path))
+    assert sorted(manifest.keys()) == ["config.ini", "harness.cpp", os.path.join("input", "seed")]
+    assert manifest[os.path.join("input", "seed")] == dict({
+        "mode": 0o755,
+        "chunks": [hashlib.sha256(b"seed").hexdigest()]
+    })
+
+
+def test_frame_chunks_only_wanted(tmp_path):
+    harness = os.urandom(sync.CHUNK_SIZE) + b"changed"
+    ws_path = make_workspace(tmp_path, harness=harness)
+    (tmp_path / "json" / "input" / "copy").write_bytes(b"seed")
+
+    # only the harness's changed chunk, plus a chunk shared by two files, are missing
+    manifest = sync.build_manifest(ws_path, exclude=["results"])
+    wanted = [hashlib.sha256(b"changed").hexdigest(), hashlib.sha256(b"seed").hexdigest()]
+
+    blocks = unframe(b"".join(sync.frame_chunks(ws_path, manifest, wanted)))
+    assert blocks == dict({wanted[0]: b"changed", wanted[1]: b"seed"})
+    assert list(sync.frame_chunks(ws_path, manifest, [])) == []
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+tmpfs.py
+
+    DESCRIPTION:
+        Benchmarks executions per second of a workspace's workers writing outputs directly to the
+        shared volume, against workers writing outputs to a tmpfs flushed to it. Both run off the
+        workspace's already built image through the orchestrator's own Worker, for a fixed duration,
+        after which executions are read out of AFL's `fuzzer_stats` on the shared volume.
+
+        Requires a Docker engine, the `tests` volume mounted at `$TESTBED`, and the workspace image
+        built (ie. by a previous job), with an AFL-based executor.
+
+    USAGE:
+        TESTBED=/tests python benchmarks/tmpfs.py --workspace json [--seconds N] [--tmpfs_size 512m]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import config
+from server import stats
+from server import backend
+from server.workspace import Workspace
+from server.worker import Worker, WorkerOptions
+
+from typing import Dict, Optional
+
+
+def bench(client, ws: Workspace, seconds: int, tmpfs_size: Optional[str]) -> Dict[str, str]:
+    """
+    Fuzzes a workspace with a single worker for a duration, returning its fuzzer statistics.
+    """
+    name: str = "bench_{}_{}".format(ws.name, "tmpfs" if tmpfs_size else "volume")
+    worker = Worker(client, name, ws, backend.IMAGE_TAG.format(ws.name.lower()), WorkerOptions(tmpfs_size=tmpfs_size))
+    shutil.rmtree(worker.out_dir, ignore_errors=True)
+
+    # the image's default `CMD` writes outputs within the container, so always write to the shared volume
+    if tmpfs_size is None:
+        worker.command = lambda resume=False: backend.default_command(ws, worker.out_dir)
+
+    worker.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        worker.stop()
+        worker.container.remove(force=True)
+    return stats.read_stats(worker.out_dir)
+
+
+def execs_per_sec(fuzzer_stats: Dict[str, str]) -> float:
+    """
+    Average executions per second over a run, rather than AFL's instantaneous `execs_per_sec`.
+    """
+    elapsed: int = int(fuzzer_stats["last_update"]) - int(fuzzer_stats["start_time"])
+    return int(fuzzer_stats["execs_done"]) / max(1, elapsed)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks exec/s of workers with outputs on tmpfs")
+    parser.add_argument("--workspace", type=str, required=True, help="Name of workspace in testbed, with a built image.")
+    parser.add_argument("--seconds", type=int, default=120, help="Duration to fuzz with each output mode (default is 120).")
+    parser.add_argument("--tmpfs_size", type=str, default="512m", help="Size of tmpfs for outputs (default is 512m).")
+    args = parser.parse_args()
+
+    import docker
+    client = docker.from_env()
+    ws = Workspace(config.TESTBED, args.workspace)
+
+    # flushing is only measured at its default interval if the run outlasts it
+    if args.seconds < config.FLUSH_INTERVAL * 2:
+        print("[!] Runs shorter than {}s flush at most once.".format(config.FLUSH_INTERVAL * 2))
+
+    results: Dict[str, float] = dict()
+    print("Outputs\t\t|\tExecs\t\t|\tExec/s")
+    for (mode, tmpfs_size) in [("volume", None), ("tmpfs", args.tmpfs_size)]:
+        fuzzer_stats: Dict[str, str] = bench(client, ws, args.seconds, tmpfs_size)
+        if "execs_done" not in fuzzer_stats:
+            print("{}\t\t|\tno `fuzzer_stats` written, is the executor AFL-based?".format(mode))
+            return 1
+
+        results[mode] = execs_per_sec(fuzzer_stats)
+        print("{}\t\t|\t{}\t\t|\t{:.1f}".format(mode, fuzzer_stats["execs_done"], results[mode]))
+
+    print("\ntmpfs speedup: {:.2f}x".format(results["tmpfs"] / max(results["volume"], 1e-9)))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -15,11 +15,33 @@ fuzzbed-server
 """
 
 import os
+import time
+import tempfile
 import flask
 import docker
-import redis
 
-import .config
+from server import config
+from server import backend
+from server import dictionary
+from server import calibrate
+from server import metrics
+from server import profiler
+from server import stats
+from server.workspace import Workspace, WorkspaceError
+from server.worker import Worker, WorkerOptions
+from server.scheduler import TestScheduler
+from server.crossval import CrossValidator
+from server.usage import UsageMonitor
+from server.watcher import ArtifactWatcher
+from server import k8s
+from server import listing
+from server.warmstart import BestCorpus, CorpusHarvester
+from server.stream import JobStream
+from server.reaper import JobReaper
+from server.corpus import CorpusStore, CorpusError
+from server.artifacts import ArtifactArchive, SnapshotStore, parse_range
+from server import sync
+from server.storage import Storage
 
 # instantiate flask web server
 app = flask.Flask(__name__)
@@ -28,20 +50,296 @@ app.secret_key = config.SECRET_KEY
 # instantiate Docker engine
 client = docker.from_env()
 
-# start redis with copnfiguration
-store = redis.Redis(host=config.REDIS_HOST, port=config.REDIS_PORT, db=0)
+# store for job info, statistics and usage, over a connection pool shared by every thread
+storage = Storage.from_url(config.REDIS_URL)
+
+# content-addressed corpus store shared by all workspaces
+corpus = CorpusStore(config.CORPUS_DIR)
+
+# best corpora of past campaigns per target, kept in the corpus store
+best_corpus = BestCorpus(client, corpus)
+
+# chunk cache for workspaces synced from remote clients
+chunks = CorpusStore(config.CHUNK_DIR)
+
+# member lists of served pull archives, for resuming them with the same layout
+snapshots = SnapshotStore(config.PULL_SNAPSHOT_DIR, config.PULL_SNAPSHOT_TTL)
+
+# follows output directories of active jobs for new files, on behalf of subscribers
+watcher = ArtifactWatcher()
+watcher.start()
+
+# container states for listing jobs, reused for a short interval
+container_states = listing.ContainerStates(client, config.INFO_STATE_TTL)
+
+# active schedulers for jobs multiplexing every test in a harness
+schedulers = dict()
+
+# active single workers, and monitors re-tuning their execution timeout
+workers = dict()
+monitors = dict()
+
+# validators re-executing outputs of jobs against their sanitizer build
+validators = dict()
+
+# monitors sampling peak memory and CPU of jobs' workers
+usage_monitors = dict()
+
+# harvesters merging queues of finished jobs into best corpora
+harvesters = dict()
+
+
+def record_job(job_name):
+    """
+    Returns a callback that records fields to the info of a job in the store.
+    """
+    def record(fields):
+        storage.record_job(job_name, fields)
+    return record
+
+
+def record_usage(ws_name):
+    """
+    Returns a callback that records peak memory and CPU of a workspace's workers in the store,
+    keeping the highest peaks across runs.
+    """
+    def record(memory, cpu):
+        storage.record_usage(ws_name, memory, cpu)
+    return record
+
+
+if config.METRICS_ENABLED:
+
+    @app.before_request
+    def start_request_timer():
+        flask.g.request_start = time.perf_counter()
+
+
+    @app.after_request
+    def record_request_latency(response):
+        route = flask.request.url_rule.rule if flask.request.url_rule is not None else "unmatched"
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - flask.g.request_start,
+            route=route, method=flask.request.method)
+        return response
+
+
+@metrics.gauge("fuzzbed_queue_depth", "Number of multiplexed tests queued for a free core.")
+def queue_depth():
+    pending = sum(1 for s in schedulers.values() for run in s.runs.values() if run.status == "pending")
+    return {(): pending}
+
+
+@metrics.gauge("fuzzbed_running_jobs", "Number of jobs with active workers.")
+def running_jobs():
+    return {(): len(workers) + sum(1 for s in schedulers.values() if s.is_alive())}
+
+
+@metrics.gauge("fuzzbed_execs_per_sec", "Executions per second of each running worker, from its fuzzer statistics.")
+def execs_per_sec():
+    samples = dict()
+    states = container_states.get()
+    for job_name in list(workers.keys()) + list(schedulers.keys()):
+        for worker in _job_workers(job_name):
+
+            # statistics of finished workers hold their last rate, and are left out until their job is reaped
+            if states.get(worker.name) != "running":
+                continue
+            value = stats.read_stats(worker.out_dir).get("execs_per_sec")
+            if value is not None:
+                samples[(("job", job_name), ("worker", worker.name))] = float(value)
+    return samples
+
+
+def _prepare(ws_name, executor, prepared):
+    """
+    Builds the image for a workspace once per batch of jobs, and runs pre-flight stages once
+    per executor fuzzing it.
+    """
+    key = (ws_name, executor)
+    if key not in prepared:
+        ws = Workspace(config.TESTBED, ws_name, executor=executor)
+
+        # image is built once, and shared between all tests if multiplexed, and all executors compiled into it
+        if ws_name not in prepared:
+
+            # materialize view of workspace seeds from the corpus store, if any were imported
+            seeds = ws.get("test", "input_seeds", "in")
+            corpus.materialize(ws.name, ws.test_dir("input_seeds", "in"), seeds)
+            prepared[ws_name] = backend.build_image(client, ws)
+        image = prepared[ws_name]
+
+        # pre-flight: extract dictionary for executors that accept one, and calibrate the
+        # per-execution timeout from the seed corpus
+        prepared[key] = (ws, image, dictionary.build(client, ws, image), calibrate.calibrate(client, ws, image))
+    return prepared[key]
+
+
+def _warm_start(job_name, ws, image, multiplex):
+    """
+    Materializes seeds of a job's targets from their best corpora.
+    """
+    if not config.WARMSTART_ENABLED or not ws.getboolean("manifest", "warm_start", True):
+        return dict()
+
+    targets = ws.enumerate_tests() if multiplex else [None]
+    return best_corpus.seed(ws, image, job_name, targets)
+
+
+def _init_job(params, prepared):
+    """
+    Provisions worker(s) for a single job, returning its status.
+    """
+    job_name = params.get("job_name")
+    if job_name in workers or job_name in schedulers:
+        raise ValueError("job `{}` already exists".format(job_name))
+
+    ws, image, dict_path, exec_timeout = _prepare(params.get("test", ""), params.get("executor") or None, prepared)
+
+    multiplex = params.get("multiplex")
+    if multiplex is None:
+        multiplex = ws.getboolean("manifest", "multiplex")
+    else:
+        multiplex = str(multiplex).lower() in ["1", "true", "yes"]
+
+    tmpfs_size = params.get("output_tmpfs", ws.get("manifest", "output_tmpfs"))
+    options = WorkerOptions(dictionary=dict_path, exec_timeout=exec_timeout, tmpfs_size=tmpfs_size or None,
+        seed_dirs=_warm_start(job_name, ws, image, multiplex))
+
+    record = record_job(job_name)
+    try:
+        _launch_job(job_name, ws, image, options, multiplex, record)
+    except docker.errors.DockerException:
+
+        # tear down what was launched before the failure, such that the job can be submitted again
+        _remove_job(job_name)
+        raise
+
+    return dict({
+        "job_name": job_name,
+        "status": "success",
+        "reason": None
+    })
+
+
+def _launch_job(job_name, ws, image, options, multiplex, record):
+    """
+    Launches worker(s) of a job, and the background threads following them.
+    """
+    record({
+        "started": str(int(time.time())),
+        "workspace": ws.name,
+        "executor": ws.executor,
+        "image": image,
+        "multiplex": str(multiplex),
+        "exec_timeout": str(options.exec_timeout or "")
+    })
+
+    if multiplex:
+        scheduler = TestScheduler(client, job_name, ws, image, options, record=record)
+        schedulers[job_name] = scheduler
+        scheduler.start()
+    else:
+        worker = Worker(client, job_name, ws, image, options, timeout=ws.timeout)
+        worker.start()
+        workers[job_name] = worker
+
+        if options.exec_timeout is not None:
+            monitor = calibrate.TimeoutMonitor(worker, calibrate.ExecTimeout(options.exec_timeout), record)
+            monitors[job_name] = monitor
+            monitor.start()
+
+    # fuzz with the fast build, while re-executing its outputs against the sanitizer build
+    if ws.sanitizer is not None:
+        validator = CrossValidator(client, watcher, job_name, ws, image,
+            workers=lambda: _job_workers(job_name),
+            alive=lambda: _job_alive(job_name),
+            record=record)
+        validators[job_name] = validator
+        validator.start()
+
+    # measure peak usage, for sizing later deployments of the workspace
+    monitor = UsageMonitor(
+        workers=lambda: _job_workers(job_name),
+        alive=lambda: _job_alive(job_name),
+        record=record_usage(ws.name))
+    usage_monitors[job_name] = monitor
+    monitor.start()
+
+    # merge queues into best corpora once finished, for warm starting later jobs on the same targets
+    if config.WARMSTART_ENABLED and ws.getboolean("manifest", "warm_start", True):
+        harvester = CorpusHarvester(best_corpus, job_name, ws, image,
+            workers=lambda: _job_workers(job_name),
+            alive=lambda: _job_alive(job_name))
+        harvesters[job_name] = harvester
+        harvester.start()
+
+
+def _remove_job(job_name):
+    """
+    Stops a job's workers and background threads, and removes them from the orchestrator's bookkeeping.
+    """
+    for threads in [harvesters, usage_monitors, validators, monitors, schedulers]:
+        thread = threads.pop(job_name, None)
+        if thread is not None:
+            thread.stop()
+
+    worker = workers.pop(job_name, None)
+    if worker is not None and worker.container is not None:
+        worker.stop()
+
+
+def _job_info(job_names):
+    """
+    Retrieves info for jobs, fetching recorded info and statistics from the store in a single round trip each.
+    """
+    infos = dict()
+    now = int(time.time())
+    for (job_name, info, job_stats) in zip(job_names, storage.job_info(job_names), storage.job_stats(job_names)):
+        alive = _job_alive(job_name)
+
+        # a finished job's uptime stops at the first time it is seen no longer running
+        started = int(info.get("started") or 0)
+        if started and not alive and not info.get("finished") and (job_name in workers or job_name in schedulers):
+            info["finished"] = str(now)
+            storage.record_job(job_name, {"finished": info["finished"]})
+        uptime = (int(info.get("finished") or now) - started) if started else None
+
+        worker = workers.get(job_name)
+        run_cmd = worker.command() if worker is not None else None
+        response = dict({
+            "alive": alive,
+            "uptime": uptime,
+            "run_cmd": " ".join(run_cmd) if run_cmd else "",
+            "crashes_found": job_stats.get("unique_crashes", ""),
+            "hangs_found": job_stats.get("unique_hangs", "")
+        })
+
+        # recorded job info, ie. chosen execution timeout, and crashes bucketed by cross-validation
+        response.update(info)
+
+        # report per-test status for jobs multiplexed over a harness
+        if job_name in schedulers:
+            response["tests"] = schedulers[job_name].status()
+
+        infos[job_name] = response
+    return infos
 
 
 @app.route("/api/init", methods=["POST"])
 def init_container():
     """
     /api/init (POST)
-        Provisions a new Docker container from a stored test
-        in the shared volume.
+        Provisions new Docker containers from stored tests
+        in the shared volume. Accepts form params for a single job,
+        or a JSON body with a batch of jobs, ie. `{"jobs": [{...}, ...]}`.
+        Workspaces shared by jobs in a batch are built once.
 
         Params:
             job_name: identifier for container job
             test: name of target created in shared volume
+            multiplex: optional, fuzz every `TEST()` in the harness (overrides manifest)
+            output_tmpfs: optional, size of tmpfs to write outputs to (overrides manifest)
+            executor: optional, executor compiled into the image to fuzz with (overrides manifest)
     """
 
     method = flask.request.method
@@ -51,23 +349,370 @@ def init_container():
             "reason": "cannot communicate with {}".format(method)
         })
 
-    # DO IT!
+    body = flask.request.get_json(silent=True)
+    batch = body is not None and "jobs" in body
+    jobs = body["jobs"] if batch else [flask.request.form.to_dict()]
+
+    prepared = dict()
+    results = []
+    for params in jobs:
+        try:
+            results.append(_init_job(params, prepared))
+        except (WorkspaceError, ValueError, docker.errors.DockerException) as e:
+
+            # failures are reported per job, such that the client learns which jobs of a batch were launched
+            results.append(dict({
+                "job_name": params.get("job_name"),
+                "status": "failed",
+                "reason": str(e)
+            }))
 
+    if not batch:
+        return flask.jsonify(results[0])
+
+    failed = [r for r in results if r["status"] != "success"]
     return flask.jsonify({
-        "status": "success",
-        "reason": None
+        "status": "failed" if len(failed) > 0 else "success",
+        "reason": "{} of {} jobs failed".format(len(failed), len(results)) if len(failed) > 0 else None,
+        "jobs": results
     })
 
 
+def _job_summaries():
+    """
+    Summarizes every job from the orchestrator's bookkeeping, without querying the store.
+    """
+    states = container_states.get()
+    summaries = dict()
+    for (job_name, worker) in workers.items():
+        summaries[job_name] = dict({
+            "name": job_name,
+            "workspace": worker.ws.name,
+            "executor": worker.ws.executor,
+            "state": states.get(worker.name, "removed")
+        })
+    for (job_name, scheduler) in schedulers.items():
+        summaries[job_name] = dict({
+            "name": job_name,
+            "workspace": scheduler.ws.name,
+            "executor": scheduler.ws.executor,
+            "state": "running" if scheduler.is_alive() else "exited"
+        })
+    return summaries
+
+
 @app.route("/api/info", methods=["GET"])
 def ps_info():
     """
     /api/info (GET)
-        Provides general information about all
-        running container processes.
+        Lists jobs a page at a time, ordered by name, or provides
+        info for specific jobs in bulk.
+
+        Params:
+            jobs: optional, comma-seperated job names to retrieve info for in bulk
+            workspace, executor, state: optional, comma-seperated values to filter jobs by
+            fields: optional, comma-seperated fields to list (default is name, workspace, executor and state)
+            limit: optional, maximum jobs per page (default is `INFO_PAGE_SIZE`)
+            cursor: optional, cursor of next page returned by previous request
+            format: optional, `compact` for the compact binary encoding (default is JSON)
+    """
+    jobs = flask.request.args.get("jobs")
+    if jobs:
+        return flask.jsonify(_job_info(jobs.split(",")))
+
+    try:
+        query = listing.JobListing.from_args(flask.request.args, config.INFO_PAGE_SIZE)
+        summaries, total, next_cursor = query.page(_job_summaries(), flask.request.args.get("cursor"))
+    except listing.ListingError as e:
+        return flask.jsonify({
+            "status": "failed",
+            "reason": str(e)
+        })
+
+    # only fetch recorded info for fields that need it, for the jobs on this page
+    recorded = storage.job_fields([summary["name"] for summary in summaries], query.recorded_fields)
+
+    rows = [query.project(summary, info) for (summary, info) in zip(summaries, recorded)]
+    if flask.request.args.get("format") == "compact":
+        return flask.Response(listing.encode_compact(query.fields, rows, total, next_cursor),
+            mimetype=listing.COMPACT_MIMETYPE)
+
+    return flask.jsonify({
+        "jobs": rows,
+        "total": total,
+        "next": next_cursor
+    })
+
+
+def _job_workers(job_name):
+    """
+    Returns the active workers of a job, whether single or multiplexed.
     """
-    active = client.containers.list()
-    return flask.jsonify(active)
+    if job_name in workers:
+        return [workers[job_name]]
+    elif job_name in schedulers:
+        return [run.worker for run in schedulers[job_name].runs.values() if run.worker is not None]
+    return []
+
+
+def _job_alive(job_name):
+    """
+    Returns whether a job still has workers running, or tests queued to run.
+    """
+    if job_name in schedulers and schedulers[job_name].is_alive():
+        return True
+    return any(worker.running for worker in _job_workers(job_name))
+
+
+# records fuzzer statistics of every job in a single round trip, for aggregating totals over targets
+stats_recorder = stats.StatsRecorder(
+    jobs=lambda: dict((name, _job_workers(name)) for name in list(workers.keys()) + list(schedulers.keys())),
+    record=storage.record_stats)
+stats_recorder.start()
+
+
+def _job_settled(job_name):
+    """
+    Returns whether a job's workers are done, along with the background threads following them.
+    """
+    if _job_alive(job_name):
+        return False
+    threads = [t[job_name] for t in [harvesters, usage_monitors, validators, monitors] if job_name in t]
+    return not any(thread.is_alive() for thread in threads)
+
+
+def _reap_job(job_name, settled):
+    """
+    Removes a finished job from the orchestrator's bookkeeping, keeping when it finished in the store.
+    """
+    if storage.job_field(job_name, "finished") is None:
+        storage.record_job(job_name, {"finished": str(int(settled))})
+    _remove_job(job_name)
+
+
+# removes finished jobs, such that the orchestrator's bookkeeping and the loops over it stay bounded
+reaper = JobReaper(jobs=lambda: list(workers.keys()) + list(schedulers.keys()), settled=_job_settled, remove=_reap_job)
+reaper.start()
+
+
+@app.route("/api/stream", methods=["GET"])
+def stream():
+    """
+    /api/stream (GET)
+        Streams container log lines, statistics deltas and new
+        crashes or hangs of jobs as server-sent events over a
+        single connection.
+
+        Params:
+            jobs: comma-seperated job names to follow
+    """
+    job_names = [name for name in flask.request.args.get("jobs", "").split(",") if name]
+
+    # workers are looked up again on every interval, to follow tests launched later and relaunched workers
+    jobs = lambda: dict((name, _job_workers(name)) for name in job_names)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return flask.Response(JobStream(jobs, watcher).events(), mimetype="text/event-stream", headers=headers)
+
+
+@app.route("/api/corpus/<ws_name>", methods=["POST"])
+def import_corpus(ws_name):
+    """
+    /api/corpus/<ws_name> (POST)
+        Imports inputs from a (possibly compressed) tar stream
+        into the corpus store, under a workspace's manifest.
+
+        Params:
+            ws_name: name of workspace in shared volume
+            prefix: optional, path in workspace to import under (default is `input_seeds`)
+    """
+    try:
+        ws = Workspace(config.TESTBED, ws_name)
+        prefix = flask.request.args.get("prefix", ws.get("test", "input_seeds", "in"))
+        count = corpus.import_tar(ws.name, flask.request.stream, prefix)
+    except (WorkspaceError, CorpusError) as e:
+        return flask.jsonify({
+            "status": "failed",
+            "reason": str(e)
+        })
+
+    return flask.jsonify({
+        "status": "success",
+        "reason": None,
+        "imported": count
+    })
+
+
+@app.route("/api/corpus/<ws_name>", methods=["GET"])
+def export_corpus(ws_name):
+    """
+    /api/corpus/<ws_name> (GET)
+        Exports inputs of a workspace's manifest in the corpus
+        store as a tar archive.
+
+        Params:
+            ws_name: name of workspace in shared volume
+            prefix: optional, path in workspace to export (default is all)
+    """
+    archive = tempfile.TemporaryFile()
+    corpus.export_tar(ws_name, archive, flask.request.args.get("prefix", ""))
+    archive.seek(0)
+    return flask.send_file(archive, mimetype="application/x-tar")
+
+
+@app.route("/api/pull/<job_name>", methods=["GET"])
+def pull(job_name):
+    """
+    /api/pull/<job_name> (GET)
+        Streams crashes and hangs of a job, deduplicated by content,
+        and optionally its corpus, as a single tar archive. Supports
+        `Range: bytes=N-` for resuming with the same `until`.
+
+        Params:
+            job_name: name of job to pull artifacts of
+            corpus: optional, include queue entries (default is false)
+            since: optional, only artifacts modified after timestamp
+            until: optional, snapshot token returned as `X-Fuzzbed-Until`, for resuming
+    """
+    try:
+        offset = parse_range(flask.request.headers.get("Range"))
+        since = float(flask.request.args.get("since", 0))
+    except ValueError as e:
+        return flask.jsonify({
+            "status": "failed",
+            "reason": str(e)
+        }), 400
+
+    kinds = ["crashes", "hangs"]
+    if flask.request.args.get("corpus", "").lower() in ["1", "true", "yes"]:
+        kinds.append("corpus")
+    key = "{}:{}".format(job_name, ",".join(kinds))
+
+    # resumes are served from the persisted layout, since outputs may be flushed with mtimes inside it
+    until = flask.request.args.get("until")
+    if until is not None:
+        archive = snapshots.load(key, until)
+        if archive is None:
+            return flask.Response(status=416, headers={"Content-Range": "bytes */0"})
+        token = until
+    else:
+        out_dirs = dict((worker.name, worker.out_dir) for worker in _job_workers(job_name))
+        if job_name in validators:
+            out_dirs[validators[job_name].name] = validators[job_name].out_dir
+        if len(out_dirs) == 0:
+
+            # job is no longer active, fall back to recorded workspace outputs
+            ws_name = storage.job_field(job_name, "workspace")
+            try:
+                if ws_name is None:
+                    raise WorkspaceError("no job with name `{}`".format(job_name))
+                out_dirs[job_name] = Workspace(config.TESTBED, ws_name).test_dir("output_test_dir", "out")
+            except WorkspaceError as e:
+                return flask.jsonify({
+                    "status": "failed",
+                    "reason": str(e)
+                }), 404
+
+        archive = ArtifactArchive.snapshot(out_dirs, kinds, since=since)
+        token = snapshots.save(key, archive)
+
+    if offset >= archive.size:
+        return flask.Response(status=416, headers={"Content-Range": "bytes */{}".format(archive.size)})
+
+    headers = {
+        "Content-Length": str(archive.size - offset),
+        "Accept-Ranges": "bytes",
+        "X-Fuzzbed-Until": token,
+        "X-Fuzzbed-Count": str(archive.count)
+    }
+    status = 200
+    if offset > 0:
+        status = 206
+        headers["Content-Range"] = "bytes {}-{}/{}".format(offset, archive.size - 1, archive.size)
+
+    return flask.Response(archive.stream(offset), status=status, mimetype="application/x-tar",
+        headers=headers, direct_passthrough=True)
+
+
+@app.route("/api/sync/<ws_name>/missing", methods=["POST"])
+def sync_missing(ws_name):
+    """
+    /api/sync/<ws_name>/missing (POST)
+        Given chunk hashes of a workspace, as `{"chunks": [...]}`,
+        replies with those missing from the chunk cache.
+    """
+    try:
+        digests = sync.parse_chunks(flask.request.get_json(silent=True))
+    except sync.SyncError as e:
+        return flask.jsonify({
+            "status": "failed",
+            "reason": str(e)
+        }), 400
+
+    return flask.jsonify({
+        "status": "success",
+        "reason": None,
+        "missing": chunks.missing(digests)
+    })
+
+
+@app.route("/api/sync/<ws_name>/chunks", methods=["POST"])
+def sync_chunks(ws_name):
+    """
+    /api/sync/<ws_name>/chunks (POST)
+        Uploads framed chunks to the chunk cache, streamed
+        from the request body.
+    """
+    try:
+        count = sync.receive_chunks(chunks, flask.request.stream)
+    except sync.SyncError as e:
+        return flask.jsonify({
+            "status": "failed",
+            "reason": str(e)
+        })
+
+    return flask.jsonify({
+        "status": "success",
+        "reason": None,
+        "received": count
+    })
+
+
+@app.route("/api/sync/<ws_name>/commit", methods=["POST"])
+def sync_commit(ws_name):
+    """
+    /api/sync/<ws_name>/commit (POST)
+        Reconstructs a workspace in the shared volume from a
+        manifest, as `{"files": {path: {"mode": ..., "chunks": [...]}}}`.
+    """
+    ws_path = os.path.join(config.TESTBED, ws_name)
+    if os.path.dirname(os.path.normpath(ws_path)) != os.path.normpath(config.TESTBED):
+        return flask.jsonify({
+            "status": "failed",
+            "reason": "invalid workspace name `{}`".format(ws_name)
+        })
+
+    try:
+        manifest = sync.parse_manifest(flask.request.get_json(silent=True))
+    except sync.SyncError as e:
+        return flask.jsonify({
+            "status": "failed",
+            "reason": str(e)
+        }), 400
+
+    try:
+        counts = sync.commit(chunks, ws_path, manifest)
+    except sync.SyncError as e:
+        return flask.jsonify({
+            "status": "failed",
+            "reason": str(e)
+        })
+
+    return flask.jsonify({
+        "status": "success",
+        "reason": None,
+        "files": counts
+    })
 
 
 @app.route("/api/info/<query>", methods=["GET"])
@@ -80,18 +725,85 @@ def query(query):
             query: represents type of information to list,
                 can either be `container
     """
+    return flask.jsonify(_job_info([query])[query])
+
+
+
+@app.route("/api/render", methods=["GET"])
+def render():
+    """
+    /api/render (GET)
+        Renders Kubernetes Job manifests for workspaces as a single
+        multi-document YAML stream, with resources sized from their
+        manifests and peak usage measured in previous runs.
+
+        Params:
+            workspaces: comma-seperated names of workspaces in shared volume
+    """
+    ws_names = [name for name in flask.request.args.get("workspaces", "").split(",") if name]
+    documents = []
+    try:
+        for (ws_name, usage) in zip(ws_names, storage.usages(ws_names)):
+            documents.append(k8s.render(Workspace(config.TESTBED, ws_name), usage=usage))
+    except (WorkspaceError, k8s.RenderError) as e:
+        return flask.jsonify({
+            "status": "failed",
+            "reason": str(e)
+        })
+
+    return flask.Response("---\n".join(documents), mimetype="application/yaml")
 
-    # TODO: communicate with redis store
 
-    response = dict({
-        "alive": True
-        "uptime": 100,
-        "run_cmd": "",
-        "crashes_found": "",
-        "hangs_found": ""
+@app.route("/api/target/<ws_name>", methods=["GET"])
+def target_totals(ws_name):
+    """
+    /api/target/<ws_name> (GET)
+        Provides totals over every job that fuzzed a workspace, as
+        the number of jobs, executions, crashes reported by fuzzers
+        and unique crash buckets, aggregated within the store.
+
+        Params:
+            ws_name: name of workspace in shared volume
+    """
+    totals = storage.target_totals(ws_name)
+    totals.update({
+        "status": "success",
+        "reason": None,
+        "workspace": ws_name
     })
-    return flask.jsonify(response)
+    return flask.jsonify(totals)
+
+
+@app.route("/metrics", methods=["GET"])
+def expose_metrics():
+    """
+    /metrics (GET)
+        Exposes latency histograms and gauges in the
+        Prometheus text format.
+    """
+    return flask.Response(metrics.expose(), mimetype="text/plain; version=0.0.4")
+
+
+if config.PROFILE_ENABLED:
+
+    @app.route("/api/profile", methods=["GET"])
+    def profile():
+        """
+        /api/profile (GET)
+            Captures a sampled profile of the server process, returned
+            as collapsed stacks for flame graphs. Requires `FUZZBED_PROFILE=1`.
 
+            Params:
+                seconds: optional, duration of capture (default is 10)
+        """
+        seconds = min(float(flask.request.args.get("seconds", 10)), 300.0)
+        try:
+            return flask.Response(profiler.capture(seconds), mimetype="text/plain")
+        except RuntimeError as e:
+            return flask.jsonify({
+                "status": "failed",
+                "reason": str(e)
+            }), 409
 
 
 @app.route("/")
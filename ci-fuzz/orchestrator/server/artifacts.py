@@ -0,0 +1,244 @@
+"""
+artifacts.py
+
+    DESCRIPTION:
+        Streams a job's artifacts (crashes, hangs and optionally its corpus) as a single tar archive.
+        The archive's layout is computed up front from a snapshot of the artifacts, so its total size
+        is known and any byte offset of it can be regenerated. This allows interrupted transfers to be
+        resumed with HTTP range requests. Files are read in fixed-size chunks into a reused buffer, so
+        memory use does not grow with the archive. Files removed or truncated after the snapshot are
+        zero-filled to their snapshot size, such that the layout still holds.
+
+        Outputs flushed from a tmpfs keep their original modification times, so a snapshot cannot be
+        regenerated from a time bound alone. Member lists of served archives are instead persisted by
+        a SnapshotStore under an opaque token, and resumes are served from them.
+
+    USAGE:
+        archive = ArtifactArchive.snapshot(out_dirs, kinds=["crashes"], since=0)
+        token = snapshots.save(job_name, archive)
+        for chunk in snapshots.load(job_name, token).stream(offset):
+            ...
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import tarfile
+import tempfile
+
+from typing import Optional, List, Dict, Tuple, Iterator, Set
+
+
+# subdirectories of a worker's output directory for each kind of artifact
+ARTIFACT_DIRS: Dict[str, List[str]] = dict({
+    "crashes": ["crashes"],
+    "hangs": ["hangs"],
+    "corpus": ["queue"],
+})
+
+BLOCK_SIZE = tarfile.BLOCKSIZE
+CHUNK_SIZE = 256 * 1024
+
+# matches the only range form supported for resuming, ie. `bytes=N-`
+RANGE_REGEX = re.compile(r"^bytes=(\d+)-$")
+
+# matches tokens of persisted snapshots
+TOKEN_REGEX = re.compile(r"^[0-9a-f]{32}$")
+
+
+def parse_range(header: Optional[str]) -> int:
+    """
+    Parses the byte offset of a `Range: bytes=N-` header, or 0 if no header is given. Raises a
+    ValueError on any other form.
+    """
+    if not header:
+        return 0
+    match = RANGE_REGEX.match(header.strip())
+    if match is None:
+        raise ValueError("unsupported range `{}`, expected `bytes=N-`".format(header))
+    return int(match.group(1))
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactArchive(object):
+    """
+    A tar archive of artifacts, laid out as a sequence of header and file body segments.
+    """
+
+    def __init__(self, members: List[Tuple[str, str, int, float]], until: float) -> None:
+        """
+        :param members: sorted archive names, paths, sizes and mtimes of artifacts
+        :param until: upper bound on modification time of snapshot, for regenerating it
+        """
+        self.members: List[Tuple[str, str, int, float]] = members
+        self.until: float = until
+        self.count: int = len(members)
+
+        # segments are (offset, length, header bytes or file path)
+        self.segments: List[Tuple[int, int, object]] = []
+        offset: int = 0
+        for (name, path, size, mtime) in members:
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = int(mtime)
+            info.mode = 0o644
+            header: bytes = info.tobuf(format=tarfile.GNU_FORMAT)
+            self.segments.append((offset, len(header), header))
+            offset += len(header)
+
+            padded: int = (size + BLOCK_SIZE - 1) // BLOCK_SIZE * BLOCK_SIZE
+            self.segments.append((offset, padded, (path, size)))
+            offset += padded
+
+        self.segments.append((offset, BLOCK_SIZE * 2, bytes(BLOCK_SIZE * 2)))
+        self.size: int = offset + BLOCK_SIZE * 2
+
+
+    @classmethod
+    def snapshot(cls, out_dirs: Dict[str, str], kinds: List[str], since: float = 0,
+                 until: Optional[float] = None, unique: bool = True) -> "ArtifactArchive":
+        """
+        Lists artifacts of workers modified within `(since, until]`, in a stable order.
+
+        :param out_dirs: mapping of worker names to output directories
+        :param kinds: kinds of artifacts to include, see ARTIFACT_DIRS
+        :param since: only include artifacts modified after this timestamp
+        :param until: only include artifacts modified up to this timestamp, default is now
+        :param unique: skip crashes and hangs with identical content found by other workers
+        """
+        until = time.time() if until is None else until
+        members: List[Tuple[str, str, int, float]] = []
+        seen: Set[str] = set()
+
+        for worker in sorted(out_dirs.keys()):
+            for kind in kinds:
+                for subdir in ARTIFACT_DIRS[kind]:
+                    base: str = os.path.join(out_dirs[worker], subdir)
+                    if not os.path.isdir(base):
+                        continue
+
+                    for entry in sorted(os.scandir(base), key=lambda e: e.name):
+                        if not entry.is_file() or entry.name.startswith("."):
+                            continue
+                        stat = entry.stat()
+                        if not since < stat.st_mtime <= until:
+                            continue
+
+                        if unique and kind != "corpus":
+                            digest: str = _file_digest(entry.path)
+                            if digest in seen:
+                                continue
+                            seen.add(digest)
+
+                        name: str = "/".join([worker, kind, entry.name])
+                        members.append((name, entry.path, stat.st_size, stat.st_mtime))
+
+        return cls(members, until)
+
+
+    def stream(self, offset: int = 0) -> Iterator[bytes]:
+        """
+        Generates the archive from a byte offset, in chunks.
+
+        :param offset: byte offset to resume from
+        """
+        buf = bytearray(CHUNK_SIZE)
+        view = memoryview(buf)
+
+        for (start, length, payload) in self.segments:
+            if start + length <= offset:
+                continue
+            skip: int = max(0, offset - start)
+
+            if isinstance(payload, bytes):
+                yield payload[skip:]
+                continue
+
+            # file body, padded with zeros to the block size (or from where it ends, if removed or truncated)
+            path, size = payload
+            pos: int = skip
+            try:
+                with open(path, "rb") as f:
+                    f.seek(min(pos, size))
+                    while pos < size:
+                        n: int = f.readinto(view[:min(CHUNK_SIZE, size - pos)])
+                        if n == 0:
+                            break
+                        pos += n
+                        yield bytes(view[:n])
+            except OSError:
+                pass
+
+            while pos < length:
+                n = min(CHUNK_SIZE, length - pos)
+                pos += n
+                yield bytes(n)
+
+
+class SnapshotStore(object):
+    """
+    Persists member lists of served archives by token, such that resumed transfers get the same layout.
+    """
+
+    def __init__(self, root: str, ttl: int) -> None:
+        """
+        :param root: directory to persist snapshots in
+        :param ttl: seconds a snapshot is kept for after it is saved
+        """
+        self.root: str = root
+        self.ttl: int = ttl
+        os.makedirs(root, exist_ok=True)
+
+
+    def _prune(self) -> None:
+        expired: float = time.time() - self.ttl
+        for entry in os.scandir(self.root):
+            try:
+                if entry.name.endswith(".json") and entry.stat().st_mtime < expired:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+    def save(self, key: str, archive: ArtifactArchive) -> str:
+        """
+        Persists the layout of an archive, returning its token.
+
+        :param key: what the archive is of, ie. the job and kinds of artifacts, checked when loaded
+        :param archive: archive to persist
+        """
+        data: str = json.dumps(dict({"key": key, "until": archive.until, "members": archive.members}))
+        token: str = hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.root)
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.root, "{}.json".format(token)))
+
+        self._prune()
+        return token
+
+
+    def load(self, key: str, token: str) -> Optional[ArtifactArchive]:
+        """
+        Returns the archive persisted under a token, or None if it expired or is of something else.
+        """
+        if not TOKEN_REGEX.match(token):
+            return None
+        try:
+            with open(os.path.join(self.root, "{}.json".format(token)), "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("key") != key:
+            return None
+        return ArtifactArchive([tuple(member) for member in data["members"]], data["until"])
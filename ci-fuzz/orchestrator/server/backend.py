@@ -0,0 +1,206 @@
+"""
+backend.py
+
+    DESCRIPTION:
+        Helpers that interface the Docker engine in order to build workspace images and
+        provision worker containers off of them. Every worker mounts the shared testbed
+        volume, such that outputs are accessible to the orchestrator.
+"""
+import logging
+logging.basicConfig()
+
+import os
+
+from server import config
+from server import metrics
+from server.workspace import Workspace
+
+from typing import Optional, List, Dict, Tuple
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+# tag for the image built off a workspace
+IMAGE_TAG = "fuzzbed/{}"
+
+# basename of the harness binary compiled into workspace images (see templates.COMPILE_STEP)
+COMPILED_HARNESS = "harness"
+
+# binaries each executor's frontend writes for `--out_test_name harness`, as the suffix of the binary fuzzed,
+# and the suffixes of any others passed by argument (ie. Angora's separate taint tracking build)
+HARNESS_SUFFIXES: Dict[str, Tuple[str, Dict[str, str]]] = {
+    "afl": ("afl", dict()),
+    "honggfuzz": ("hfuzz", dict()),
+    "libfuzzer": ("libfuzzer", dict()),
+    "eclipser": ("eclipser", dict()),
+    "angora": ("fast.angora", {"--taint_binary": "taint.angora"}),
+}
+
+# harness binary built with sanitizers for cross-validating outputs (see templates.SANITIZER_COMPILE_STEP)
+SANITIZER_HARNESS = "harness.san"
+
+# written in a worker holding its tmpfs outputs once the fuzzer exits (see `hold_command`)
+EXITED_MARKER = "/tmp/.fuzzbed_exited"
+
+# `[test]` options set by the harness command itself, rather than forwarded from the configuration
+COMMAND_TEST_OPTIONS = ["input_seeds", "output_test_dir", "no_fork"]
+
+# `[test]` options that are paths relative to the workspace
+PATH_TEST_OPTIONS = ["runtime_dir"]
+
+
+@metrics.timed("build_image")
+def build_image(client, ws: Workspace) -> str:
+    """
+    Builds the Dockerfile in a workspace, and returns the tag of the image.
+
+    :param client: Docker engine client
+    :param ws: workspace to build image for
+    """
+    tag: str = IMAGE_TAG.format(ws.name.lower())
+    LOGGER.info("Building image `{}` for workspace `{}`.".format(tag, ws.name))
+
+    client.images.build(path=ws.path, tag=tag, rm=True)
+    return tag
+
+
+@metrics.timed("run_worker")
+def run_worker(client, image: str, name: str, command: Optional[List[str]] = None,
+               cpuset: Optional[str] = None, tmpfs_size: Optional[str] = None):
+    """
+    Provisions a detached worker container off of a workspace image.
+
+    :param client: Docker engine client
+    :param image: tag of workspace image
+    :param name: name of container to spin up
+    :param command: optional command overriding the image's `CMD`
+    :param cpuset: optional cores to pin the container to
+    :param tmpfs_size: optional size of tmpfs to mount at `config.TMPFS_OUTPUT_DIR` for outputs
+    """
+    tmpfs: Optional[Dict[str, str]] = None
+    if tmpfs_size:
+        tmpfs = {config.TMPFS_OUTPUT_DIR: "size={},mode=1777".format(tmpfs_size)}
+
+    LOGGER.debug("Running worker `{}` with command: {}".format(name, command))
+    return client.containers.run(image,
+        command=command,
+        name=name,
+        detach=True,
+        cpuset_cpus=cpuset,
+        tmpfs=tmpfs,
+        volumes={config.TESTBED_VOLUME: {"bind": config.TESTBED, "mode": "rw"}})
+
+
+def config_args(ws: Workspace, test: Optional[str] = None) -> List[str]:
+    """
+    Executor arguments for `[test]` options of a workspace, as the configuration would set them if
+    the harness binary is run directly, rather than through `--config`. Multiplexed tests are bounded
+    by their scheduled budget, so the campaign timeout is only forwarded when fuzzing the whole harness.
+
+    :param ws: workspace to forward options of
+    :param test: optional single test being fuzzed
+    """
+    if not ws.config.has_section("test"):
+        return []
+
+    args: List[str] = []
+    for (key, value) in ws.config.items("test"):
+        if key in COMMAND_TEST_OPTIONS or value == "":
+            continue
+
+        # a timeout of 0 fuzzes indefinitely, and multiplexed tests are selected and stopped by their scheduler
+        elif (key == "timeout" and value == "0") or (test is not None and key in ["timeout", "which_test"]):
+            continue
+        elif value.lower() in ["true", "false", "yes", "no", "on", "off"]:
+            if ws.getboolean("test", key):
+                args.append("--{}".format(key))
+        elif key in PATH_TEST_OPTIONS:
+            args += ["--{}".format(key), os.path.join(ws.name, value)]
+        else:
+            args += ["--{}".format(key), value]
+    return args
+
+
+def harness_command(ws: Workspace, out_dir: str, test: Optional[str] = None,
+                    args: Optional[List[str]] = None) -> List[str]:
+    """
+    Runs the harness binary compiled into the workspace image at build time, with the workspace's
+    `[test]` options (ie. `timeout`) forwarded as arguments.
+
+    :param ws: workspace image was built for
+    :param out_dir: path to output directory in container
+    :param test: optional single test to fuzz
+    :param args: optional additional executor arguments, overriding earlier ones
+    """
+    executor: str = ws.executor
+    command: List[str] = [
+        "deepstate-{}".format(executor),
+        "--input_seeds", os.path.join(ws.name, ws.get("test", "input_seeds", "in")),
+        "--output_test_dir", out_dir
+    ]
+    if test is not None:
+        command += ["--which_test", test]
+    if ws.no_fork:
+        command.append("--no_fork")
+
+    command += harness_args(ws)
+    command += config_args(ws, test)
+    command += args or []
+    command.append(harness_binary(ws))
+    return command
+
+
+def harness_binary(ws: Workspace) -> str:
+    """
+    Path of the harness binary compiled into the workspace image for its executor, relative to the
+    image's working directory. Executors without a known frontend are assumed to write `harness.<executor>`.
+
+    :param ws: workspace image was built for
+    """
+    suffix, _ = HARNESS_SUFFIXES.get(ws.executor, (ws.executor, dict()))
+    return os.path.join(ws.name, "{}.{}".format(COMPILED_HARNESS, suffix))
+
+
+def harness_args(ws: Workspace) -> List[str]:
+    """
+    Executor arguments naming additional binaries compiled for the workspace's executor.
+
+    :param ws: workspace image was built for
+    """
+    _, others = HARNESS_SUFFIXES.get(ws.executor, (ws.executor, dict()))
+    args: List[str] = []
+    for (arg, suffix) in sorted(others.items()):
+        args += [arg, os.path.join(ws.name, "{}.{}".format(COMPILED_HARNESS, suffix))]
+    return args
+
+
+def hold_command(command: List[str]) -> List[str]:
+    """
+    Wraps a worker command writing outputs to tmpfs, such that the container outlives the fuzzer and
+    records its exit in `EXITED_MARKER`. A tmpfs does not outlive its container, so outputs written
+    since the last flush would otherwise be lost when the fuzzer exits on its own (ie. on `--timeout`).
+
+    :param command: executor command of worker
+    """
+    script: str = '"$@"; echo $? > {}; exec sleep infinity'.format(EXITED_MARKER)
+    return ["sh", "-c", script, "fuzzbed"] + command
+
+
+def default_command(ws: Workspace, out_dir: str, args: Optional[List[str]] = None) -> List[str]:
+    """
+    Reconstructs the workspace image's default `CMD`, writing fuzzer outputs to another directory.
+    Images with a harness compiled at build time run that binary instead.
+
+    :param ws: workspace image was built for
+    :param out_dir: path to output directory in container
+    :param args: optional additional executor arguments, overriding earlier ones
+    """
+    if ws.prebuilt:
+        return harness_command(ws, out_dir, args=args)
+
+    return [
+        "deepstate-{}".format(ws.executor),
+        "--config", "config.ini",
+        "--output_test_dir", out_dir
+    ] + (args or [])
@@ -0,0 +1,194 @@
+"""
+calibrate.py
+
+    DESCRIPTION:
+        Calibrates the per-execution timeout of a target before launch. Every seed in the
+        corpus is executed once against the prebuilt harness in a throwaway container, and the
+        timeout is set from a high percentile of the measured execution times. During the run,
+        the timeout is re-tuned upwards if the rate of hangs climbs, since that indicates valid
+        slow paths being dropped.
+
+        Only workspaces with the harness compiled into the image (see `Workspace.prebuilt`) are
+        calibrated, since others are compiled by the executor at launch and have no binary to
+        measure beforehand. Their workers keep the executor's default timeout, which is logged.
+
+    USAGE:
+        exec_timeout = calibrate.calibrate(client, ws, image)
+        tuner = calibrate.ExecTimeout(exec_timeout)
+        if tuner.update(stats.read_stats(out_dir)):
+            ...
+"""
+import logging
+logging.basicConfig()
+
+import os
+import math
+import threading
+
+from server import config
+from server import backend
+from server import stats
+from server import metrics
+from server.workspace import Workspace
+
+from typing import Optional, List, Dict, Callable
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+# shell script executing each seed once, printing its wall time in nanoseconds
+CALIBRATION_SCRIPT = """
+for seed in $(ls -1 {SEEDS} | head -n {MAX_SEEDS}); do
+    start=$(date +%s%N)
+    timeout {MAX_SECONDS} {BINARY} --input_test_file {SEEDS}/$seed --no_fork >/dev/null 2>&1
+    end=$(date +%s%N)
+    echo $((end - start))
+done
+"""
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a non-empty list of samples.
+    """
+    ordered: List[float] = sorted(samples)
+    rank: int = max(0, int(math.ceil(pct / 100.0 * len(ordered))) - 1)
+    return ordered[rank]
+
+
+@metrics.timed("calibrate")
+def calibrate(client, ws: Workspace, image: str) -> Optional[int]:
+    """
+    Measures the execution time distribution of the seed corpus, and returns a per-execution
+    timeout in milliseconds. Returns None if there is no prebuilt harness or seeds to measure,
+    in which case the executor's default is used.
+
+    :param client: Docker engine client
+    :param ws: workspace to calibrate
+    :param image: tag of image built for workspace
+    """
+    if not ws.prebuilt:
+        LOGGER.info("Skipping calibration for `{}`, whose harness is compiled by the executor at launch, "
+            "keeping the executor's default execution timeout.".format(ws.name))
+        return None
+
+    seed_dir: str = ws.test_dir("input_seeds", "in")
+    if not os.path.isdir(seed_dir) or len(os.listdir(seed_dir)) == 0:
+        LOGGER.info("Skipping calibration for `{}`, which has no seeds to measure.".format(ws.name))
+        return None
+
+    script: str = CALIBRATION_SCRIPT \
+        .replace("{SEEDS}", seed_dir) \
+        .replace("{MAX_SEEDS}", str(config.CALIBRATION_MAX_SEEDS)) \
+        .replace("{MAX_SECONDS}", str(int(math.ceil(config.EXEC_TIMEOUT_MAX / 1000.0)))) \
+        .replace("{BINARY}", backend.harness_binary(ws))
+
+    try:
+        output: bytes = client.containers.run(image, command=["sh", "-c", script], remove=True,
+            volumes={config.TESTBED_VOLUME: {"bind": config.TESTBED, "mode": "ro"}})
+    except Exception as e:
+        LOGGER.warning("Unable to calibrate execution timeout for `{}`: {}".format(ws.name, e))
+        return None
+
+    samples: List[float] = [int(line) / 1e6 for line in output.decode("utf-8").split() if line.isdigit()]
+    if len(samples) == 0:
+        return None
+
+    measured: float = percentile(samples, config.EXEC_TIMEOUT_PERCENTILE)
+    exec_timeout: int = int(math.ceil(measured * config.EXEC_TIMEOUT_MULTIPLIER))
+    exec_timeout = max(config.EXEC_TIMEOUT_MIN, min(config.EXEC_TIMEOUT_MAX, exec_timeout))
+
+    LOGGER.info("Calibrated execution timeout for `{}` to {}ms (p{} of {} seeds is {:.1f}ms).".format(
+        ws.name, exec_timeout, config.EXEC_TIMEOUT_PERCENTILE, len(samples), measured))
+    return exec_timeout
+
+
+class ExecTimeout(object):
+    """
+    Tracks the per-execution timeout of a worker, raising it if the hang rate climbs.
+    """
+
+    def __init__(self, value: int) -> None:
+        self.value: int = value
+        self.retunes: int = 0
+        self._last: Optional[Dict[str, int]] = None
+
+
+    @staticmethod
+    def _counters(fuzzer_stats: Dict[str, str]) -> Optional[Dict[str, int]]:
+        """
+        Counters for computing the hang rate, as total timed out executions over executions, or None
+        if the fuzzer does not count them. Unique hangs (as counted by AFL) are deduplicated by path,
+        so they do not give a rate of executions, and are not used.
+        """
+        if "execs_done" not in fuzzer_stats:
+            return None
+
+        for key in ["total_tmout", "total_hangs"]:
+            if key in fuzzer_stats:
+                return {"hangs": int(fuzzer_stats[key]), "total": int(fuzzer_stats["execs_done"])}
+        return None
+
+
+    def update(self, fuzzer_stats: Dict[str, str]) -> bool:
+        """
+        Computes the hang rate since the last update, and raises the timeout if it exceeds the
+        threshold. Returns True if the timeout was changed, and the worker should be relaunched.
+
+        :param fuzzer_stats: parsed statistics from worker output directory
+        """
+        counters = ExecTimeout._counters(fuzzer_stats)
+        if counters is None:
+            return False
+
+        last, self._last = self._last, counters
+        if last is None or counters["total"] <= last["total"]:
+            return False
+
+        rate: float = (counters["hangs"] - last["hangs"]) / float(counters["total"] - last["total"])
+        if rate <= config.HANG_RATE_THRESHOLD or self.value >= config.EXEC_TIMEOUT_MAX:
+            return False
+
+        previous: int = self.value
+        self.value = min(config.EXEC_TIMEOUT_MAX, self.value * config.EXEC_TIMEOUT_RETUNE_FACTOR)
+        self.retunes += 1
+
+        # counters restart along with the relaunched worker
+        self._last = None
+        LOGGER.info("Hang rate at {:.1%}, raising execution timeout from {}ms to {}ms.".format(
+            rate, previous, self.value))
+        return True
+
+
+class TimeoutMonitor(threading.Thread):
+    """
+    Background thread that re-tunes the execution timeout of a single worker during its run.
+    """
+
+    def __init__(self, worker, tuner: ExecTimeout, record: Callable[[Dict[str, str]], None]) -> None:
+        """
+        :param worker: worker to monitor and relaunch with re-tuned timeout
+        :param tuner: execution timeout state for worker
+        :param record: callback that records job info
+        """
+        super().__init__(daemon=True)
+        self.worker = worker
+        self.tuner: ExecTimeout = tuner
+        self.record: Callable[[Dict[str, str]], None] = record
+        self._stop_event = threading.Event()
+
+
+    def run(self) -> None:
+        while not self._stop_event.wait(config.SCHEDULER_INTERVAL):
+            if not self.worker.running:
+                break
+
+            if self.tuner.update(stats.read_stats(self.worker.out_dir)):
+                self.worker.options.exec_timeout = self.tuner.value
+                self.record({"exec_timeout": str(self.tuner.value), "exec_timeout_retunes": str(self.tuner.retunes)})
+                self.worker.restart()
+
+
+    def stop(self) -> None:
+        self._stop_event.set()
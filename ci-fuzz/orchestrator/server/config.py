@@ -3,6 +3,111 @@ config.py
 
     Define keys and tokens here!
 """
+import os
 
-SCRET_KEY = "my_secret_key"
-REDIS_DEFAULT_URL = "redis://0.0.0.0:3456"
+SECRET_KEY = "my_secret_key"
+REDIS_DEFAULT_URL = "redis://0.0.0.0:6379/0"
+
+# store for job info, statistics and usage, as a Redis URL (or `memory://` for an in-memory stand-in),
+# with connections pooled across request handlers and background threads
+REDIS_URL = os.environ.get("REDIS_URL", REDIS_DEFAULT_URL)
+REDIS_POOL_SIZE = 32
+
+# interval (in seconds) in which fuzzer statistics of active jobs are recorded in the store
+STATS_INTERVAL = 30
+
+# path to shared volume of workspaces as mounted in the orchestrator, and the
+# named volume to mount at the same path in each worker container
+TESTBED = os.environ.get("TESTBED", "/tests")
+TESTBED_VOLUME = "tests"
+
+# interval (in seconds) in which finished jobs are reaped, and seconds they stay listed for once their
+# workers and background threads are done
+REAP_INTERVAL = 60
+JOB_RETENTION = 60 * 60
+
+# interval (in seconds) in which the test scheduler polls multiplexed workers
+SCHEDULER_INTERVAL = 30
+
+# window (in seconds) without new paths before a multiplexed test is considered plateaued
+PLATEAU_WINDOW = 900
+
+# path to mount a tmpfs for fuzzer outputs in workers, if enabled
+TMPFS_OUTPUT_DIR = "/fuzzbed/out"
+
+# interval (in seconds) in which tmpfs outputs are flushed to the shared volume
+FLUSH_INTERVAL = 60
+
+# directory on shared volume that caches extracted dictionaries by hash of harness and seeds
+DICTIONARY_CACHE_DIR = os.path.join(TESTBED, ".fuzzbed", "dictionaries")
+
+# per-execution timeout calibration: timeout (in ms) is the percentile of seed execution
+# times scaled by the multiplier, clamped within bounds, and re-tuned by a factor if
+# the hang rate during a run exceeds the threshold
+CALIBRATION_MAX_SEEDS = 200
+EXEC_TIMEOUT_PERCENTILE = 99
+EXEC_TIMEOUT_MULTIPLIER = 5
+EXEC_TIMEOUT_MIN = 20
+EXEC_TIMEOUT_MAX = 10000
+EXEC_TIMEOUT_RETUNE_FACTOR = 2
+HANG_RATE_THRESHOLD = 0.05
+
+# interval (in seconds) in which statistics deltas are pushed to streaming clients
+STREAM_INTERVAL = 2
+
+# instrumentation of API routes and backend operations, exposed at `/metrics`
+METRICS_ENABLED = os.environ.get("FUZZBED_METRICS", "1") != "0"
+
+# enables `/api/profile` for capturing sampled profiles of the server on demand
+PROFILE_ENABLED = os.environ.get("FUZZBED_PROFILE", "0") != "0"
+
+# directory on shared volume of the content-addressed corpus store
+CORPUS_DIR = os.path.join(TESTBED, ".fuzzbed", "corpus")
+
+# bytes of extracted inputs kept in the corpus store's object cache once no view links them, beyond
+# which the least recently extracted are evicted
+CORPUS_CACHE_SIZE = 1024 * 1024 * 1024
+
+# directory on shared volume of the chunk cache for workspaces synced from remote clients
+CHUNK_DIR = os.path.join(TESTBED, ".fuzzbed", "chunks")
+
+# directory on shared volume of the member lists of served pull archives, for resuming them with
+# the same layout, and seconds they are kept for
+PULL_SNAPSHOT_DIR = os.path.join(TESTBED, ".fuzzbed", "pulls")
+PULL_SNAPSHOT_TTL = 24 * 60 * 60
+
+# cross-validation of a job's outputs against its sanitizer build: interval (in seconds) in which
+# new outputs are picked up, concurrent executions, and timeout (in seconds) of each execution
+CROSSVAL_INTERVAL = 10
+CROSSVAL_WORKERS = 4
+CROSSVAL_TIMEOUT = 10
+
+# interval (in seconds) in which memory and CPU usage of workers is sampled
+USAGE_INTERVAL = 30
+
+# Kubernetes Job rendering: template with placeholders, registry prefix of pushed workspace images,
+# claim of the testbed volume, headroom over measured peaks, and sizes (in MiB and millicores) when
+# a workspace has no measured usage
+K8S_TEMPLATE = os.environ.get("FUZZBED_K8S_TEMPLATE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "extras", "template.yml"))
+K8S_REGISTRY = os.environ.get("FUZZBED_K8S_REGISTRY", "")
+K8S_TESTBED_CLAIM = "fuzzbed-testbed"
+K8S_MEMORY_HEADROOM = 1.25
+K8S_CPU_HEADROOM = 1.1
+K8S_DEFAULT_MEMORY = 2048
+K8S_MIN_MEMORY = 128
+K8S_MIN_CPU = 100
+
+# interval (in seconds) in which output trees are scanned for new files, if not followed with inotify
+WATCH_SCAN_INTERVAL = 10
+
+# job listing: maximum jobs per page, and interval (in seconds) container states are reused for
+INFO_PAGE_SIZE = 1000
+INFO_STATE_TTL = 2
+
+# warm starting jobs from the best corpus of past campaigns on the same target, kept in the corpus
+# store and materialized under a directory on shared volume, with a cap on inputs kept if they
+# cannot be minimized by coverage
+WARMSTART_ENABLED = os.environ.get("FUZZBED_WARMSTART", "1") != "0"
+WARMSTART_DIR = os.path.join(TESTBED, ".fuzzbed", "warm")
+WARMSTART_MAX_INPUTS = 10000
@@ -0,0 +1,410 @@
+"""
+corpus.py
+
+    DESCRIPTION:
+        Content-addressed corpus store shared by every workspace in the testbed. Inputs are
+        keyed by their SHA-256, so inputs overlapping between workspaces are stored once, and
+        are zlib-compressed and packed into append-only segment files rather than kept as many
+        small loose files. An index maps hashes to their location in segments, and a manifest
+        per workspace maps relative paths (ie. `input/seed`) to hashes.
+
+        Workers see their corpus as views: the objects in a workspace manifest are extracted
+        once to an object cache on demand, and hardlinked into the worker's directory. Cached
+        objects are read-only, since views share their inodes and must not be written in place.
+        Objects only held by the cache (ie. once views of them are removed) are evicted, least
+        recently extracted first, once they exceed a cap in bytes. Objects linked into a view are
+        never evicted, since removing them would not free their space.
+
+    USAGE:
+        store = CorpusStore(config.CORPUS_DIR)
+        store.import_dir("json", "/path/to/seeds", prefix="input")
+        store.materialize("json", ws.test_dir("input_seeds", "in"), prefix="input")
+"""
+import logging
+logging.basicConfig()
+
+import os
+import zlib
+import fcntl
+import sqlite3
+import hashlib
+import tarfile
+import threading
+import contextlib
+
+from server import config
+from server import metrics
+
+from typing import Optional, List, Dict, Iterator, IO
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+# segments are rolled over once they exceed this size in bytes
+SEGMENT_SIZE = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    hash TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS manifests (
+    workspace TEXT NOT NULL,
+    path TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (workspace, path)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    workspace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (workspace, key)
+);
+"""
+
+
+class CorpusError(Exception):
+    pass
+
+
+class CorpusStore(object):
+    """
+    A CorpusStore packs the inputs of every workspace into compressed segments on the shared volume.
+    """
+
+    def __init__(self, root: str, cache_size: Optional[int] = None) -> None:
+        """
+        :param root: directory of store on shared volume
+        :param cache_size: bytes of cached objects not linked into any view to keep, default is `config.CORPUS_CACHE_SIZE`
+        """
+        self.root: str = root
+        self.cache_size: int = config.CORPUS_CACHE_SIZE if cache_size is None else cache_size
+        self.segment_dir: str = os.path.join(root, "segments")
+        self.object_dir: str = os.path.join(root, "objects")
+        os.makedirs(self.segment_dir, exist_ok=True)
+        os.makedirs(self.object_dir, exist_ok=True)
+
+        self._local = threading.local()
+        with self._db() as db:
+            db.executescript(SCHEMA)
+
+
+    def _db(self) -> sqlite3.Connection:
+        """
+        Connection to the index, one per thread since connections cannot be shared between them.
+        """
+        db: Optional[sqlite3.Connection] = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=60)
+        return db
+
+
+    @contextlib.contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """
+        Exclusive lock for appending to segments, held across processes sharing the volume.
+        """
+        with open(os.path.join(self.root, "store.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.segment_dir, "{:08d}.seg".format(segment))
+
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.object_dir, digest[:2], digest)
+
+
+    def put_many(self, blobs: List[bytes]) -> List[str]:
+        """
+        Stores inputs not already in the store, appending them to the current segment in one batch.
+        Returns hashes of every input.
+
+        :param blobs: contents of inputs
+        """
+        digests: List[str] = [hashlib.sha256(blob).hexdigest() for blob in blobs]
+
+        db = self._db()
+        with self._write_lock(), db:
+            known = set(row[0] for digest in set(digests)
+                        for row in db.execute("SELECT hash FROM objects WHERE hash = ?", (digest,)))
+
+            row = db.execute("SELECT MAX(segment) FROM objects").fetchone()
+            segment: int = row[0] if row[0] is not None else 0
+            seg_file = open(self._segment_path(segment), "ab")
+            try:
+                for (digest, blob) in zip(digests, blobs):
+                    if digest in known:
+                        continue
+                    known.add(digest)
+
+                    if seg_file.tell() >= SEGMENT_SIZE:
+                        seg_file.close()
+                        segment += 1
+                        seg_file = open(self._segment_path(segment), "ab")
+
+                    packed: bytes = zlib.compress(blob)
+                    offset: int = seg_file.tell()
+                    seg_file.write(packed)
+                    db.execute("INSERT INTO objects VALUES (?, ?, ?, ?, ?)",
+                        (digest, segment, offset, len(packed), len(blob)))
+            finally:
+                seg_file.close()
+
+        return digests
+
+
+    def missing(self, digests: List[str]) -> List[str]:
+        """
+        Returns hashes not already in the store, in order.
+        """
+        db = self._db()
+        return [digest for digest in digests
+                if db.execute("SELECT 1 FROM objects WHERE hash = ?", (digest,)).fetchone() is None]
+
+
+    def get(self, digest: str) -> bytes:
+        """
+        Reads and decompresses an input from its segment.
+        """
+        row = self._db().execute("SELECT segment, offset, length FROM objects WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            raise CorpusError("no object `{}` in corpus store.".format(digest))
+
+        segment, offset, length = row
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length))
+
+
+    def add(self, workspace: str, files: Dict[str, bytes]) -> int:
+        """
+        Stores inputs and records them in a workspace manifest. Returns number of inputs recorded.
+
+        :param workspace: name of workspace
+        :param files: mapping of relative paths to contents
+        """
+        paths: List[str] = list(files.keys())
+        digests: List[str] = self.put_many([files[path] for path in paths])
+
+        db = self._db()
+        with db:
+            db.executemany("INSERT OR REPLACE INTO manifests VALUES (?, ?, ?)",
+                [(workspace, path, digest) for (path, digest) in zip(paths, digests)])
+        return len(paths)
+
+
+    @metrics.timed("corpus_import")
+    def import_dir(self, workspace: str, src_dir: str, prefix: str, batch: int = 1024) -> int:
+        """
+        Imports every regular file in a directory into a workspace manifest under a prefix.
+
+        :param workspace: name of workspace
+        :param src_dir: directory of inputs to import
+        :param prefix: relative path in workspace to record inputs under, ie. `input`
+        """
+        count: int = 0
+        files: Dict[str, bytes] = dict()
+        for (dirpath, _, filenames) in os.walk(src_dir):
+            for filename in filenames:
+                path: str = os.path.join(dirpath, filename)
+                if not os.path.isfile(path) or os.path.islink(path):
+                    continue
+                with open(path, "rb") as f:
+                    files[os.path.join(prefix, os.path.relpath(path, src_dir))] = f.read()
+
+                if len(files) >= batch:
+                    count += self.add(workspace, files)
+                    files = dict()
+
+        return count + self.add(workspace, files)
+
+
+    @metrics.timed("corpus_import")
+    def import_tar(self, workspace: str, stream: IO[bytes], prefix: str, batch: int = 1024) -> int:
+        """
+        Imports regular files from a (possibly compressed) tar stream into a workspace manifest.
+
+        :param workspace: name of workspace
+        :param stream: readable tar stream, read sequentially
+        :param prefix: relative path in workspace to record inputs under
+        """
+        count: int = 0
+        files: Dict[str, bytes] = dict()
+        with tarfile.open(fileobj=stream, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                name: str = os.path.normpath(member.name)
+                if name.startswith("..") or os.path.isabs(name):
+                    raise CorpusError("invalid path `{}` in archive.".format(member.name))
+
+                files[os.path.join(prefix, name)] = archive.extractfile(member).read()
+                if len(files) >= batch:
+                    count += self.add(workspace, files)
+                    files = dict()
+
+        return count + self.add(workspace, files)
+
+
+    def manifest(self, workspace: str, prefix: str = "") -> Dict[str, str]:
+        """
+        Returns mapping of relative paths to hashes in a workspace manifest, under an optional prefix.
+        """
+        pattern: str = "%"
+        if prefix:
+            escaped: str = prefix.rstrip("/").replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = escaped + "/%"
+
+        rows = self._db().execute(
+            "SELECT path, hash FROM manifests WHERE workspace = ? AND path LIKE ? ESCAPE '\\'",
+            (workspace, pattern))
+        return dict(rows)
+
+
+    def replace(self, workspace: str, prefix: str, files: Dict[str, bytes]) -> int:
+        """
+        Stores inputs, and replaces every entry under a prefix of a workspace manifest with them.
+        Returns number of inputs recorded.
+
+        :param workspace: name of workspace
+        :param prefix: relative path in workspace to replace inputs under
+        :param files: mapping of relative paths under prefix to contents
+        """
+        paths: List[str] = list(files.keys())
+        digests: List[str] = self.put_many([files[path] for path in paths])
+
+        db = self._db()
+        with db:
+            db.executemany("DELETE FROM manifests WHERE workspace = ? AND path = ?",
+                [(workspace, path) for path in self.manifest(workspace, prefix).keys()])
+            db.executemany("INSERT OR REPLACE INTO manifests VALUES (?, ?, ?)",
+                [(workspace, os.path.join(prefix, path), digest) for (path, digest) in zip(paths, digests)])
+        return len(paths)
+
+
+    def get_meta(self, workspace: str, key: str) -> Optional[str]:
+        """
+        Returns a value recorded for a workspace manifest, ie. the hash of the binary it was built for.
+        """
+        row = self._db().execute("SELECT value FROM meta WHERE workspace = ? AND key = ?", (workspace, key)).fetchone()
+        return None if row is None else row[0]
+
+
+    def set_meta(self, workspace: str, key: str, value: str) -> None:
+        db = self._db()
+        with db:
+            db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?, ?)", (workspace, key, value))
+
+
+    def extract(self, digest: str) -> str:
+        """
+        Returns path to an input in the object cache, extracting it from its segment on first use.
+        """
+        path: str = self._object_path(digest)
+        if not os.path.isfile(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path: str = "{}.{}.{}".format(path, os.getpid(), threading.get_ident())
+            with open(tmp_path, "wb") as f:
+                f.write(self.get(digest))
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, path)
+        return path
+
+
+    def evict(self) -> int:
+        """
+        Removes objects only held by the cache, least recently extracted first, until they fit within
+        the cap. Objects are extracted again on demand. Returns number of objects evicted.
+        """
+        unlinked: List[os.stat_result] = []
+        paths: List[str] = []
+        for (dirpath, _, filenames) in os.walk(self.object_dir):
+            for filename in filenames:
+                path: str = os.path.join(dirpath, filename)
+                try:
+                    st: os.stat_result = os.stat(path)
+                except OSError:
+                    continue
+                if st.st_nlink == 1:
+                    unlinked.append(st)
+                    paths.append(path)
+
+        total: int = sum(st.st_size for st in unlinked)
+        evicted: int = 0
+        for (st, path) in sorted(zip(unlinked, paths), key=lambda entry: entry[0].st_mtime):
+            if total <= self.cache_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= st.st_size
+            evicted += 1
+
+        if evicted > 0:
+            LOGGER.debug("Evicted {} objects from the object cache of `{}`.".format(evicted, self.root))
+        return evicted
+
+
+    @metrics.timed("corpus_materialize")
+    def materialize(self, workspace: str, dest_dir: str, prefix: str) -> int:
+        """
+        Materializes a view of the inputs under a prefix of a workspace manifest into a directory, as
+        hardlinks into the object cache (or copies, if hardlinks are unsupported). Returns number of inputs.
+
+        :param workspace: name of workspace
+        :param dest_dir: directory to materialize view in
+        :param prefix: relative path in workspace of inputs, ie. `input`
+        """
+        entries: Dict[str, str] = self.manifest(workspace, prefix)
+        for (path, digest) in entries.items():
+            dest: str = os.path.join(dest_dir, os.path.relpath(path, prefix))
+            if os.path.exists(dest):
+                continue
+
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            src: str = self.extract(digest)
+            try:
+                try:
+                    os.link(src, dest)
+                except FileNotFoundError:
+
+                    # evicted by another process since it was extracted
+                    os.link(self.extract(digest), dest)
+            except OSError:
+                with open(self.extract(digest), "rb") as s, open(dest, "wb") as d:
+                    d.write(s.read())
+
+        LOGGER.debug("Materialized {} inputs of `{}` into `{}`.".format(len(entries), workspace, dest_dir))
+        self.evict()
+        return len(entries)
+
+
+    def export_tar(self, workspace: str, stream: IO[bytes], prefix: str = "") -> int:
+        """
+        Writes inputs under a prefix of a workspace manifest to a tar stream. Returns number of inputs.
+
+        :param workspace: name of workspace
+        :param stream: writable stream, written sequentially
+        :param prefix: relative path in workspace of inputs to export
+        """
+        entries: Dict[str, str] = self.manifest(workspace, prefix)
+        with tarfile.open(fileobj=stream, mode="w|") as archive:
+            for (path, digest) in sorted(entries.items()):
+                with open(self.extract(digest), "rb") as f:
+                    info = tarfile.TarInfo(os.path.relpath(path, prefix) if prefix else path)
+                    info.size = os.fstat(f.fileno()).st_size
+                    archive.addfile(info, f)
+
+        self.evict()
+        return len(entries)
@@ -0,0 +1,285 @@
+"""
+crossval.py
+
+    DESCRIPTION:
+        Cross-validates a job fuzzed with a fast, uninstrumented build against a sanitizer build of the
+        same harness. Workers fuzz with the fast build, while a background validator container re-executes
+        each new queue entry and crash (as reported by the artifact watcher) under the sanitizer build
+        over a pool of concurrent executions.
+        Sanitizer reports are bucketed by their signature (sanitizer, bug type and top harness frame),
+        with crashes found by the fast build bucketed alongside them, such that the same bug found by
+        both builds lands in one bucket.
+
+    USAGE:
+        validator = CrossValidator(client, watcher, job_name, ws, image, lambda: workers, alive, record)
+        validator.start()
+"""
+import logging
+logging.basicConfig()
+
+import os
+import re
+import json
+import queue
+import hashlib
+import threading
+import concurrent.futures
+
+from server import config
+from server import backend
+from server import metrics
+from server.workspace import Workspace
+from server.watcher import ArtifactWatcher
+
+from typing import Optional, List, Dict, Set, Tuple, Callable, Any
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+# subdirectories of a worker's output directory re-executed against the sanitizer build
+VALIDATED_DIRS = ["queue", "crashes"]
+
+# sanitizer runtime options, such that reports are printed with a stack trace and execution halts
+SANITIZER_ENV = dict({
+    "ASAN_OPTIONS": "detect_leaks=1:symbolize=1:abort_on_error=0",
+    "UBSAN_OPTIONS": "print_stacktrace=1:halt_on_error=1",
+    "MSAN_OPTIONS": "symbolize=1",
+})
+
+# matches ASan/MSan/LSan/TSan report headers, ie. `ERROR: AddressSanitizer: heap-buffer-overflow`
+REPORT_REGEX = re.compile(r"(?:ERROR|WARNING): (\w+Sanitizer): ([\w-]+)")
+
+# matches UBSan diagnostics, ie. `test.cpp:12:5: runtime error: signed integer overflow: ...`
+UBSAN_REGEX = re.compile(r"([^\s:]+:\d+):\d+: runtime error: ([^:\n]+)")
+
+# matches symbolized stack frames, ie. `#0 0x4f2a1b in TLS1_process_heartbeat /path/test.cpp:40:5`
+FRAME_REGEX = re.compile(r"#\d+ 0x[0-9a-f]+ in (\S+)")
+
+
+def signature(output: str, exit_code: int) -> Optional[str]:
+    """
+    Derives the bucket signature of an execution from its output, or None if it did not fail.
+    Sanitizer reports are keyed by sanitizer, bug type and the top frame outside the runtime.
+
+    :param output: combined output of execution
+    :param exit_code: exit code of execution
+    """
+    match = REPORT_REGEX.search(output)
+    if match is not None:
+        frames: List[str] = [f for f in FRAME_REGEX.findall(output[match.end():]) if not f.startswith("__")]
+        return "{}:{}:{}".format(match.group(1), match.group(2), frames[0] if len(frames) > 0 else "?")
+
+    match = UBSAN_REGEX.search(output)
+    if match is not None:
+        return "UndefinedBehaviorSanitizer:{}:{}".format(match.group(2).strip(), match.group(1))
+
+    # `timeout` exits with 124, which is not a finding
+    if exit_code != 0 and exit_code != 124:
+        return "exit:{}".format(exit_code)
+    return None
+
+
+class Bucket(object):
+    """
+    Unique failure of a job, and the inputs that reproduce it.
+    """
+
+    def __init__(self, signature: str) -> None:
+        self.signature: str = signature
+        self.key: str = hashlib.sha1(signature.encode("utf-8")).hexdigest()[:12]
+        self.count: int = 0
+        self.found_by: Set[str] = set()
+
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict({
+            "signature": self.signature,
+            "count": self.count,
+            "found_by": sorted(self.found_by)
+        })
+
+
+class CrossValidator(threading.Thread):
+    """
+    Background thread re-executing new outputs of a job's workers against its sanitizer build.
+    """
+
+    def __init__(self, client, watcher: ArtifactWatcher, job_name: str, ws: Workspace, image: str,
+                 workers: Callable[[], List[Any]], alive: Callable[[], bool],
+                 record: Callable[[Dict[str, str]], None]) -> None:
+        """
+        :param client: Docker engine client
+        :param watcher: watcher reporting new files in output directories
+        :param job_name: name of job being validated
+        :param ws: workspace with a sanitizer build compiled into its image
+        :param image: tag of image built for workspace
+        :param workers: callback returning current workers of job
+        :param alive: callback returning whether job is still running
+        :param record: callback that records job info
+        """
+        super().__init__(daemon=True)
+        self.client = client
+        self.watcher: ArtifactWatcher = watcher
+        self.name: str = "{}_crossval".format(job_name)
+        self.ws: Workspace = ws
+        self.image: str = image
+        self.workers: Callable[[], List[Any]] = workers
+        self.alive: Callable[[], bool] = alive
+        self.record: Callable[[Dict[str, str]], None] = record
+
+        self.binary: str = os.path.join(ws.name, backend.SANITIZER_HARNESS)
+        self.buckets: Dict[str, Bucket] = dict()
+        self.executed: int = 0
+
+        self._seen: Set[str] = set()
+        self._entries = queue.Queue()
+        self._digests: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.container = None
+
+
+    @property
+    def out_dir(self) -> str:
+        """
+        Directory on shared volume that inputs failing only under the sanitizer build are saved to,
+        laid out as an output directory such that they are pulled with the job's other crashes.
+        """
+        return os.path.join(self.ws.test_dir("output_test_dir", "out"), "crossval")
+
+
+    def _on_created(self, path: str) -> None:
+        """
+        Queues a new file for execution if it is a queue entry or crash of a worker, called by the watcher.
+        """
+        kind_dir, name = os.path.split(path)
+        out_dir, kind = os.path.split(kind_dir)
+        if kind not in VALIDATED_DIRS or name.startswith(".") or name.startswith("README"):
+            return
+
+        for worker in self.workers():
+            if os.path.abspath(worker.out_dir) == out_dir:
+                self._entries.put((kind, path, worker.test))
+                return
+
+
+    def _new_entries(self) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Drains queue entries and crashes of workers reported since last called, as kind, path and test.
+        """
+        entries: List[Tuple[str, str, Optional[str]]] = []
+        while True:
+            try:
+                kind, path, test = self._entries.get_nowait()
+            except queue.Empty:
+                return entries
+
+            if path not in self._seen:
+                self._seen.add(path)
+                entries.append((kind, path, test))
+
+
+    @metrics.timed("crossval_exec")
+    def _execute(self, path: str, test: Optional[str]) -> Tuple[str, int]:
+        command: List[str] = ["timeout", str(config.CROSSVAL_TIMEOUT), self.binary, "--input_test_file", path]
+        if test is not None:
+            command += ["--input_which_test", test]
+
+        result = self.container.exec_run(command, environment=SANITIZER_ENV)
+        return (result.output.decode("utf-8", errors="replace"), result.exit_code)
+
+
+    def _validate(self, kind: str, path: str, test: Optional[str]) -> None:
+        """
+        Re-executes a single input, bucketing it if it fails. Crashes found by the fast build are
+        bucketed even if they do not fail under the sanitizer build.
+        """
+        try:
+            with open(path, "rb") as f:
+                data: bytes = f.read()
+        except OSError:
+            return
+
+        digest: str = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            if digest in self._digests:
+                return
+            self._digests.add(digest)
+
+        try:
+            output, exit_code = self._execute(path, test)
+        except Exception as e:
+            LOGGER.debug("Unable to cross-validate `{}`: {}".format(path, e))
+            return
+
+        # keyed by content, since AFL's `id:NNNNNN` names repeat across workers and tests
+        sig: Optional[str] = signature(output, exit_code)
+        if sig is None and kind == "crashes":
+            sig = "unreproduced:{}".format(digest[:12])
+
+        with self._lock:
+            self.executed += 1
+            if sig is None:
+                return
+
+            bucket: Bucket = self.buckets.setdefault(sig, Bucket(sig))
+            bucket.count += 1
+            bucket.found_by.add("fuzzer" if kind == "crashes" else "sanitizer")
+
+        # inputs only failing under the sanitizer build are saved alongside its report
+        if kind != "crashes":
+            name: str = "{}_{}".format(bucket.key, digest[:12])
+            os.makedirs(os.path.join(self.out_dir, "crashes"), exist_ok=True)
+            os.makedirs(os.path.join(self.out_dir, "reports"), exist_ok=True)
+            with open(os.path.join(self.out_dir, "crashes", name), "wb") as f:
+                f.write(data)
+            with open(os.path.join(self.out_dir, "reports", name + ".txt"), "w") as f:
+                f.write(output)
+            LOGGER.info("Sanitizer build of `{}` failed on queue entry: {}".format(self.ws.name, sig))
+
+
+    def _record(self, pending: int) -> None:
+        with self._lock:
+            buckets: Dict[str, Dict[str, Any]] = dict((b.key, b.to_dict()) for b in self.buckets.values())
+            executed: int = self.executed
+
+        self.record({
+            "crossval_executed": str(executed),
+            "crossval_pending": str(pending),
+            "crashes_found": str(len(buckets)),
+            "crash_buckets": json.dumps(buckets)
+        })
+
+
+    def run(self) -> None:
+        self.container = backend.run_worker(self.client, self.image, self.name, command=["sleep", "infinity"])
+
+        token: int = self.watcher.subscribe(self.ws.test_dir("output_test_dir", "out"), self._on_created)
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=config.CROSSVAL_WORKERS)
+        pending: Set[concurrent.futures.Future] = set()
+        try:
+            while True:
+                finished: bool = not self.alive()
+                for (kind, path, test) in self._new_entries():
+                    pending.add(pool.submit(self._validate, kind, path, test))
+
+                pending = set(f for f in pending if not f.done())
+                self._record(len(pending))
+
+                # drain outputs left by workers once the job finishes
+                if finished or self._stop_event.wait(config.CROSSVAL_INTERVAL):
+                    concurrent.futures.wait(pending)
+                    self._record(0)
+                    break
+        finally:
+            self.watcher.unsubscribe(token)
+            pool.shutdown(wait=True)
+            try:
+                self.container.remove(force=True)
+            except Exception as e:
+                LOGGER.debug("Unable to remove validator `{}`: {}".format(self.name, e))
+
+
+    def stop(self) -> None:
+        self._stop_event.set()
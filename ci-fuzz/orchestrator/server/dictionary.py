@@ -0,0 +1,234 @@
+"""
+dictionary.py
+
+    DESCRIPTION:
+        Pre-flight stage that extracts a fuzzing dictionary for a workspace before workers
+        are launched. Tokens are gathered from string literals and comparison constants in the
+        harness source, printable strings and comparison immediates in the compiled harness
+        binary, and recurring tokens in the seed corpus. Dictionaries are written in the AFL
+        format to the shared volume, cached by the hash of the harness binary (or source, if
+        the harness is compiled by the executor) and the seed corpus. The binary is copied out of
+        a container that is never started, and only disassembled on a cache miss, such that
+        repeated jobs pay next to nothing.
+
+    USAGE:
+        path = dictionary.build(client, ws, image)
+"""
+import logging
+logging.basicConfig()
+
+import io
+import os
+import re
+import struct
+import hashlib
+import tarfile
+import tempfile
+import collections
+
+from server import config
+from server import backend
+from server import metrics
+from server.workspace import Workspace
+
+from typing import Optional, List, Set
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+# executors that accept a dictionary through `--dictionary`
+SUPPORTED = ["afl", "honggfuzz"]
+
+# bounds on the tokens written to a dictionary
+MAX_TOKENS = 512
+MIN_TOKEN_LEN = 2
+MAX_TOKEN_LEN = 128
+
+# string literals and comparisons against numeric constants in C/C++ source
+STRING_REGEX = re.compile(r'"((?:[^"\\\n]|\\.)*)"')
+INCLUDE_REGEX = re.compile(r'^\s*#\s*include.*$', re.MULTILINE)
+COMPARE_REGEX = re.compile(r'(?:==|!=|<=|>=|<|>)\s*(0[xX][0-9a-fA-F]+|\d+)\b')
+
+# printable strings in binaries or seeds, and immediates of compare instructions in disassembly
+PRINTABLE_REGEX = re.compile(rb'[\x20-\x7e]{4,128}')
+TOKEN_REGEX = re.compile(rb'[A-Za-z0-9_\-\.:]{3,32}')
+CMP_IMM_REGEX = re.compile(r'\bcmp[bwlq]?\s+\$(0x[0-9a-f]+)')
+
+
+def _pack_int(value: int) -> Optional[bytes]:
+    """
+    Packs an integer constant little-endian in the smallest width that fits it. Small
+    constants are skipped, since they are trivially found through mutation.
+    """
+    if value <= 0xff:
+        return None
+    for fmt, bound in [("<H", 0xffff), ("<I", 0xffffffff), ("<Q", 0xffffffffffffffff)]:
+        if value <= bound:
+            return struct.pack(fmt, value)
+    return None
+
+
+def _unescape(literal: str) -> bytes:
+    try:
+        return literal.encode("latin-1").decode("unicode_escape").encode("latin-1")
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        return literal.encode("utf-8", "ignore")
+
+
+def from_source(source: str) -> List[bytes]:
+    """
+    Extracts string literals and numeric comparison constants from harness source.
+    """
+    source = INCLUDE_REGEX.sub("", source)
+    tokens: List[bytes] = [_unescape(lit) for lit in STRING_REGEX.findall(source)]
+    for const in COMPARE_REGEX.findall(source):
+        packed = _pack_int(int(const, 0))
+        if packed is not None:
+            tokens.append(packed)
+    return tokens
+
+
+def from_binary(binary: bytes, disassembly: Optional[str] = None) -> List[bytes]:
+    """
+    Extracts printable strings from a compiled harness, plus immediates of compare
+    instructions if a disassembly is available.
+    """
+    tokens: List[bytes] = PRINTABLE_REGEX.findall(binary)
+    if disassembly is not None:
+        for imm in CMP_IMM_REGEX.findall(disassembly):
+            packed = _pack_int(int(imm, 16))
+            if packed is not None:
+                tokens.append(packed)
+    return tokens
+
+
+def from_seeds(seed_dir: str, min_count: int = 2) -> List[bytes]:
+    """
+    Extracts tokens recurring across seeds, since these tend to be format keywords.
+    """
+    counts = collections.Counter()
+    if not os.path.isdir(seed_dir):
+        return []
+
+    for name in os.listdir(seed_dir):
+        path: str = os.path.join(seed_dir, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            counts.update(set(TOKEN_REGEX.findall(f.read())))
+
+    return [token for (token, count) in counts.most_common(MAX_TOKENS) if count >= min_count]
+
+
+def write(tokens: List[bytes], path: str) -> int:
+    """
+    Writes unique tokens in the AFL dictionary format, which is also accepted by honggfuzz.
+    Returns number of tokens written.
+    """
+    seen: Set[bytes] = set()
+    lines: List[str] = []
+    for token in tokens:
+        if token in seen or not MIN_TOKEN_LEN <= len(token) <= MAX_TOKEN_LEN:
+            continue
+        seen.add(token)
+
+        escaped: str = "".join(chr(c) if 0x20 <= c < 0x7f and chr(c) not in '"\\' else "\\x{:02x}".format(c)
+                               for c in token)
+        lines.append('kw{}="{}"\n'.format(len(lines), escaped))
+        if len(lines) >= MAX_TOKENS:
+            break
+
+    # write atomically, since concurrent jobs may extract the same dictionary
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "w") as f:
+        f.writelines(lines)
+    os.rename(tmp_path, path)
+    return len(lines)
+
+
+def _binary_path(ws: Workspace) -> str:
+    return "/home/{}/{}".format(ws.user, backend.harness_binary(ws))
+
+
+def _read_binary(client, ws: Workspace, image: str) -> bytes:
+    """
+    Copies the harness binary compiled into the workspace image out of a created, but never
+    started, container.
+    """
+    container = client.containers.create(image, command=["true"])
+    try:
+        stream, _ = container.get_archive(_binary_path(ws))
+        with tarfile.open(fileobj=io.BytesIO(b"".join(stream)), mode="r") as archive:
+            return archive.extractfile(archive.getmembers()[0]).read()
+    finally:
+        container.remove()
+
+
+def _disassemble(client, ws: Workspace, image: str) -> Optional[str]:
+    """
+    Disassembles the harness binary within the workspace image, or returns None if unable to.
+    """
+    try:
+        return client.containers.run(image, command=["objdump", "-d", "--no-show-raw-insn", _binary_path(ws)],
+            remove=True).decode("utf-8", "ignore")
+    except Exception as e:
+        LOGGER.debug("Unable to disassemble harness: {}".format(e))
+        return None
+
+
+def cache_key(harness: bytes, seed_dir: str) -> str:
+    """
+    Hash of the inputs a dictionary is extracted from: the harness binary (or source), and the
+    name and content of every seed.
+    """
+    digest = hashlib.sha256(harness)
+    if os.path.isdir(seed_dir):
+        for name in sorted(os.listdir(seed_dir)):
+            path: str = os.path.join(seed_dir, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                digest.update("\0{}\0{}".format(name, hashlib.sha256(f.read()).hexdigest()).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@metrics.timed("dictionary")
+def build(client, ws: Workspace, image: str) -> Optional[str]:
+    """
+    Returns the path to the dictionary for a workspace on the shared volume, extracting one if
+    not cached. Returns None if the executor does not accept a dictionary, or it is disabled.
+
+    :param client: Docker engine client
+    :param ws: workspace to extract dictionary for
+    :param image: tag of image built for workspace
+    """
+    if ws.executor not in SUPPORTED or not ws.getboolean("manifest", "dictionary", True):
+        return None
+
+    with open(os.path.join(ws.path, ws.harness), "r") as f:
+        source: str = f.read()
+
+    binary: Optional[bytes] = None
+    if ws.prebuilt:
+        try:
+            binary = _read_binary(client, ws, image)
+        except Exception as e:
+            LOGGER.warning("Unable to read harness binary from `{}`: {}".format(image, e))
+
+    seed_dir: str = ws.test_dir("input_seeds", "in")
+    digest: str = cache_key(binary if binary is not None else source.encode("utf-8"), seed_dir)
+    path: str = os.path.join(config.DICTIONARY_CACHE_DIR, "{}.dict".format(digest))
+    if os.path.isfile(path):
+        LOGGER.info("Using cached dictionary `{}` for `{}`.".format(path, ws.name))
+        return path
+
+    # binary strings are the noisiest source, so are prioritized last
+    tokens: List[bytes] = from_source(source) + from_seeds(seed_dir)
+    if binary is not None:
+        tokens += from_binary(binary, _disassemble(client, ws, image))
+
+    count: int = write(tokens, path)
+    LOGGER.info("Extracted dictionary with {} tokens for `{}`.".format(count, ws.name))
+    return path
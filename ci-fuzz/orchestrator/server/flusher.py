@@ -0,0 +1,197 @@
+"""
+flusher.py
+
+    DESCRIPTION:
+        Workers can write their fuzzer output to a sized tmpfs inside the container rather than
+        directly to the shared testbed volume, avoiding the disk I/O of queue and `.cur_input`
+        writes. An OutputFlusher incrementally copies new files from the tmpfs out to the shared
+        volume on an interval, and once more before the worker is stopped. Workers outlive their
+        fuzzer (see `backend.hold_command`), such that outputs are also flushed once more after
+        the fuzzer exits on its own, before the container and its tmpfs are gone.
+
+    USAGE:
+        flusher = OutputFlusher(container, config.TMPFS_OUTPUT_DIR, ws.test_dir("output_test_dir", "out"))
+        flusher.start()
+        ...
+        flusher.stop()
+"""
+import logging
+logging.basicConfig()
+
+import io
+import os
+import time
+import tarfile
+import threading
+
+from server import config
+from server import backend
+from server import metrics
+
+from typing import Optional
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+def _safe_name(name: str) -> Optional[str]:
+    """
+    Normalizes a member name of an archive made in the worker container, whose tree the fuzz target
+    controls, or returns None if it is absolute or escapes the destination.
+    """
+    name = os.path.normpath(name)
+    if os.path.isabs(name) or name == ".." or name.startswith("../"):
+        return None
+    return name
+
+
+class OutputFlusher(threading.Thread):
+    """
+    Background thread that syncs a worker's tmpfs output directory to the shared volume.
+    """
+
+    def __init__(self, container, src: str, dest: str, interval: Optional[int] = None,
+                 timeout: Optional[int] = None) -> None:
+        """
+        :param container: worker container writing to tmpfs
+        :param src: path to tmpfs output directory in container
+        :param dest: path to output directory on shared volume
+        :param interval: seconds between flushes, default is `config.FLUSH_INTERVAL`
+        :param timeout: optional campaign duration, after which a final flush is done and the
+            worker is stopped (the tmpfs does not outlive the container)
+        """
+        super().__init__(daemon=True)
+
+        self.container = container
+        self.src: str = src
+        self.dest: str = dest
+        self.interval: int = config.FLUSH_INTERVAL if interval is None else interval
+        self.deadline: Optional[float] = time.time() + timeout if timeout else None
+
+        # modification time bound of the last flush, such that only new or updated files are copied
+        self.last_flush: int = 0
+        self._stop_event = threading.Event()
+
+
+    def _alive(self) -> bool:
+        try:
+            self.container.reload()
+        except Exception:
+            return False
+        return self.container.status == "running"
+
+
+    def _exited(self) -> bool:
+        """
+        Whether the fuzzer exited on its own, in a worker holding its outputs (see `backend.hold_command`).
+        """
+        try:
+            exit_code, _ = self.container.exec_run(["test", "-e", backend.EXITED_MARKER])
+        except Exception:
+            return False
+        return exit_code == 0
+
+
+    def _archive_running(self, since: int) -> Optional[bytes]:
+        """
+        Archives files modified after a bound in a running container, or returns None if unable to.
+        """
+        exit_code, (stdout, stderr) = self.container.exec_run([
+            "tar", "-C", self.src, "-cf", "-",
+            "--exclude=.cur_input",
+            "--newer-mtime=@{}".format(since),
+            "."
+        ], demux=True)
+
+        # GNU tar exits with 1 if files changed while being archived, which is routine for live fuzzer
+        # outputs, and the archive is still complete for every other file
+        if exit_code not in [0, 1]:
+            LOGGER.debug("Unable to archive `{}` in container: {}".format(self.src, stderr))
+            return None
+        elif exit_code == 1:
+            LOGGER.debug("Files changed while archiving `{}`: {}".format(self.src, stderr))
+        return stdout or b""
+
+
+    def _archive_stopped(self) -> bytes:
+        """
+        Archives the output directory out of a container that is no longer running, with paths
+        relative to it as when archived within the container.
+        """
+        chunks, _ = self.container.get_archive(self.src)
+        return b"".join(chunks)
+
+
+    @metrics.timed("flush")
+    def flush(self) -> int:
+        """
+        Archives files modified since the last flush in the container, and extracts them
+        to the shared volume. Once the container is no longer running, its outputs are
+        archived through the engine instead. Returns number of files flushed.
+        """
+        # overlap by a second, since mtimes are truncated by tar
+        since: int = self.last_flush
+        self.last_flush = int(time.time()) - 1
+
+        prefix: str = ""
+        try:
+            if self._alive():
+                data: Optional[bytes] = self._archive_running(since)
+            else:
+                data = self._archive_stopped()
+                prefix = os.path.basename(self.src.rstrip("/")) + "/"
+        except Exception as e:
+            LOGGER.debug("Unable to archive `{}` of container: {}".format(self.src, e))
+            data = None
+
+        if data is None:
+            self.last_flush = since
+            return 0
+
+        os.makedirs(self.dest, exist_ok=True)
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r") as archive:
+            members = []
+            for member in archive.getmembers():
+                # only regular files are extracted, such that links and devices are never created
+                if not member.isfile() or member.mtime < since or os.path.basename(member.name) == ".cur_input":
+                    continue
+                if prefix and member.name.startswith(prefix):
+                    member.name = member.name[len(prefix):]
+
+                name: Optional[str] = _safe_name(member.name)
+                if name is None:
+                    LOGGER.warning("Skipping unsafe path `{}` flushed from `{}`.".format(member.name, self.src))
+                    continue
+                member.name = name
+                members.append(member)
+            archive.extractall(self.dest, members=members)
+
+        LOGGER.debug("Flushed {} files to `{}`.".format(len(members), self.dest))
+        return len(members)
+
+
+    def run(self) -> None:
+        finished: bool = False
+        while not finished and not self._stop_event.wait(self.interval):
+
+            # container exited or was stopped externally, its outputs are flushed from it once more below
+            if not self._alive():
+                break
+
+            self.flush()
+            finished = self._exited() or (self.deadline is not None and time.time() >= self.deadline)
+
+        self.flush()
+
+        # campaign is over, stop the worker now that its outputs are synced
+        if finished:
+            self.container.stop()
+
+
+    def stop(self) -> None:
+        """
+        Stops flushing, after a final flush is done. Should be called before stopping the worker.
+        """
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
@@ -0,0 +1,222 @@
+"""
+k8s.py
+
+    DESCRIPTION:
+        Renders Kubernetes Job manifests for fuzzing workspaces off of `extras/template.yml`. Resource
+        requests and limits are sized from the workspace manifest and the peak memory and CPU measured in
+        previous runs, such that pods are packed densely without being OOM killed. Memory is requested at
+        its limit, since a fuzzer exceeding its request is the first to be killed under node pressure.
+        Rendered values are validated offline against the constraints the API server enforces on them,
+        so no cluster is needed to catch an invalid manifest.
+
+        Multiplexed workspaces are rendered as a Job per test, each fuzzing its test for the budget the
+        test scheduler would give it, rather than as one Job sized for every test.
+
+    USAGE:
+        manifest = k8s.render(ws, "ci_openssl", usage={"peak_memory": "...", "peak_cpu": "..."})
+"""
+import os
+import re
+import json
+import math
+import hashlib
+
+from server import config
+from server import backend
+from server.workspace import Workspace
+
+from typing import Optional, List, Dict
+
+
+# object names must be DNS-1123 labels (see `metadata.name` of batch/v1 Job)
+NAME_REGEX = re.compile(r"^[a-z0-9]([-a-z0-9]*[a-z0-9])?$")
+NAME_MAX_LENGTH = 63
+
+# length of the hash suffix distinguishing names that are truncated
+NAME_HASH_LENGTH = 8
+
+# label values are at most 63 alphanumerics, `-`, `_` or `.`, beginning and ending alphanumeric
+LABEL_REGEX = re.compile(r"^([A-Za-z0-9]([-A-Za-z0-9_.]*[A-Za-z0-9])?)?$")
+
+# resource quantities as rendered, in MiB and millicores
+MEMORY_REGEX = re.compile(r"^[1-9][0-9]*Mi$")
+CPU_REGEX = re.compile(r"^[1-9][0-9]*m$")
+
+# image references, ie. `registry:5000/fuzzbed/openssl:latest`
+IMAGE_REGEX = re.compile(r"^[a-z0-9]+([._/:@-][a-zA-Z0-9]+)*$")
+
+# matches placeholders left unrendered in the template
+PLACEHOLDER_REGEX = re.compile(r"\{[A-Z_]+\}")
+
+# matches memory sizes in the manifest, ie. `512m` or `4Gi`, and their size in MiB
+SIZE_REGEX = re.compile(r"^(\d+)\s*([kmgKMG])i?[bB]?$")
+SIZE_UNITS = {"k": 1.0 / 1024, "m": 1, "g": 1024}
+
+
+class RenderError(Exception):
+    pass
+
+
+def _sanitize(name: str) -> str:
+    """
+    Sanitizes a name into a DNS-1123 label. Names too long are truncated with a short hash of the
+    original name appended, such that names sharing a long prefix (ie. per-test Jobs) stay distinct.
+    """
+    sanitized: str = re.sub(r"[^a-z0-9-]+", "-", name.lower()).strip("-")
+    if len(sanitized) <= NAME_MAX_LENGTH:
+        return sanitized
+
+    digest: str = hashlib.sha256(name.encode("utf-8")).hexdigest()[:NAME_HASH_LENGTH]
+    return "{}-{}".format(sanitized[:NAME_MAX_LENGTH - NAME_HASH_LENGTH - 1].rstrip("-"), digest)
+
+
+def job_name(ws_name: str) -> str:
+    """
+    Sanitizes a workspace name into a valid Job name, ie. `ci_OpenSSL` to `fuzzbed-ci-openssl`.
+    """
+    return _sanitize("fuzzbed-{}".format(ws_name))
+
+
+def parse_size(size: str) -> int:
+    """
+    Parses a memory size from the manifest into MiB.
+    """
+    match = SIZE_REGEX.match(size.strip())
+    if match is None:
+        raise RenderError("invalid memory size `{}`.".format(size))
+    return int(math.ceil(int(match.group(1)) * SIZE_UNITS[match.group(2).lower()]))
+
+
+class Resources(object):
+    """
+    Resource requests and limits of a single fuzzing container, in MiB and millicores.
+    """
+
+    def __init__(self, ws: Workspace, usage: Optional[Dict[str, str]] = None) -> None:
+        """
+        Sizes resources from measured usage if available, and otherwise from the manifest. The manifest's
+        `memory` is treated as a floor. Fuzzers are single-threaded, and multiplexed tests are rendered
+        as a Job each, so CPU is limited to one core.
+
+        :param ws: workspace to size resources for
+        :param usage: optional peak usage recorded from previous runs, with `peak_memory` (in bytes)
+                      and `peak_cpu` (in cores)
+        """
+        usage = usage or dict()
+        peak_memory: float = float(usage.get("peak_memory") or 0)
+        peak_cpu: float = float(usage.get("peak_cpu") or 0)
+
+        # memory is requested at its limit, with headroom over the measured peak
+        memory: int = config.K8S_DEFAULT_MEMORY
+        if peak_memory > 0:
+            memory = int(math.ceil(peak_memory / (1024 * 1024) * config.K8S_MEMORY_HEADROOM))
+        if ws.get("manifest", "memory"):
+            memory = max(memory, parse_size(ws.get("manifest", "memory")))
+        self.memory_request: int = max(memory, config.K8S_MIN_MEMORY)
+        self.memory_limit: int = self.memory_request
+
+        # CPU is requested at measured usage, and may burst up to a core when the node is idle
+        cpu: int = 1000
+        if peak_cpu > 0:
+            cpu = min(cpu, int(math.ceil(peak_cpu * 1000 * config.K8S_CPU_HEADROOM)))
+        self.cpu_request: int = max(cpu, config.K8S_MIN_CPU)
+        self.cpu_limit: int = max(1000, self.cpu_request)
+
+
+def validate(values: Dict[str, str], resources: Resources) -> None:
+    """
+    Validates rendered values against the constraints of the fields they are rendered into,
+    raising a RenderError with every violation.
+
+    :param values: placeholders of template and their rendered values
+    :param resources: resources of container
+    """
+    errors: List[str] = []
+    if len(values["NAME"]) > NAME_MAX_LENGTH or not NAME_REGEX.match(values["NAME"]):
+        errors.append("metadata.name `{}` is not a DNS-1123 label".format(values["NAME"]))
+    if len(values["WS_NAME"]) > NAME_MAX_LENGTH or not LABEL_REGEX.match(values["WS_NAME"]):
+        errors.append("label value `{}` is invalid".format(values["WS_NAME"]))
+    if not IMAGE_REGEX.match(values["IMAGE"]):
+        errors.append("image `{}` is not a valid reference".format(values["IMAGE"]))
+    if len(values["TESTBED_CLAIM"]) > NAME_MAX_LENGTH or not NAME_REGEX.match(values["TESTBED_CLAIM"]):
+        errors.append("claimName `{}` is not a DNS-1123 label".format(values["TESTBED_CLAIM"]))
+    if not values["TESTBED"].startswith("/"):
+        errors.append("mountPath `{}` is not absolute".format(values["TESTBED"]))
+
+    for key in ["MEMORY_REQUEST", "MEMORY"]:
+        if not MEMORY_REGEX.match(values[key]):
+            errors.append("memory quantity `{}` is invalid".format(values[key]))
+    for key in ["CPU_REQUEST", "CPU"]:
+        if not CPU_REGEX.match(values[key]):
+            errors.append("cpu quantity `{}` is invalid".format(values[key]))
+
+    if resources.memory_request > resources.memory_limit:
+        errors.append("memory request must be less than or equal to its limit")
+    if resources.cpu_request > resources.cpu_limit:
+        errors.append("cpu request must be less than or equal to its limit")
+
+    if len(errors) > 0:
+        raise RenderError("invalid Job for workspace `{}`: {}.".format(values["WS_NAME"], "; ".join(errors)))
+
+
+def _render_job(template: str, ws: Workspace, name: str, command: List[str], resources: Resources) -> str:
+    image: str = backend.IMAGE_TAG.format(ws.name.lower())
+    if config.K8S_REGISTRY:
+        image = "{}/{}".format(config.K8S_REGISTRY.rstrip("/"), image)
+
+    # commands are rendered as JSON, which is a valid YAML flow sequence
+    values: Dict[str, str] = dict({
+        "NAME": name,
+        "WS_NAME": ws.name,
+        "IMAGE": image,
+        "COMMAND": json.dumps(command),
+        "MEMORY_REQUEST": "{}Mi".format(resources.memory_request),
+        "MEMORY": "{}Mi".format(resources.memory_limit),
+        "CPU_REQUEST": "{}m".format(resources.cpu_request),
+        "CPU": "{}m".format(resources.cpu_limit),
+        "TESTBED": config.TESTBED,
+        "TESTBED_CLAIM": config.K8S_TESTBED_CLAIM,
+    })
+    validate(values, resources)
+
+    for (key, value) in values.items():
+        template = template.replace("{" + key + "}", value)
+
+    leftover: List[str] = PLACEHOLDER_REGEX.findall(template)
+    if len(leftover) > 0:
+        raise RenderError("template `{}` has unknown placeholders: {}.".format(config.K8S_TEMPLATE, leftover))
+    return template
+
+
+def render(ws: Workspace, name: Optional[str] = None, usage: Optional[Dict[str, str]] = None) -> str:
+    """
+    Renders Job manifests fuzzing a workspace until its timeout, with outputs written to the testbed
+    volume claim. Multiplexed workspaces are rendered as a multi-document stream of a Job per test,
+    each fuzzing for its share of the workspace's core-seconds as split by the test scheduler.
+
+    :param ws: workspace to render Job(s) for
+    :param name: optional name of Job, or prefix of Jobs per test (default is derived from workspace)
+    :param usage: optional peak usage recorded from previous runs
+    """
+    with open(config.K8S_TEMPLATE, "r") as f:
+        template: str = f.read()
+
+    resources = Resources(ws, usage)
+    name = name or job_name(ws.name)
+    out_dir: str = ws.test_dir("output_test_dir", "out")
+    if not ws.getboolean("manifest", "multiplex"):
+        return _render_job(template, ws, name, backend.default_command(ws, out_dir), resources)
+
+    tests: List[str] = ws.enumerate_tests()
+    if len(tests) == 0:
+        raise RenderError("no tests found in harness for workspace `{}`.".format(ws.name))
+
+    # every test runs at once on its own core, for the budget it would get on `cores` cores
+    cores: int = min(int(ws.get("manifest", "cores", "") or len(tests)), len(tests))
+    budget: int = max(1, int((ws.timeout or 3600) * cores / len(tests)))
+
+    documents: List[str] = []
+    for test in tests:
+        command: List[str] = backend.harness_command(ws, os.path.join(out_dir, test), test, ["--timeout", str(budget)])
+        documents.append(_render_job(template, ws, _sanitize("{}-{}".format(name, test)), command, resources))
+    return "---\n".join(documents)
@@ -0,0 +1,167 @@
+"""
+listing.py
+
+    DESCRIPTION:
+        Paginated listing of jobs, with server-side filters and field projection, such that listing a
+        fleet of workers does not serialize every container for every request. Jobs are summarized from
+        the orchestrator's own bookkeeping, with container states from a single Docker query cached for
+        a short interval, and recorded info is only fetched from the store for fields that need it.
+        Pages can be encoded as JSON, or in a compact binary encoding that lists field names once.
+
+    USAGE:
+        listing = JobListing(filters={"state": ["running"]}, fields=["name", "state"], limit=100)
+        rows, total, cursor = listing.page(summaries, cursor=None)
+"""
+import time
+import base64
+import bisect
+import struct
+
+from server import metrics
+
+from typing import Optional, List, Dict, Tuple
+
+
+# fields summarized from the orchestrator's bookkeeping, which can also be filtered on
+SUMMARY_FIELDS = ["name", "workspace", "executor", "state"]
+FILTER_FIELDS = ["workspace", "executor", "state"]
+
+# fields listed if none are selected
+DEFAULT_FIELDS = SUMMARY_FIELDS
+
+# compact encoding: magic, then the total count of matching jobs, next cursor, field names and rows,
+# with every string length-prefixed and values in the order of field names
+COMPACT_MIMETYPE = "application/x-fuzzbed-compact"
+COMPACT_MAGIC = b"FBC1"
+COMPACT_NULL = 0xFFFF
+COUNT = struct.Struct(">I")
+LENGTH = struct.Struct(">H")
+
+
+class ListingError(Exception):
+    pass
+
+
+class ContainerStates(object):
+    """
+    States of every container by name, from one Docker query reused for a short interval.
+    """
+
+    def __init__(self, client, ttl: float) -> None:
+        self.client = client
+        self.ttl: float = ttl
+        self._states: Dict[str, str] = dict()
+        self._expires: float = 0.0
+
+
+    def get(self) -> Dict[str, str]:
+        if time.time() >= self._expires:
+            with metrics.timer("list_containers"):
+                self._states = dict((c.name, c.status) for c in self.client.containers.list(all=True))
+            self._expires = time.time() + self.ttl
+        return self._states
+
+
+def encode_cursor(name: str) -> str:
+    return base64.urlsafe_b64encode(name.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    except (ValueError, UnicodeError):
+        raise ListingError("invalid cursor `{}`.".format(cursor))
+
+
+class JobListing(object):
+    """
+    A query over jobs, as filters on summary fields, the fields to return, and a page size.
+    """
+
+    def __init__(self, filters: Dict[str, List[str]], fields: List[str], limit: int) -> None:
+        """
+        :param filters: summary fields mapped to values a job may have to be listed
+        :param fields: fields to return for each job
+        :param limit: maximum number of jobs per page
+        """
+        unknown: List[str] = [key for key in filters.keys() if key not in FILTER_FIELDS]
+        if len(unknown) > 0:
+            raise ListingError("cannot filter on {}, only {}.".format(unknown, FILTER_FIELDS))
+
+        self.filters: Dict[str, List[str]] = filters
+        self.fields: List[str] = fields or DEFAULT_FIELDS
+        self.limit: int = limit
+
+
+    @classmethod
+    def from_args(cls, args: Dict[str, str], max_limit: int) -> "JobListing":
+        """
+        Parses a query from request arguments, ie. `?state=running,exited&fields=name,state&limit=50`.
+        """
+        filters: Dict[str, List[str]] = dict((key, args[key].split(",")) for key in FILTER_FIELDS if args.get(key))
+        fields: List[str] = [field for field in args.get("fields", "").split(",") if field]
+        try:
+            limit: int = int(args.get("limit", max_limit))
+        except ValueError:
+            raise ListingError("invalid limit `{}`.".format(args.get("limit")))
+        return cls(filters, fields, max(1, min(limit, max_limit)))
+
+
+    @property
+    def recorded_fields(self) -> List[str]:
+        """
+        Selected fields that must be fetched from recorded job info.
+        """
+        return [field for field in self.fields if field not in SUMMARY_FIELDS]
+
+
+    def page(self, summaries: Dict[str, Dict[str, str]], cursor: Optional[str]) -> Tuple[List[Dict[str, str]], int, Optional[str]]:
+        """
+        Filters and orders job summaries by name, returning a page of them after a cursor, the total
+        count of matching jobs, and the cursor of the next page if any.
+
+        :param summaries: summary fields of every job, by name
+        :param cursor: cursor returned with a previous page
+        """
+        after: Optional[str] = decode_cursor(cursor) if cursor else None
+        matching: List[str] = sorted(name for (name, summary) in summaries.items()
+            if all(summary.get(key) in values for (key, values) in self.filters.items()))
+
+        start: int = 0
+        if after is not None:
+            start = bisect.bisect_right(matching, after)
+
+        names: List[str] = matching[start:start + self.limit]
+        next_cursor: Optional[str] = None
+        if start + self.limit < len(matching):
+            next_cursor = encode_cursor(names[-1])
+        return ([summaries[name] for name in names], len(matching), next_cursor)
+
+
+    def project(self, summary: Dict[str, str], recorded: Optional[Dict[str, str]] = None) -> Dict[str, Optional[str]]:
+        """
+        Projects a job onto the selected fields, from its summary and recorded info.
+        """
+        recorded = recorded or dict()
+        return dict((field, summary[field] if field in summary else recorded.get(field)) for field in self.fields)
+
+
+def _encode_string(value: Optional[str]) -> bytes:
+    if value is None:
+        return LENGTH.pack(COMPACT_NULL)
+
+    data: bytes = value.encode("utf-8")[:COMPACT_NULL - 1]
+    return LENGTH.pack(len(data)) + data
+
+
+def encode_compact(fields: List[str], rows: List[Dict[str, Optional[str]]], total: int,
+                   next_cursor: Optional[str]) -> bytes:
+    """
+    Encodes a page of projected jobs in the compact binary encoding.
+    """
+    parts: List[bytes] = [COMPACT_MAGIC, COUNT.pack(total), _encode_string(next_cursor), LENGTH.pack(len(fields))]
+    parts += [_encode_string(field) for field in fields]
+    parts.append(COUNT.pack(len(rows)))
+    for row in rows:
+        parts += [_encode_string(None if row[field] is None else str(row[field])) for field in fields]
+    return b"".join(parts)
@@ -0,0 +1,161 @@
+"""
+metrics.py
+
+    DESCRIPTION:
+        Minimal instrumentation for the orchestrator, exposed in the Prometheus text format.
+        Latency histograms are recorded for API routes and backend operations (image builds,
+        container creation, pre-flight stages and Redis calls), while gauges are computed from
+        callbacks at scrape time, such that they cost nothing between scrapes. If disabled with
+        `FUZZBED_METRICS=0`, decorated functions are returned unwrapped.
+
+    USAGE:
+        @metrics.timed("build_image")
+        def build_image(...):
+            ...
+
+        with metrics.timer("redis_pipeline"):
+            ...
+"""
+import time
+import bisect
+import threading
+import functools
+import contextlib
+
+from server import config
+
+from typing import List, Dict, Tuple, Callable, Iterator
+
+LabelsType = Tuple[Tuple[str, str], ...]
+
+
+# default histogram buckets (in seconds), spanning fast Redis calls to slow image builds
+DEFAULT_BUCKETS: List[float] = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0, 300.0]
+
+
+def _format_labels(labels: LabelsType) -> str:
+    if len(labels) == 0:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for (k, v) in labels) + "}"
+
+
+class Histogram(object):
+    """
+    Cumulative histogram of observations, partitioned by labels.
+    """
+
+    def __init__(self, name: str, doc: str, buckets: List[float] = DEFAULT_BUCKETS) -> None:
+        self.name: str = name
+        self.doc: str = doc
+        self.buckets: List[float] = sorted(buckets)
+        self._series: Dict[LabelsType, List[float]] = dict()
+        self._lock = threading.Lock()
+
+
+    def observe(self, value: float, **labels: str) -> None:
+        key: LabelsType = tuple(sorted(labels.items()))
+        index: int = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+
+                # per-bucket counts, followed by total count and sum
+                series = self._series[key] = [0.0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+
+    def expose(self) -> Iterator[str]:
+        yield "# HELP {} {}".format(self.name, self.doc)
+        yield "# TYPE {} histogram".format(self.name)
+        with self._lock:
+            series = [(key, list(values)) for (key, values) in self._series.items()]
+
+        for (key, values) in series:
+            cumulative: float = 0
+            for (bound, count) in zip(self.buckets + [float("inf")], values):
+                cumulative += count
+                le: str = "+Inf" if bound == float("inf") else repr(bound)
+                yield "{}_bucket{} {}".format(self.name, _format_labels(key + (("le", le),)), int(cumulative))
+            yield "{}_count{} {}".format(self.name, _format_labels(key), int(values[-2]))
+            yield "{}_sum{} {}".format(self.name, _format_labels(key), values[-1])
+
+
+class Gauge(object):
+    """
+    Gauge whose samples are computed by a callback at scrape time.
+    """
+
+    def __init__(self, name: str, doc: str, callback: Callable[[], Dict[LabelsType, float]]) -> None:
+        self.name: str = name
+        self.doc: str = doc
+        self.callback: Callable[[], Dict[LabelsType, float]] = callback
+
+
+    def expose(self) -> Iterator[str]:
+        yield "# HELP {} {}".format(self.name, self.doc)
+        yield "# TYPE {} gauge".format(self.name)
+        for (key, value) in self.callback().items():
+            yield "{}{} {}".format(self.name, _format_labels(key), value)
+
+
+REQUEST_LATENCY = Histogram("fuzzbed_request_seconds", "Latency of API requests by route and method.")
+OPERATION_LATENCY = Histogram("fuzzbed_operation_seconds", "Latency of backend operations by operation.")
+
+_gauges: List[Gauge] = []
+
+
+def gauge(name: str, doc: str) -> Callable:
+    """
+    Decorator registering a callback, returning samples by labels, as a gauge.
+    """
+    def decorator(callback: Callable[[], Dict[LabelsType, float]]) -> Callable:
+        _gauges.append(Gauge(name, doc, callback))
+        return callback
+    return decorator
+
+
+@contextlib.contextmanager
+def timer(operation: str) -> Iterator[None]:
+    """
+    Context manager timing a backend operation.
+    """
+    if not config.METRICS_ENABLED:
+        yield
+        return
+
+    start: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        OPERATION_LATENCY.observe(time.perf_counter() - start, operation=operation)
+
+
+def timed(operation: str) -> Callable:
+    """
+    Decorator timing every call of a function as a backend operation.
+    """
+    def decorator(func: Callable) -> Callable:
+        if not config.METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start: float = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                OPERATION_LATENCY.observe(time.perf_counter() - start, operation=operation)
+        return wrapper
+    return decorator
+
+
+def expose() -> str:
+    """
+    Renders every metric in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    for metric in [REQUEST_LATENCY, OPERATION_LATENCY] + _gauges:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
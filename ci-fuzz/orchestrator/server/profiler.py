@@ -0,0 +1,60 @@
+"""
+profiler.py
+
+    DESCRIPTION:
+        On-demand sampling profiler for the orchestrator process, enabled with `FUZZBED_PROFILE=1`.
+        While capturing, a thread samples the stacks of every other thread at an interval, and
+        aggregates them in the collapsed stack format consumed by flame graph tooling. Nothing
+        is sampled outside of a capture.
+
+    USAGE:
+        collapsed = profiler.capture(seconds=10)
+"""
+import sys
+import time
+import threading
+import collections
+
+from typing import List, Dict
+
+
+# interval (in seconds) between stack samples
+SAMPLE_INTERVAL = 0.01
+
+# only one capture may run at a time, since sampling has a cost
+_capture_lock = threading.Lock()
+
+
+def _collapse(frame) -> str:
+    stack: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append("{}:{}:{}".format(code.co_filename, code.co_name, frame.f_lineno))
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def capture(seconds: float, interval: float = SAMPLE_INTERVAL) -> str:
+    """
+    Samples stacks of all threads for a duration, returning collapsed stacks with their counts.
+    Raises RuntimeError if a capture is already running.
+
+    :param seconds: duration of capture
+    :param interval: seconds between samples
+    """
+    if not _capture_lock.acquire(blocking=False):
+        raise RuntimeError("a profile is already being captured")
+
+    counts: Dict[str, int] = collections.Counter()
+    current: int = threading.get_ident()
+    try:
+        deadline: float = time.time() + seconds
+        while time.time() < deadline:
+            for (ident, frame) in sys._current_frames().items():
+                if ident != current:
+                    counts[_collapse(frame)] += 1
+            time.sleep(interval)
+    finally:
+        _capture_lock.release()
+
+    return "".join("{} {}\n".format(stack, count) for (stack, count) in counts.items())
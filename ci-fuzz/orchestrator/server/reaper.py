@@ -0,0 +1,90 @@
+"""
+reaper.py
+
+    DESCRIPTION:
+        Jobs are tracked by the orchestrator (its workers, schedulers and the background threads
+        following them) for as long as they are listed. A JobReaper removes jobs once they have
+        settled, ie. their workers and background threads are done, and have stayed so for a
+        retention period, such that bookkeeping of a long-running orchestrator stays bounded.
+        Recorded info and statistics of reaped jobs remain in the store.
+
+    USAGE:
+        reaper = JobReaper(jobs, settled, remove)
+        reaper.start()
+"""
+import logging
+logging.basicConfig()
+
+import os
+import time
+import threading
+
+from server import config
+
+from typing import Optional, List, Dict, Callable
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+class JobReaper(threading.Thread):
+    """
+    Background thread removing jobs settled for longer than a retention period.
+    """
+
+    def __init__(self, jobs: Callable[[], List[str]], settled: Callable[[str], bool],
+                 remove: Callable[[str, float], None], retention: Optional[int] = None) -> None:
+        """
+        :param jobs: callback returning names of every tracked job
+        :param settled: callback returning whether a job's workers and background threads are done
+        :param remove: callback that removes a job, given the time it was first seen settled
+        :param retention: seconds a settled job is kept for, default is `config.JOB_RETENTION`
+        """
+        super().__init__(daemon=True)
+        self.jobs: Callable[[], List[str]] = jobs
+        self.settled: Callable[[str], bool] = settled
+        self.remove: Callable[[str, float], None] = remove
+        self.retention: int = config.JOB_RETENTION if retention is None else retention
+        self._stop_event = threading.Event()
+
+        # time each job was first seen settled
+        self._since: Dict[str, float] = dict()
+
+
+    def reap(self) -> List[str]:
+        """
+        Removes jobs settled for longer than the retention period, returning their names.
+        """
+        now: float = time.time()
+        jobs: List[str] = self.jobs()
+        reaped: List[str] = []
+        for job_name in jobs:
+            if not self.settled(job_name):
+                self._since.pop(job_name, None)
+                continue
+
+            since: float = self._since.setdefault(job_name, now)
+            if now - since >= self.retention:
+                self.remove(job_name, since)
+                del self._since[job_name]
+                reaped.append(job_name)
+
+        # forget jobs removed by other means
+        for job_name in set(self._since.keys()) - set(jobs):
+            del self._since[job_name]
+
+        if len(reaped) > 0:
+            LOGGER.info("Reaped {} finished jobs.".format(len(reaped)))
+        return reaped
+
+
+    def run(self) -> None:
+        while not self._stop_event.wait(config.REAP_INTERVAL):
+            try:
+                self.reap()
+            except Exception as e:
+                LOGGER.warning("Unable to reap finished jobs: {}".format(e))
+
+
+    def stop(self) -> None:
+        self._stop_event.set()
@@ -0,0 +1,209 @@
+"""
+scheduler.py
+
+    DESCRIPTION:
+        Multiplexes every `TEST()` unit in a workspace harness over a single built image.
+        Each test is fuzzed in its own container pinned to a core, with its own time budget.
+        Tests that plateau (ie. have not discovered new paths within a window) are stopped
+        early, and their unspent budget is redistributed to the tests that are still queued
+        or making progress.
+
+    USAGE:
+        sched = TestScheduler(client, job_name, ws, image, WorkerOptions())
+        sched.start()
+"""
+import logging
+logging.basicConfig()
+
+import os
+import time
+import threading
+import collections
+
+from server import config
+from server import stats
+from server.workspace import Workspace
+from server.worker import Worker, WorkerOptions
+from server.calibrate import ExecTimeout
+
+from typing import Optional, List, Dict, Any, Callable
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+class TestRun(object):
+    """
+    Bookkeeping for a single test multiplexed within a job.
+    """
+
+    def __init__(self, name: str, budget: float) -> None:
+        self.name: str = name
+        self.budget: float = budget
+        self.status: str = "pending"
+        self.core: Optional[int] = None
+        self.worker: Optional[Worker] = None
+        self.tuner: Optional[ExecTimeout] = None
+        self.started: Optional[float] = None
+        self.deadline: Optional[float] = None
+        self.paths: int = 0
+        self.last_progress: Optional[float] = None
+
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict({
+            "status": self.status,
+            "core": self.core,
+            "budget": self.budget,
+            "paths": self.paths,
+            "exec_timeout": None if self.tuner is None else self.tuner.value
+        })
+
+
+class TestScheduler(threading.Thread):
+    """
+    Background thread that schedules all tests of a harness onto a pool of cores.
+    """
+
+    def __init__(self, client, job_name: str, ws: Workspace, image: str, options: WorkerOptions,
+                 tests: Optional[List[str]] = None, cores: Optional[int] = None,
+                 record: Optional[Callable[[Dict[str, str]], None]] = None) -> None:
+        """
+        :param client: Docker engine client
+        :param job_name: name of job, used to prefix worker container names
+        :param ws: workspace being fuzzed
+        :param image: tag of image built once for workspace
+        :param options: options shared by all workers of job
+        :param tests: tests to multiplex, default is every test in harness
+        :param cores: number of cores to fuzz on, default is `cores` in manifest or CPU count
+        :param record: optional callback that records job info
+        """
+        super().__init__(daemon=True)
+
+        self.client = client
+        self.job_name: str = job_name
+        self.ws: Workspace = ws
+        self.image: str = image
+        self.options: WorkerOptions = options
+        self.record: Callable[[Dict[str, str]], None] = record or (lambda fields: None)
+
+        tests = ws.enumerate_tests() if tests is None else tests
+        if len(tests) == 0:
+            raise ValueError("no tests found in harness for workspace `{}`.".format(ws.name))
+
+        if cores is None:
+            cores = int(ws.get("manifest", "cores", "") or os.cpu_count() or 1)
+        self.cores: List[int] = list(range(min(cores, len(tests))))
+
+        # total budget in core-seconds is split evenly between tests
+        timeout: int = ws.timeout or 3600
+        budget: float = timeout * len(self.cores) / len(tests)
+
+        self.runs: Dict[str, TestRun] = collections.OrderedDict(
+            (name, TestRun(name, budget)) for name in tests)
+        self.interval: int = config.SCHEDULER_INTERVAL
+        self.plateau_window: int = config.PLATEAU_WINDOW
+        self._stop_event = threading.Event()
+
+
+    def _launch(self, run: TestRun, core: int) -> None:
+        now: float = time.time()
+        run.core = core
+
+        # each test is tuned independently, starting from the calibrated timeout
+        options = WorkerOptions(self.options.dictionary, self.options.exec_timeout, self.options.tmpfs_size,
+            seed_dirs=self.options.seed_dirs)
+        if options.exec_timeout is not None:
+            run.tuner = ExecTimeout(options.exec_timeout)
+
+        run.worker = Worker(self.client, "{}_{}".format(self.job_name, run.name), self.ws, self.image,
+            options, test=run.name, cpuset=str(core))
+        run.worker.start()
+
+        run.status = "running"
+        run.started = run.last_progress = now
+        run.deadline = now + run.budget
+        LOGGER.info("Launched test `{}` on core {} with {}s budget.".format(run.name, core, int(run.budget)))
+
+
+    def _finish(self, run: TestRun, status: str) -> float:
+        """
+        Stops a running test, and returns its unspent budget.
+        """
+        now: float = time.time()
+        surplus: float = max(0.0, run.deadline - now)
+        run.worker.stop()
+
+        run.status = status
+        run.budget -= surplus
+        return surplus
+
+
+    def _redistribute(self, surplus: float) -> None:
+        """
+        Splits unspent budget from a stopped test evenly across tests still queued or running.
+        """
+        recipients: List[TestRun] = [r for r in self.runs.values() if r.status in ["pending", "running"]]
+        if surplus <= 0 or len(recipients) == 0:
+            return
+
+        share: float = surplus / len(recipients)
+        for run in recipients:
+            run.budget += share
+            if run.deadline is not None:
+                run.deadline += share
+        LOGGER.debug("Redistributed {}s across {} tests.".format(int(surplus), len(recipients)))
+
+
+    def _poll(self, run: TestRun) -> None:
+        now: float = time.time()
+
+        paths: int = stats.read_progress(run.worker.out_dir)
+        if paths > run.paths:
+            run.paths = paths
+            run.last_progress = now
+
+        if not run.worker.running:
+            self._redistribute(self._finish(run, "exited"))
+        elif now >= run.deadline:
+            self._finish(run, "done")
+        elif now - run.last_progress >= self.plateau_window:
+            LOGGER.info("Test `{}` plateaued at {} paths, reallocating budget.".format(run.name, run.paths))
+            self._redistribute(self._finish(run, "plateaued"))
+
+        # relaunch with a higher execution timeout if hangs are climbing
+        elif run.tuner is not None and run.tuner.update(stats.read_stats(run.worker.out_dir)):
+            run.worker.options.exec_timeout = run.tuner.value
+            self.record({"exec_timeout_{}".format(run.name): str(run.tuner.value)})
+            run.worker.restart()
+
+
+    def run(self) -> None:
+        pending = collections.deque(self.runs.values())
+        free = collections.deque(self.cores)
+
+        while not self._stop_event.is_set():
+            while len(pending) > 0 and len(free) > 0:
+                self._launch(pending.popleft(), free.popleft())
+
+            running: List[TestRun] = [r for r in self.runs.values() if r.status == "running"]
+            if len(running) == 0 and len(pending) == 0:
+                break
+
+            self._stop_event.wait(self.interval)
+            for run in running:
+                self._poll(run)
+                if run.status != "running":
+                    free.append(run.core)
+
+        for run in self.runs.values():
+            if run.status == "running":
+                self._finish(run, "stopped")
+
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return dict((name, run.to_dict()) for (name, run) in self.runs.items())
@@ -0,0 +1,122 @@
+"""
+stats.py
+
+    DESCRIPTION:
+        Helpers for parsing fuzzer statistics out of a worker's output directory on the
+        shared volume. AFL-style `fuzzer_stats` are parsed when available, with fallbacks
+        to counting entries in the output directory for other executors.
+
+        Statistics of every active job are periodically summed over its workers and recorded
+        together, such that totals over jobs can be aggregated in the store.
+"""
+import logging
+logging.basicConfig()
+
+import os
+import threading
+
+from server import config
+
+from typing import Dict, List, Callable, Any
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+# statistics summed over workers of a job when recorded
+SUMMED_STATS = ["execs_done", "execs_per_sec", "paths_total", "unique_crashes", "unique_hangs"]
+
+
+def read_stats(out_dir: str) -> Dict[str, str]:
+    """
+    Parses `key : value` pairs out of AFL-style `fuzzer_stats`, returning an empty dict if not available.
+
+    :param out_dir: output directory of a worker
+    """
+    stats: Dict[str, str] = dict()
+    stats_path: str = os.path.join(out_dir, "fuzzer_stats")
+    if not os.path.isfile(stats_path):
+        return stats
+
+    with open(stats_path, "r") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            stats[key.strip()] = value.strip()
+    return stats
+
+
+def read_progress(out_dir: str) -> int:
+    """
+    Returns the number of paths discovered by a fuzzer. Parses `paths_total` out of AFL-style
+    `fuzzer_stats` if available, and otherwise falls back to counting queue entries.
+
+    :param out_dir: output directory of a worker
+    """
+    stats: Dict[str, str] = read_stats(out_dir)
+    if "paths_total" in stats:
+        return int(stats["paths_total"])
+
+    queue_path: str = os.path.join(out_dir, "queue")
+    if os.path.isdir(queue_path):
+        return len(os.listdir(queue_path))
+    return 0
+
+
+class StatsRecorder(threading.Thread):
+    """
+    Background thread recording fuzzer statistics of every active job, summed over its workers.
+    """
+
+    def __init__(self, jobs: Callable[[], Dict[str, List[Any]]],
+                 record: Callable[[Dict[str, Dict[str, str]]], None]) -> None:
+        """
+        :param jobs: callback returning current workers of every active job, by name
+        :param record: callback that records statistics of many jobs at once
+        """
+        super().__init__(daemon=True)
+        self.jobs: Callable[[], Dict[str, List[Any]]] = jobs
+        self.record: Callable[[Dict[str, Dict[str, str]]], None] = record
+        self._stop_event = threading.Event()
+
+        # last statistics of every worker seen by job, since multiplexed tests come and go
+        self._seen: Dict[str, Dict[str, Dict[str, str]]] = dict()
+
+
+    def collect(self) -> Dict[str, Dict[str, str]]:
+        """
+        Sums statistics of every worker seen of each active job.
+        """
+        jobs: Dict[str, List[Any]] = self.jobs()
+
+        # statistics of jobs no longer active are already recorded, so workers seen of them are dropped
+        for job_name in set(self._seen.keys()) - set(jobs.keys()):
+            del self._seen[job_name]
+
+        totals: Dict[str, Dict[str, str]] = dict()
+        for (job_name, workers) in jobs.items():
+            seen: Dict[str, Dict[str, str]] = self._seen.setdefault(job_name, dict())
+            for worker in workers:
+                worker_stats: Dict[str, str] = read_stats(worker.out_dir)
+                if len(worker_stats) > 0:
+                    seen[worker.name] = worker_stats
+
+            total: Dict[str, str] = dict()
+            for key in SUMMED_STATS:
+                values: List[float] = [float(s[key]) for s in seen.values() if key in s]
+                if len(values) > 0:
+                    total[key] = str(round(sum(values), 2) if key == "execs_per_sec" else int(sum(values)))
+            if len(total) > 0:
+                totals[job_name] = total
+        return totals
+
+
+    def run(self) -> None:
+        while not self._stop_event.wait(config.STATS_INTERVAL):
+            try:
+                self.record(self.collect())
+            except Exception as e:
+                LOGGER.warning("Unable to record fuzzer statistics: {}".format(e))
+
+
+    def stop(self) -> None:
+        self._stop_event.set()
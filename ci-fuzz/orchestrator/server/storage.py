@@ -0,0 +1,313 @@
+"""
+storage.py
+
+    DESCRIPTION:
+        Storage layer for job info, fuzzer statistics, measured usage and crash buckets, kept in Redis.
+        Every client shares one connection pool, reads and writes spanning many keys are batched into a
+        single pipelined round trip, and aggregations across jobs (ie. total executions and unique
+        crashes of every job on a target) run server-side as Lua scripts rather than as a round trip per job.
+
+        A `memory://` URL selects an in-memory stand-in implementing the subset of Redis used here,
+        with the scripts implemented in Python, for running the orchestrator without a Redis server.
+
+    USAGE:
+        storage = Storage.from_url(config.REDIS_URL)
+        storage.record_job("ci_openssl", {"workspace": "openssl"})
+        totals = storage.target_totals("openssl")
+
+    KEYS:
+        job:<job>           hash of recorded job info, ie. `workspace` and `crash_buckets`
+        stats:<job>         hash of fuzzer statistics summed over workers of a job
+        usage:<workspace>   hash of peak memory and CPU of any worker of a workspace
+        target:<workspace>  set of jobs that fuzzed a workspace
+"""
+import json
+import threading
+
+from server import config
+from server import metrics
+
+from typing import Optional, List, Dict, Tuple, Callable, Any
+
+
+# keeps the highest peak memory (in bytes) and CPU (in cores) recorded for a workspace
+USAGE_MAX_SCRIPT = """
+local memory = tonumber(redis.call("HGET", KEYS[1], "peak_memory") or "0")
+local cpu = tonumber(redis.call("HGET", KEYS[1], "peak_cpu") or "0")
+redis.call("HSET", KEYS[1],
+    "peak_memory", string.format("%d", math.max(memory, tonumber(ARGV[1]))),
+    "peak_cpu", tostring(math.max(cpu, tonumber(ARGV[2]))))
+return 1
+"""
+
+# totals over every job of a target: number of jobs, executions, crashes reported by fuzzers, and
+# unique crash buckets across jobs (from cross-validation). Reads job keys derived from the target's
+# set, so requires a standalone (rather than clustered) server.
+TARGET_TOTALS_SCRIPT = """
+local jobs, execs, crashes, unique = 0, 0, 0, 0
+local seen = {}
+for _, job in ipairs(redis.call("SMEMBERS", KEYS[1])) do
+    jobs = jobs + 1
+    execs = execs + tonumber(redis.call("HGET", "stats:" .. job, "execs_done") or "0")
+    crashes = crashes + tonumber(redis.call("HGET", "stats:" .. job, "unique_crashes") or "0")
+
+    local buckets = redis.call("HGET", "job:" .. job, "crash_buckets")
+    if buckets then
+        for key, _ in pairs(cjson.decode(buckets)) do
+            if not seen[key] then
+                seen[key] = true
+                unique = unique + 1
+            end
+        end
+    end
+end
+return {jobs, execs, crashes, unique}
+"""
+
+
+class MemoryPipeline(object):
+    """
+    Queues commands against the in-memory stand-in, executing them together.
+    """
+
+    def __init__(self, store: "MemoryRedis") -> None:
+        self.store: "MemoryRedis" = store
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+
+    def __getattr__(self, name: str) -> Callable[..., "MemoryPipeline"]:
+        def queue(*args, **kwargs) -> "MemoryPipeline":
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+
+    def execute(self) -> List[Any]:
+        with self.store.lock:
+            results = [getattr(self.store, name)(*args, **kwargs) for (name, args, kwargs) in self._commands]
+        self._commands = []
+        return results
+
+
+class MemoryRedis(object):
+    """
+    In-memory stand-in for the subset of Redis commands used by the storage layer, with string values
+    as returned by a client decoding responses.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self._hashes: Dict[str, Dict[str, str]] = dict()
+        self._sets: Dict[str, set] = dict()
+
+
+    def hset(self, key: str, mapping: Dict[str, Any]) -> int:
+        with self.lock:
+            fields: Dict[str, str] = self._hashes.setdefault(key, dict())
+            added: int = len([field for field in mapping.keys() if field not in fields])
+            fields.update((field, str(value)) for (field, value) in mapping.items())
+            return added
+
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        with self.lock:
+            return self._hashes.get(key, dict()).get(field)
+
+
+    def hmget(self, key: str, *fields: str) -> List[Optional[str]]:
+        with self.lock:
+            return [self._hashes.get(key, dict()).get(field) for field in fields]
+
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        with self.lock:
+            return dict(self._hashes.get(key, dict()))
+
+
+    def sadd(self, key: str, *members: str) -> int:
+        with self.lock:
+            values: set = self._sets.setdefault(key, set())
+            added: int = len([member for member in members if member not in values])
+            values.update(members)
+            return added
+
+
+    def smembers(self, key: str) -> set:
+        with self.lock:
+            return set(self._sets.get(key, set()))
+
+
+    def pipeline(self, transaction: bool = True) -> MemoryPipeline:
+        return MemoryPipeline(self)
+
+
+def _usage_max_local(store: MemoryRedis, keys: List[str], args: List[Any]) -> int:
+    with store.lock:
+        memory, cpu = store.hmget(keys[0], "peak_memory", "peak_cpu")
+        store.hset(keys[0], mapping={
+            "peak_memory": str(max(int(memory or 0), int(args[0]))),
+            "peak_cpu": str(max(float(cpu or 0), float(args[1])))
+        })
+    return 1
+
+
+def _target_totals_local(store: MemoryRedis, keys: List[str], args: List[Any]) -> List[int]:
+    jobs, execs, crashes = 0, 0, 0
+    seen: set = set()
+    with store.lock:
+        for job in store.smembers(keys[0]):
+            jobs += 1
+            execs += int(store.hget("stats:{}".format(job), "execs_done") or 0)
+            crashes += int(store.hget("stats:{}".format(job), "unique_crashes") or 0)
+
+            buckets: Optional[str] = store.hget("job:{}".format(job), "crash_buckets")
+            if buckets:
+                seen.update(json.loads(buckets).keys())
+    return [jobs, execs, crashes, len(seen)]
+
+
+# scripts by name, as Lua for Redis and the equivalent for the in-memory stand-in
+SCRIPTS = dict({
+    "usage_max": (USAGE_MAX_SCRIPT, _usage_max_local),
+    "target_totals": (TARGET_TOTALS_SCRIPT, _target_totals_local),
+})
+
+
+class Storage(object):
+    """
+    Reads and writes orchestrator state in Redis (or the in-memory stand-in), over a shared connection pool.
+    """
+
+    def __init__(self, client) -> None:
+        """
+        :param client: Redis client (or in-memory stand-in), which decodes responses to strings
+        """
+        self.client = client
+        self._scripts: Dict[str, Callable[..., Any]] = dict()
+        for (name, (lua, local)) in SCRIPTS.items():
+            if isinstance(client, MemoryRedis):
+                self._scripts[name] = lambda keys, args, local=local: local(client, keys, args)
+            else:
+                self._scripts[name] = client.register_script(lua)
+
+
+    @classmethod
+    def from_url(cls, url: str) -> "Storage":
+        """
+        Connects to Redis at a URL (ie. `redis://redis:6379/0`) with a pool shared by every thread,
+        or to an in-memory stand-in with `memory://`.
+        """
+        if url.startswith("memory://"):
+            return cls(MemoryRedis())
+
+        import redis
+        pool = redis.ConnectionPool.from_url(url, max_connections=config.REDIS_POOL_SIZE, decode_responses=True)
+        return cls(redis.Redis(connection_pool=pool))
+
+
+    def _pipeline(self):
+        # commands are batched for a single round trip, and need not be atomic
+        return self.client.pipeline(transaction=False)
+
+
+    def record_job(self, job_name: str, fields: Dict[str, str]) -> None:
+        """
+        Records fields to the info of a job, indexing it under its target if recording its workspace.
+        """
+        with metrics.timer("redis_pipeline"):
+            pipe = self._pipeline()
+            pipe.hset("job:{}".format(job_name), mapping=fields)
+            if "workspace" in fields:
+                pipe.sadd("target:{}".format(fields["workspace"]), job_name)
+            pipe.execute()
+
+
+    def job_info(self, job_names: List[str]) -> List[Dict[str, str]]:
+        """
+        Retrieves recorded info of many jobs in a single round trip.
+        """
+        with metrics.timer("redis_pipeline"):
+            pipe = self._pipeline()
+            for job_name in job_names:
+                pipe.hgetall("job:{}".format(job_name))
+            return pipe.execute()
+
+
+    def job_fields(self, job_names: List[str], fields: List[str]) -> List[Dict[str, Optional[str]]]:
+        """
+        Retrieves selected fields of recorded info of many jobs in a single round trip.
+        """
+        if len(job_names) == 0 or len(fields) == 0:
+            return [dict() for _ in job_names]
+
+        with metrics.timer("redis_pipeline"):
+            pipe = self._pipeline()
+            for job_name in job_names:
+                pipe.hmget("job:{}".format(job_name), *fields)
+            return [dict(zip(fields, values)) for values in pipe.execute()]
+
+
+    def job_field(self, job_name: str, field: str) -> Optional[str]:
+        with metrics.timer("redis_hget"):
+            return self.client.hget("job:{}".format(job_name), field)
+
+
+    def record_stats(self, stats: Dict[str, Dict[str, str]]) -> None:
+        """
+        Records fuzzer statistics of many jobs in a single round trip.
+
+        :param stats: statistics summed over workers, by job
+        """
+        if len(stats) == 0:
+            return
+
+        with metrics.timer("redis_pipeline"):
+            pipe = self._pipeline()
+            for (job_name, fields) in stats.items():
+                pipe.hset("stats:{}".format(job_name), mapping=fields)
+            pipe.execute()
+
+
+    def job_stats(self, job_names: List[str]) -> List[Dict[str, str]]:
+        """
+        Retrieves recorded fuzzer statistics of many jobs in a single round trip.
+        """
+        with metrics.timer("redis_pipeline"):
+            pipe = self._pipeline()
+            for job_name in job_names:
+                pipe.hgetall("stats:{}".format(job_name))
+            return pipe.execute()
+
+
+    def record_usage(self, ws_name: str, memory: int, cpu: float) -> None:
+        """
+        Records peak memory (in bytes) and CPU (in cores) of a workspace's workers, atomically keeping
+        the highest peaks across runs.
+        """
+        with metrics.timer("redis_script"):
+            self._scripts["usage_max"](keys=["usage:{}".format(ws_name)], args=[int(memory), float(cpu)])
+
+
+    def usages(self, ws_names: List[str]) -> List[Dict[str, str]]:
+        """
+        Retrieves peak usage of many workspaces in a single round trip.
+        """
+        with metrics.timer("redis_pipeline"):
+            pipe = self._pipeline()
+            for ws_name in ws_names:
+                pipe.hgetall("usage:{}".format(ws_name))
+            return pipe.execute()
+
+
+    def target_totals(self, ws_name: str) -> Dict[str, int]:
+        """
+        Aggregates totals over every job that fuzzed a workspace, in a single server-side script.
+        """
+        with metrics.timer("redis_script"):
+            jobs, execs, crashes, buckets = self._scripts["target_totals"](keys=["target:{}".format(ws_name)], args=[])
+        return dict({
+            "jobs": int(jobs),
+            "execs_done": int(execs),
+            "unique_crashes": int(crashes),
+            "crash_buckets": int(buckets)
+        })
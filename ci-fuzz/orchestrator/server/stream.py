@@ -0,0 +1,173 @@
+"""
+stream.py
+
+    DESCRIPTION:
+        Streams container log lines, fuzzer statistics deltas and new crashes or hangs of many jobs
+        over a single connection as server-sent events. A thread per worker follows its container logs,
+        statistics are diffed against the last ones sent on an interval, and new artifacts are reported
+        by the artifact watcher, such that clients no longer have to poll the orchestrator and Docker daemon.
+        Workers of the followed jobs are looked up again on every statistics interval, such that tests
+        multiplexed later and relaunched workers are followed as well.
+
+    USAGE:
+        stream = JobStream(lambda: {"ci_openssl": [worker]}, watcher)
+        return flask.Response(stream.events(), mimetype="text/event-stream")
+"""
+import logging
+logging.basicConfig()
+
+import os
+import json
+import time
+import queue
+import threading
+
+from server import config
+from server import stats
+from server.watcher import ArtifactWatcher
+
+from typing import List, Dict, Iterator, Callable, Any
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+def format_event(event: str, data: Dict[str, Any]) -> str:
+    return "event: {}\ndata: {}\n\n".format(event, json.dumps(data))
+
+
+class JobStream(object):
+    """
+    Multiplexes logs and statistics of every worker of many jobs into one stream of events.
+    """
+
+    def __init__(self, jobs: Callable[[], Dict[str, List[Any]]], watcher: ArtifactWatcher) -> None:
+        """
+        :param jobs: callback returning a mapping of followed job names to their current workers
+        :param watcher: watcher reporting new files in output directories
+        """
+        self.jobs: Callable[[], Dict[str, List[Any]]] = jobs
+        self.watcher: ArtifactWatcher = watcher
+        self.interval: int = config.STREAM_INTERVAL
+
+        self._events = queue.Queue()
+        self._stop_event = threading.Event()
+        self._log_streams = []
+
+        # workers currently followed and their watcher subscriptions, by worker name
+        self._followed: Dict[str, Any] = dict()
+        self._tokens: Dict[str, int] = dict()
+
+
+    def _follow_logs(self, job_name: str, worker) -> None:
+        """
+        Follows container logs of a worker, following the new container if the worker is relaunched,
+        for as long as the worker is the one followed under its name.
+        """
+        since: int = int(time.time())
+        container = None
+        while not self._stop_event.is_set() and self._followed.get(worker.name) is worker:
+
+            # wait out a relaunch, however long it takes, before following the new container
+            current = worker.container
+            if current is None or (current is container and not worker.running):
+                self._stop_event.wait(self.interval)
+                continue
+            container = current
+
+            try:
+                logs = container.logs(stream=True, follow=True, since=since)
+                self._log_streams.append(logs)
+                for line in logs:
+                    if self._stop_event.is_set():
+                        break
+                    self._events.put(("log", {
+                        "job": job_name,
+                        "worker": worker.name,
+                        "line": line.decode("utf-8", "replace").rstrip("\n")
+                    }))
+            except Exception as e:
+                LOGGER.debug("Log stream for `{}` ended: {}".format(worker.name, e))
+
+            # follow on from the end of the stream, in the same container if it is still running
+            since = int(time.time())
+            self._stop_event.wait(self.interval)
+
+
+    def _attach(self) -> Dict[str, List[Any]]:
+        """
+        Looks up the current workers of followed jobs, following logs and artifacts of those not yet followed.
+        """
+        jobs: Dict[str, List[Any]] = self.jobs()
+        for (job_name, workers) in jobs.items():
+            for worker in workers:
+                if self._followed.get(worker.name) is worker:
+                    continue
+
+                # a new worker, or a worker object replacing one of the same name
+                self._followed[worker.name] = worker
+                if worker.name in self._tokens:
+                    self.watcher.unsubscribe(self._tokens[worker.name])
+                self._tokens[worker.name] = self.watcher.subscribe(worker.out_dir,
+                    lambda path, job_name=job_name, worker=worker: self._on_artifact(job_name, worker, path))
+                threading.Thread(target=self._follow_logs, args=(job_name, worker), daemon=True).start()
+        return jobs
+
+
+    def _on_artifact(self, job_name: str, worker, path: str) -> None:
+        """
+        Queues an event for a new crash or hang of a worker, called by the watcher.
+        """
+        kind: str = os.path.basename(os.path.dirname(path))
+        if kind in ["crashes", "hangs"] and not os.path.basename(path).startswith("README"):
+            self._events.put(("artifact", {
+                "job": job_name,
+                "worker": worker.name,
+                "kind": kind,
+                "name": os.path.basename(path)
+            }))
+
+
+    def _stats_deltas(self, jobs: Dict[str, List[Any]], last: Dict[str, Dict[str, str]]) -> Iterator[str]:
+        for (job_name, workers) in jobs.items():
+            for worker in workers:
+                current: Dict[str, str] = stats.read_stats(worker.out_dir)
+                previous: Dict[str, str] = last.get(worker.name, dict())
+                delta = dict((k, v) for (k, v) in current.items() if previous.get(k) != v)
+                last[worker.name] = current
+                if len(delta) > 0:
+                    yield format_event("stats", {"job": job_name, "worker": worker.name, "delta": delta})
+
+
+    def events(self) -> Iterator[str]:
+        """
+        Generator of server-sent events, until the client disconnects.
+        """
+        last_stats: Dict[str, Dict[str, str]] = dict()
+        next_stats: float = 0.0
+        try:
+            while True:
+                now: float = time.time()
+                if now >= next_stats:
+                    next_stats = now + self.interval
+                    jobs: Dict[str, List[Any]] = self._attach()
+                    for event in self._stats_deltas(jobs, last_stats):
+                        yield event
+
+                    # keep-alive comment, which also detects disconnected clients
+                    yield ": keepalive\n\n"
+
+                try:
+                    event, data = self._events.get(timeout=max(0.0, next_stats - time.time()))
+                    yield format_event(event, data)
+                except queue.Empty:
+                    pass
+        finally:
+            self._stop_event.set()
+            for token in self._tokens.values():
+                self.watcher.unsubscribe(token)
+            for logs in self._log_streams:
+                try:
+                    logs.close()
+                except Exception:
+                    pass
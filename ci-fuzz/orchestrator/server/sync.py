@@ -0,0 +1,170 @@
+"""
+sync.py
+
+    DESCRIPTION:
+        Receiving end of the delta sync protocol, for uploading workspaces from a remote
+        `fuzzbed-cli` that does not share the testbed volume. Files are split into chunks
+        by the client, and identified by hash:
+
+            1. the client sends every chunk hash of the workspace, and the server replies with
+               those missing from its chunk cache
+            2. the client uploads only the missing chunks, framed as a 32-byte SHA-256, a 4-byte
+               big-endian length and the chunk data
+            3. the client commits a manifest of paths to chunk hashes, and the server rewrites
+               only the files whose chunks changed since the last commit
+
+        The chunk cache is a content-addressed store, so chunks are shared between workspaces.
+
+    USAGE:
+        missing = chunks.missing(parse_chunks(flask.request.get_json(silent=True)))
+        receive_chunks(chunks, flask.request.stream)
+        commit(chunks, ws_path, parse_manifest(flask.request.get_json(silent=True)))
+"""
+import logging
+logging.basicConfig()
+
+import os
+import json
+import struct
+import hashlib
+
+from server.corpus import CorpusStore
+
+from typing import List, Dict, Any, IO
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+# name of file in workspace tracking its last committed manifest
+STATE_NAME = ".fuzzbed_sync.json"
+
+FRAME_HEADER = struct.Struct(">32sI")
+
+
+class SyncError(Exception):
+    pass
+
+
+def _is_digest(value: Any) -> bool:
+    return isinstance(value, str) and len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+
+def parse_chunks(payload: Any) -> List[str]:
+    """
+    Validates a request for missing chunks, as `{"chunks": [hash, ...]}`, returning its hashes.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("chunks"), list):
+        raise SyncError("expected `{\"chunks\": [...]}`")
+    if not all(_is_digest(digest) for digest in payload["chunks"]):
+        raise SyncError("chunks must be hex-encoded SHA-256 hashes")
+    return payload["chunks"]
+
+
+def parse_manifest(payload: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Validates a commit request, as `{"files": {path: {"mode": int, "chunks": [hash, ...]}}}`, returning its manifest.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("files"), dict):
+        raise SyncError("expected `{\"files\": {...}}`")
+
+    for (rel_path, entry) in payload["files"].items():
+        if not isinstance(entry, dict) or not isinstance(entry.get("chunks"), list) \
+                or not all(_is_digest(digest) for digest in entry["chunks"]):
+            raise SyncError("invalid manifest entry for `{}`".format(rel_path))
+        if not isinstance(entry.get("mode", 0o644), int) or isinstance(entry.get("mode"), bool):
+            raise SyncError("invalid mode for `{}`".format(rel_path))
+    return payload["files"]
+
+
+def _read_exact(stream: IO[bytes], size: int) -> bytes:
+    data: bytes = b""
+    while len(data) < size:
+        block: bytes = stream.read(size - len(data))
+        if not block:
+            break
+        data += block
+    return data
+
+
+def receive_chunks(chunks: CorpusStore, stream: IO[bytes], batch: int = 256) -> int:
+    """
+    Reads framed chunks from a stream, verifies them against their hashes, and stores them.
+    Returns number of chunks received.
+
+    :param chunks: chunk cache
+    :param stream: readable stream of framed chunks
+    """
+    count: int = 0
+    blobs: List[bytes] = []
+    while True:
+        header: bytes = _read_exact(stream, FRAME_HEADER.size)
+        if len(header) == 0:
+            break
+        elif len(header) < FRAME_HEADER.size:
+            raise SyncError("truncated chunk header")
+
+        digest, length = FRAME_HEADER.unpack(header)
+        data: bytes = _read_exact(stream, length)
+        if len(data) < length or hashlib.sha256(data).digest() != digest:
+            raise SyncError("chunk `{}` does not match its hash".format(digest.hex()))
+
+        blobs.append(data)
+        if len(blobs) >= batch:
+            count += len(chunks.put_many(blobs))
+            blobs = []
+
+    return count + len(chunks.put_many(blobs))
+
+
+def commit(chunks: CorpusStore, ws_path: str, manifest: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Reconstructs a workspace from a manifest of paths to chunk hashes. Only files whose chunks or mode
+    changed since the previous commit are rewritten, and files tracked by the previous commit but not
+    in the manifest are removed. Returns counts of written, unchanged and removed files.
+
+    :param chunks: chunk cache
+    :param ws_path: path to workspace in testbed
+    :param manifest: mapping of relative paths to `{"mode": int, "chunks": [hash, ...]}`
+    """
+    missing: List[str] = chunks.missing(sorted(set(c for entry in manifest.values() for c in entry["chunks"])))
+    if len(missing) > 0:
+        raise SyncError("{} chunks missing, upload them before committing".format(len(missing)))
+
+    state_path: str = os.path.join(ws_path, STATE_NAME)
+    previous: Dict[str, Dict[str, Any]] = dict()
+    if os.path.isfile(state_path):
+        with open(state_path, "r") as f:
+            previous = json.load(f)
+
+    counts: Dict[str, int] = dict({"written": 0, "unchanged": 0, "removed": 0})
+    root: str = os.path.realpath(ws_path)
+    for (rel_path, entry) in manifest.items():
+        path: str = os.path.realpath(os.path.join(ws_path, rel_path))
+        if not path.startswith(root + os.sep):
+            raise SyncError("invalid path `{}` in manifest".format(rel_path))
+
+        if previous.get(rel_path) == entry and os.path.isfile(path):
+            counts["unchanged"] += 1
+            continue
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path: str = path + ".sync"
+        with open(tmp_path, "wb") as f:
+            for digest in entry["chunks"]:
+                f.write(chunks.get(digest))
+        os.chmod(tmp_path, entry.get("mode", 0o644) & 0o777)
+        os.replace(tmp_path, path)
+        counts["written"] += 1
+
+    for rel_path in set(previous.keys()) - set(manifest.keys()):
+        path = os.path.join(ws_path, rel_path)
+        if os.path.isfile(path):
+            os.remove(path)
+            counts["removed"] += 1
+
+    with open(state_path, "w") as f:
+        json.dump(manifest, f)
+
+    LOGGER.info("Synced `{}`: {}.".format(ws_path, counts))
+    return counts
@@ -0,0 +1,103 @@
+"""
+usage.py
+
+    DESCRIPTION:
+        Samples the memory and CPU usage of a job's worker containers from the Docker engine during
+        its run, tracking the peak of each. Peaks are recorded per workspace, such that later
+        deployments (ie. rendered Kubernetes Jobs) can be sized from measured usage.
+
+    USAGE:
+        monitor = UsageMonitor(lambda: workers, alive, record)
+        monitor.start()
+"""
+import logging
+logging.basicConfig()
+
+import os
+import threading
+
+from server import config
+from server import metrics
+
+from typing import Optional, List, Tuple, Callable, Any
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+@metrics.timed("container_stats")
+def sample(container) -> Optional[Tuple[int, float]]:
+    """
+    Returns the memory (in bytes) and CPU (in cores) used by a container, or None if unavailable.
+    Memory prefers the cgroup's high watermark (cgroup v1), falling back to current usage.
+
+    :param container: running container to sample
+    """
+    try:
+        stats = container.stats(stream=False)
+    except Exception as e:
+        LOGGER.debug("Unable to sample usage of `{}`: {}".format(container.name, e))
+        return None
+
+    memory_stats = stats.get("memory_stats", {})
+    memory: int = memory_stats.get("max_usage", memory_stats.get("usage", 0))
+
+    cpu, precpu = stats.get("cpu_stats", {}), stats.get("precpu_stats", {})
+    cpu_delta: int = cpu.get("cpu_usage", {}).get("total_usage", 0) - precpu.get("cpu_usage", {}).get("total_usage", 0)
+    system_delta: int = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    online: int = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or [None])
+
+    cores: float = 0.0
+    if cpu_delta > 0 and system_delta > 0:
+        cores = cpu_delta / float(system_delta) * online
+    return (memory, cores)
+
+
+class UsageMonitor(threading.Thread):
+    """
+    Background thread tracking peak memory and CPU of any single worker of a job.
+    """
+
+    def __init__(self, workers: Callable[[], List[Any]], alive: Callable[[], bool],
+                 record: Callable[[int, float], None]) -> None:
+        """
+        :param workers: callback returning current workers of job
+        :param alive: callback returning whether job is still running
+        :param record: callback that records peak memory (in bytes) and CPU (in cores)
+        """
+        super().__init__(daemon=True)
+        self.workers: Callable[[], List[Any]] = workers
+        self.alive: Callable[[], bool] = alive
+        self.record: Callable[[int, float], None] = record
+
+        self.peak_memory: int = 0
+        self.peak_cpu: float = 0.0
+        self._stop_event = threading.Event()
+
+
+    def run(self) -> None:
+        while not self._stop_event.wait(config.USAGE_INTERVAL):
+            if not self.alive():
+                break
+
+            changed: bool = False
+            for worker in self.workers():
+                if worker.container is None:
+                    continue
+
+                usage = sample(worker.container)
+                if usage is None:
+                    continue
+
+                memory, cpu = usage
+                if memory > self.peak_memory or cpu > self.peak_cpu:
+                    self.peak_memory = max(self.peak_memory, memory)
+                    self.peak_cpu = max(self.peak_cpu, cpu)
+                    changed = True
+
+            if changed:
+                self.record(self.peak_memory, self.peak_cpu)
+
+
+    def stop(self) -> None:
+        self._stop_event.set()
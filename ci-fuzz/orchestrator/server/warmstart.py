@@ -0,0 +1,302 @@
+"""
+warmstart.py
+
+    DESCRIPTION:
+        Keeps a best corpus per target (a workspace harness, or a single test of it when multiplexed) in
+        the corpus store: the minimized union of the queues of every past job on it. New jobs are seeded
+        from it along with the workspace's own seeds, such that campaigns start where the last one left
+        off rather than rediscovering shallow paths. Once a job finishes, its queues are merged in.
+
+        Best corpora are recorded with the hash of the harness binary they were minimized against. If
+        the harness changes, a stale corpus is re-minimized against the new binary before it is used.
+        Minimization uses `afl-cmin` against the AFL build of the harness when compiled into the image,
+        and otherwise falls back to keeping the smallest unique inputs.
+
+    USAGE:
+        best = BestCorpus(client, corpus)
+        seed_dirs = best.seed(ws, image, "ci_openssl", targets=[None])
+        ...
+        best.merge(ws, image, {None: [os.path.join(worker.out_dir, "queue")]})
+        best.release(ws, "ci_openssl")
+"""
+import logging
+logging.basicConfig()
+
+import os
+import shutil
+import hashlib
+import threading
+
+from server import config
+from server import backend
+from server import metrics
+from server.workspace import Workspace
+from server.corpus import CorpusStore
+
+from typing import Optional, List, Dict, Callable, Any
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+# manifest in corpus store holding best corpora of a workspace, with a prefix per target
+MANIFEST_NAME = "best:{}"
+
+# prefix of best corpus for a workspace harness fuzzed as a whole, rather than a single test
+HARNESS_TARGET = "_harness"
+
+# minimizes a corpus by coverage against the AFL build of the harness
+CMIN_SCRIPT = """
+AFL_SKIP_BIN_CHECK=1 afl-cmin -i {IN} -o {OUT} -m none -t {TIMEOUT} -- {BINARY} --input_test_file @@ {ARGS} >/dev/null 2>&1
+"""
+
+
+def _prefix(test: Optional[str]) -> str:
+    return test or HARNESS_TARGET
+
+
+@metrics.timed("harness_hash")
+def harness_hash(client, ws: Workspace, image: str) -> str:
+    """
+    Hashes the harness binary compiled into the workspace image. Harnesses compiled by the executor at
+    launch have no binary yet, so their source, compiler arguments and executor are hashed instead.
+
+    :param client: Docker engine client
+    :param ws: workspace to hash harness of
+    :param image: tag of image built for workspace
+    """
+    if ws.prebuilt:
+        binary: str = backend.harness_binary(ws)
+        try:
+            output: bytes = client.containers.run(image, command=["sha256sum", binary], remove=True)
+            return output.decode("utf-8").split()[0]
+        except Exception as e:
+            LOGGER.warning("Unable to hash harness binary of `{}`, hashing its source: {}".format(ws.name, e))
+
+    digest = hashlib.sha256()
+    digest.update(ws.executor.encode("utf-8"))
+    digest.update(ws.get("compile", "compiler_args", "").encode("utf-8"))
+    if ws.harness is not None and os.path.isfile(os.path.join(ws.path, ws.harness)):
+        with open(os.path.join(ws.path, ws.harness), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class BestCorpus(object):
+    """
+    Best corpora of targets, kept in the corpus store.
+    """
+
+    def __init__(self, client, corpus: CorpusStore) -> None:
+        """
+        :param client: Docker engine client
+        :param corpus: corpus store to keep best corpora in
+        """
+        self.client = client
+        self.corpus: CorpusStore = corpus
+        self._lock = threading.Lock()
+
+
+    def _work_dir(self, ws: Workspace, name: str) -> str:
+        """
+        Directory on shared volume for materializing corpora, such that they are visible to containers.
+        """
+        return os.path.join(config.WARMSTART_DIR, ws.name, name)
+
+
+    def _minimize(self, ws: Workspace, image: str, test: Optional[str], in_dir: str, out_dir: str) -> None:
+        """
+        Minimizes a corpus into another directory, by coverage if an AFL build of the harness is in the
+        image, otherwise keeping the smallest inputs.
+        """
+        if ws.prebuilt and "afl" in ws.executors:
+            script: str = CMIN_SCRIPT \
+                .replace("{IN}", in_dir) \
+                .replace("{OUT}", out_dir) \
+                .replace("{TIMEOUT}", str(config.EXEC_TIMEOUT_MAX)) \
+                .replace("{BINARY}", os.path.join(ws.name, "{}.afl".format(backend.COMPILED_HARNESS))) \
+                .replace("{ARGS}", "--input_which_test {}".format(test) if test is not None else "")
+            try:
+                with metrics.timer("corpus_minimize"):
+                    self.client.containers.run(image, command=["sh", "-c", script], remove=True,
+                        volumes={config.TESTBED_VOLUME: {"bind": config.TESTBED, "mode": "rw"}})
+                if os.path.isdir(out_dir) and len(os.listdir(out_dir)) > 0:
+                    return
+            except Exception as e:
+                LOGGER.warning("Unable to minimize corpus of `{}`: {}".format(ws.name, e))
+
+        # inputs are already unique by content, so keep the smallest up to the cap
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir)
+        entries = sorted(os.scandir(in_dir), key=lambda entry: entry.stat().st_size)
+        for entry in entries[:config.WARMSTART_MAX_INPUTS]:
+            os.link(entry.path, os.path.join(out_dir, entry.name))
+
+
+    def _update(self, ws: Workspace, image: str, test: Optional[str], binary_hash: str, queues: List[str]) -> int:
+        """
+        Minimizes the union of a target's best corpus and queues, and records it as the new best corpus.
+        Returns number of inputs in it.
+        """
+        manifest: str = MANIFEST_NAME.format(ws.name)
+        prefix: str = _prefix(test)
+        work_dir: str = self._work_dir(ws, ".merge-{}".format(prefix))
+        in_dir, out_dir = os.path.join(work_dir, "in"), os.path.join(work_dir, "out")
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(in_dir)
+
+        # minimization writes its output as the image's user
+        os.chmod(work_dir, 0o777)
+
+        try:
+            # union is keyed by content, such that inputs found by many jobs are only minimized once
+            self.corpus.materialize(manifest, in_dir, prefix)
+            for queue in queues:
+                if not os.path.isdir(queue):
+                    continue
+                for entry in os.scandir(queue):
+                    if not entry.is_file() or entry.name.startswith(".") or entry.name.startswith("README"):
+                        continue
+                    with open(entry.path, "rb") as f:
+                        data: bytes = f.read()
+                    dest: str = os.path.join(in_dir, hashlib.sha256(data).hexdigest())
+                    if not os.path.exists(dest):
+                        with open(dest, "wb") as f:
+                            f.write(data)
+
+            if len(os.listdir(in_dir)) == 0:
+                return 0
+
+            self._minimize(ws, image, test, in_dir, out_dir)
+            files: Dict[str, bytes] = dict()
+            for entry in os.scandir(out_dir):
+                with open(entry.path, "rb") as f:
+                    data = f.read()
+                files[hashlib.sha256(data).hexdigest()] = data
+
+            count: int = self.corpus.replace(manifest, prefix, files)
+            self.corpus.set_meta(manifest, prefix, binary_hash)
+            return count
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+    def _seed_dir(self, ws: Workspace, job_name: str) -> str:
+        return self._work_dir(ws, os.path.join("seeds", job_name))
+
+
+    def seed(self, ws: Workspace, image: str, job_name: str, targets: List[Optional[str]]) -> Dict[Optional[str], str]:
+        """
+        Materializes seed directories of targets for a job, as the workspace's seeds along with their best
+        corpus. Each job gets its own directories, such that seeding a later job does not rewrite seeds
+        an earlier one is still reading. Stale best corpora are first re-minimized against the current
+        harness binary. Returns seed directories of targets with a best corpus, by test (or None for the harness).
+
+        :param ws: workspace of targets
+        :param image: tag of image built for workspace
+        :param job_name: name of job to seed
+        :param targets: tests to seed, or None for the harness
+        """
+        manifest: str = MANIFEST_NAME.format(ws.name)
+        binary_hash: Optional[str] = None
+        seed_dirs: Dict[Optional[str], str] = dict()
+        for test in targets:
+            prefix: str = _prefix(test)
+            recorded: Optional[str] = self.corpus.get_meta(manifest, prefix)
+            if recorded is None:
+                continue
+
+            with self._lock:
+                binary_hash = binary_hash or harness_hash(self.client, ws, image)
+                if recorded != binary_hash:
+                    LOGGER.info("Best corpus of `{}/{}` is stale, re-minimizing against current harness."
+                        .format(ws.name, prefix))
+                    self._update(ws, image, test, binary_hash, [])
+
+            seed_dir: str = os.path.join(self._seed_dir(ws, job_name), prefix)
+            shutil.rmtree(seed_dir, ignore_errors=True)
+            os.makedirs(seed_dir)
+
+            count: int = self.corpus.materialize(manifest, seed_dir, prefix)
+            ws_seeds: str = ws.test_dir("input_seeds", "in")
+            if os.path.isdir(ws_seeds):
+                for entry in os.scandir(ws_seeds):
+                    if entry.is_file() and not os.path.exists(os.path.join(seed_dir, entry.name)):
+                        shutil.copy(entry.path, os.path.join(seed_dir, entry.name))
+
+            LOGGER.info("Warm starting `{}/{}` from {} inputs of past campaigns.".format(ws.name, prefix, count))
+            seed_dirs[test] = seed_dir
+        return seed_dirs
+
+
+    def release(self, ws: Workspace, job_name: str) -> None:
+        """
+        Removes seed directories materialized for a job, once its workers no longer read them.
+        """
+        shutil.rmtree(self._seed_dir(ws, job_name), ignore_errors=True)
+
+
+    @metrics.timed("corpus_merge")
+    def merge(self, ws: Workspace, image: str, queues: Dict[Optional[str], List[str]]) -> None:
+        """
+        Merges queues of a finished job into the best corpora of its targets.
+
+        :param ws: workspace fuzzed by job
+        :param image: tag of image built for workspace
+        :param queues: queue directories of job, by test (or None for the harness)
+        """
+        with self._lock:
+            binary_hash: str = harness_hash(self.client, ws, image)
+            for (test, dirs) in queues.items():
+                count: int = self._update(ws, image, test, binary_hash, dirs)
+                LOGGER.info("Best corpus of `{}/{}` has {} inputs.".format(ws.name, _prefix(test), count))
+
+
+class CorpusHarvester(threading.Thread):
+    """
+    Background thread merging the queues of a job into best corpora once it finishes, and removing its seeds.
+    """
+
+    def __init__(self, best: BestCorpus, job_name: str, ws: Workspace, image: str, workers: Callable[[], List[Any]],
+                 alive: Callable[[], bool]) -> None:
+        """
+        :param best: best corpora to merge into
+        :param job_name: name of job seeded from best corpora
+        :param ws: workspace fuzzed by job
+        :param image: tag of image built for workspace
+        :param workers: callback returning current workers of job
+        :param alive: callback returning whether job is still running
+        """
+        super().__init__(daemon=True)
+        self.best: BestCorpus = best
+        self.job_name: str = job_name
+        self.ws: Workspace = ws
+        self.image: str = image
+        self.workers: Callable[[], List[Any]] = workers
+        self.alive: Callable[[], bool] = alive
+        self._stop_event = threading.Event()
+
+
+    def run(self) -> None:
+        queues: Dict[Optional[str], List[str]] = dict()
+        while not self._stop_event.wait(config.SCHEDULER_INTERVAL):
+
+            # workers of multiplexed tests come and go, so remember every one seen
+            for worker in self.workers():
+                dirs: List[str] = queues.setdefault(worker.test, [])
+                if os.path.join(worker.out_dir, "queue") not in dirs:
+                    dirs.append(os.path.join(worker.out_dir, "queue"))
+
+            if not self.alive():
+                break
+
+        if len(queues) > 0:
+            self.best.merge(self.ws, self.image, queues)
+        self.best.release(self.ws, self.job_name)
+
+
+    def stop(self) -> None:
+        """
+        Stops following the job, merging the queues seen so far.
+        """
+        self._stop_event.set()
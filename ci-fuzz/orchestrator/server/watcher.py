@@ -0,0 +1,345 @@
+"""
+watcher.py
+
+    DESCRIPTION:
+        Single service following the output trees of all active jobs for new files, and fanning them out
+        to in-process subscribers (ie. crash triage and log streaming), rather than each of them rescanning
+        output directories on the shared volume on a timer. Trees are followed with Linux inotify through
+        libc, recursively watching directories as fuzzers create them. Only when the watch limit is exhausted
+        (or inotify is unavailable) is a tree followed by incremental scans instead, which only list
+        directories changed since the last scan, and only report files changed since then.
+
+        Subscribers are called on the watcher thread with the path of each new file, at least once, and
+        should hand off any slow work.
+
+    USAGE:
+        watcher = ArtifactWatcher()
+        watcher.start()
+        token = watcher.subscribe("/tests/openssl/out", lambda path: ...)
+        watcher.unsubscribe(token)
+"""
+import logging
+logging.basicConfig()
+
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+
+from server import config
+
+from typing import Optional, List, Dict, Tuple, Callable
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+# inotify flags and event masks, from <sys/inotify.h>
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+# files are reported once written and closed, or moved into place, and directories once created
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_ONLYDIR
+
+# `struct inotify_event` header, followed by a null-padded name of `len` bytes
+EVENT_HEADER = struct.Struct("iIII")
+
+READ_SIZE = 64 * 1024
+
+
+def _load_libc():
+    """
+    Returns libc with inotify bindings, or None if unavailable (ie. not Linux).
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class ArtifactWatcher(threading.Thread):
+    """
+    Background thread following output trees for new files, with inotify or incremental scans.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(daemon=True)
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+
+        # subscribers by token, as the root they follow and their callback
+        self._subscribers: Dict[int, Tuple[str, Callable[[str], None]]] = dict()
+        self._next_token: int = 0
+
+        # roots followed, and how many subscribers follow each
+        self._roots: Dict[str, int] = dict()
+
+        # watched directories by watch descriptor, and vice versa
+        self._paths: Dict[int, str] = dict()
+        self._wds: Dict[str, int] = dict()
+
+        # roots followed by scans instead, the ctime bound of their last scan, and the subdirectories
+        # of each scanned directory, such that unchanged directories are not listed
+        self._scanned: Dict[str, float] = dict()
+        self._subdirs: Dict[str, List[str]] = dict()
+
+        # bound for rescanning trees after the event queue overflows
+        self._last_event: float = time.time()
+
+        self._libc = _load_libc()
+        self._fd: int = -1
+        if self._libc is not None:
+            self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if self._fd < 0:
+                LOGGER.warning("Unable to initialize inotify ({}), falling back to scanning output directories."
+                    .format(os.strerror(ctypes.get_errno())))
+
+
+    @property
+    def watches(self) -> int:
+        return len(self._wds)
+
+
+    def subscribe(self, root: str, callback: Callable[[str], None]) -> int:
+        """
+        Calls back with the path of every new file within a tree, until unsubscribed. Returns a token for unsubscribing.
+
+        :param root: directory to follow, which may not exist yet
+        :param callback: called with path of each new file
+        """
+        root = os.path.abspath(root)
+        with self._lock:
+            token: int = self._next_token
+            self._next_token += 1
+            self._subscribers[token] = (root, callback)
+
+            self._roots[root] = self._roots.get(root, 0) + 1
+            if self._roots[root] == 1:
+                self._follow(root)
+        return token
+
+
+    def unsubscribe(self, token: int) -> None:
+        """
+        Stops calling back a subscriber, and stops following its tree if no others follow it.
+        """
+        with self._lock:
+            if token not in self._subscribers:
+                return
+            root, _ = self._subscribers.pop(token)
+
+            self._roots[root] -= 1
+            if self._roots[root] > 0:
+                return
+            del self._roots[root]
+            self._scanned.pop(root, None)
+            for path in [p for p in self._subdirs.keys() if p == root or p.startswith(root + os.sep)]:
+                del self._subdirs[path]
+
+            for path in [p for p in self._wds.keys() if not self._relevant(p)]:
+                self._remove_watch(path)
+
+
+    def _within(self, path: str) -> bool:
+        """
+        Whether a path is within a followed root.
+        """
+        return any(path == root or path.startswith(root + os.sep) for root in self._roots.keys())
+
+
+    def _relevant(self, path: str) -> bool:
+        """
+        Whether a directory should be watched, ie. it is within a followed root, or is an ancestor of
+        one which does not exist yet.
+        """
+        return self._within(path) or any(root.startswith(path + os.sep) for root in self._roots.keys())
+
+
+    def _add_watch(self, path: str) -> bool:
+        """
+        Watches a single directory. Returns False if the watch limit is exhausted.
+        """
+        if path in self._wds:
+            return True
+
+        wd: int = self._libc.inotify_add_watch(self._fd, path.encode("utf-8"), WATCH_MASK)
+        if wd < 0:
+            err: int = ctypes.get_errno()
+            if err in [errno.ENOSPC, errno.ENOMEM]:
+                return False
+
+            # directory was removed or is not a directory, which is not a failure
+            LOGGER.debug("Unable to watch `{}`: {}".format(path, os.strerror(err)))
+            return True
+
+        self._wds[path] = wd
+        self._paths[wd] = path
+        return True
+
+
+    def _remove_watch(self, path: str) -> None:
+        wd: Optional[int] = self._wds.pop(path, None)
+        if wd is not None:
+            self._paths.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+
+    def _follow(self, root: str) -> None:
+        """
+        Starts following a root with inotify, or with scans if the watch limit is exhausted.
+        """
+        if self._fd < 0:
+            self._scanned[root] = time.time()
+            return
+
+        # a root that does not exist yet is picked up once its nearest existing ancestor creates it
+        ancestor: str = root
+        while not os.path.isdir(ancestor) and os.path.dirname(ancestor) != ancestor:
+            ancestor = os.path.dirname(ancestor)
+
+        if not self._watch_tree(ancestor, report=False):
+            self._fallback(root)
+
+
+    def _watch_tree(self, top: str, report: bool) -> bool:
+        """
+        Recursively watches relevant directories under a directory. Files already present are reported
+        if the directory was just created, since they may have been written before the watch was added.
+        Returns False if the watch limit is exhausted.
+        """
+        for (dirpath, dirnames, filenames) in os.walk(top):
+            dirnames[:] = [d for d in dirnames if self._relevant(os.path.join(dirpath, d))]
+            if not self._add_watch(dirpath):
+                return False
+
+            if report and self._within(dirpath):
+                for filename in filenames:
+                    self._dispatch(os.path.join(dirpath, filename))
+        return True
+
+
+    def _fallback(self, root: str) -> None:
+        """
+        Follows a root with scans, releasing its watches for other roots.
+        """
+        LOGGER.warning("inotify watch limit exhausted (see `fs.inotify.max_user_watches`), scanning `{}` instead."
+            .format(root))
+        self._scanned[root] = time.time()
+        for path in [p for p in self._wds.keys() if p == root or p.startswith(root + os.sep)]:
+            self._remove_watch(path)
+
+
+    def _dispatch(self, path: str) -> None:
+        for (root, callback) in list(self._subscribers.values()):
+            if path.startswith(root + os.sep):
+                try:
+                    callback(path)
+                except Exception as e:
+                    LOGGER.warning("Subscriber of `{}` failed on `{}`: {}".format(root, path, e))
+
+
+    def _scan(self, root: str, since: float) -> None:
+        """
+        Reports files within a tree changed after a bound, only listing directories changed after it.
+        Bounds are on ctime rather than mtime, since outputs flushed from tmpfs keep their original mtimes.
+        """
+        stack: List[str] = [root]
+        while len(stack) > 0:
+            path: str = stack.pop()
+            try:
+                changed: bool = os.stat(path).st_ctime >= since
+                if not changed and path in self._subdirs:
+                    stack.extend(self._subdirs[path])
+                    continue
+                entries = list(os.scandir(path))
+            except OSError:
+                self._subdirs.pop(path, None)
+                continue
+
+            self._subdirs[path] = [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+            stack.extend(self._subdirs[path])
+            for entry in entries:
+                if changed and entry.is_file(follow_symlinks=False) and entry.stat().st_ctime >= since:
+                    self._dispatch(entry.path)
+
+
+    def _read_events(self) -> None:
+        try:
+            buf: bytes = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+
+        offset: int = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buf, offset)
+            name: str = buf[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length] \
+                .rstrip(b"\0").decode("utf-8", "replace")
+            offset += EVENT_HEADER.size + length
+
+            with self._lock:
+                if mask & IN_Q_OVERFLOW:
+                    LOGGER.warning("inotify event queue overflowed, rescanning followed trees.")
+                    for root in [r for r in self._roots.keys() if r not in self._scanned]:
+                        self._scan(root, self._last_event)
+                    continue
+
+                parent: Optional[str] = self._paths.get(wd)
+                if parent is None:
+                    continue
+                elif mask & (IN_IGNORED | IN_DELETE_SELF):
+                    self._wds.pop(parent, None)
+                    self._paths.pop(wd, None)
+                    continue
+
+                path: str = os.path.join(parent, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and self._relevant(path):
+                        if not self._watch_tree(path, report=True):
+                            for root in [r for r in self._roots.keys() if r not in self._scanned and
+                                         (r.startswith(path + os.sep) or path.startswith(r + os.sep) or path == r)]:
+                                self._fallback(root)
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and self._within(path):
+                    self._dispatch(path)
+
+        self._last_event = time.time()
+
+
+    def run(self) -> None:
+        next_scan: float = time.time() + config.WATCH_SCAN_INTERVAL
+        while not self._stop_event.is_set():
+            if self._fd >= 0:
+                readable, _, _ = select.select([self._fd], [], [], 1.0)
+                if len(readable) > 0:
+                    self._read_events()
+            else:
+                self._stop_event.wait(1.0)
+
+            if time.time() < next_scan:
+                continue
+
+            next_scan = time.time() + config.WATCH_SCAN_INTERVAL
+            with self._lock:
+                for (root, since) in list(self._scanned.items()):
+                    bound: float = time.time()
+                    self._scan(root, since)
+                    self._scanned[root] = bound
+
+
+    def stop(self) -> None:
+        self._stop_event.set()
@@ -0,0 +1,182 @@
+"""
+worker.py
+
+    DESCRIPTION:
+        Lifecycle of a single worker container fuzzing a workspace (or one test of it), from
+        launch through relaunch and stop. Options chosen by pre-flight stages, such as the
+        dictionary and calibrated execution timeout, are passed to the executor as arguments.
+
+    USAGE:
+        worker = Worker(client, job_name, ws, image, WorkerOptions(dictionary=path))
+        worker.start()
+"""
+import logging
+logging.basicConfig()
+
+import os
+import time
+
+from server import config
+from server import backend
+from server import metrics
+from server.workspace import Workspace
+from server.flusher import OutputFlusher
+
+from typing import Optional, List, Dict
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(os.environ.get("FUZZBED_LOG", "INFO").upper())
+
+
+class WorkerOptions(object):
+    """
+    Options for workers of a job, determined before launch.
+    """
+
+    def __init__(self, dictionary: Optional[str] = None, exec_timeout: Optional[int] = None,
+                 tmpfs_size: Optional[str] = None, seed_dirs: Optional[Dict[Optional[str], str]] = None) -> None:
+        """
+        :param dictionary: optional path to dictionary on shared volume
+        :param exec_timeout: optional per-execution timeout in milliseconds
+        :param tmpfs_size: optional size of tmpfs for outputs, flushed to the shared volume
+        :param seed_dirs: optional seed directories overriding the workspace's, by test (or None for the harness)
+        """
+        self.dictionary: Optional[str] = dictionary
+        self.exec_timeout: Optional[int] = exec_timeout
+        self.tmpfs_size: Optional[str] = tmpfs_size
+        self.seed_dirs: Dict[Optional[str], str] = seed_dirs or dict()
+
+
+    def args(self) -> List[str]:
+        args: List[str] = []
+        if self.dictionary is not None:
+            args += ["--dictionary", self.dictionary]
+        if self.exec_timeout is not None:
+            args += ["--exec_timeout", str(self.exec_timeout)]
+        return args
+
+
+class Worker(object):
+    """
+    A Worker is a container fuzzing a workspace image, with outputs synced to the shared volume.
+    """
+
+    def __init__(self, client, name: str, ws: Workspace, image: str, options: WorkerOptions,
+                 test: Optional[str] = None, cpuset: Optional[str] = None,
+                 timeout: Optional[int] = None) -> None:
+        """
+        :param client: Docker engine client
+        :param name: name of worker container
+        :param ws: workspace being fuzzed
+        :param image: tag of image built for workspace
+        :param options: options for executor
+        :param test: optional single test to fuzz, for multiplexed jobs
+        :param cpuset: optional cores to pin container to
+        :param timeout: optional campaign duration enforced by the orchestrator if outputs are on tmpfs
+        """
+        self.client = client
+        self.name: str = name
+        self.ws: Workspace = ws
+        self.image: str = image
+        self.options: WorkerOptions = options
+        self.test: Optional[str] = test
+        self.cpuset: Optional[str] = cpuset
+        self.deadline: Optional[float] = None if not timeout else time.time() + timeout
+
+        self.container = None
+        self.flusher: Optional[OutputFlusher] = None
+
+
+    @property
+    def out_dir(self) -> str:
+        """
+        Output directory of worker on shared volume.
+        """
+        out_dir: str = self.ws.test_dir("output_test_dir", "out")
+        return out_dir if self.test is None else os.path.join(out_dir, self.test)
+
+
+    @property
+    def running(self) -> bool:
+        if self.container is None:
+            return False
+        try:
+            self.container.reload()
+        except Exception:
+            return False
+        return self.container.status == "running"
+
+
+    def command(self, resume: bool = False) -> Optional[List[str]]:
+        """
+        Executor command for worker, or None to run the image's default `CMD`.
+
+        :param resume: continue from the existing output directory rather than the seeds
+        """
+        out_dir: str = config.TMPFS_OUTPUT_DIR if self.options.tmpfs_size else self.out_dir
+        args: List[str] = self.options.args()
+
+        # AFL resumes in place from its output directory, otherwise reseed from the synced queue
+        if resume:
+            queue: str = os.path.join(self.out_dir, "queue")
+            if self.ws.executor == "afl" and not self.options.tmpfs_size:
+                args += ["--input_seeds", "-"]
+            elif os.path.isdir(queue):
+                args += ["--input_seeds", queue]
+        elif self.test in self.options.seed_dirs:
+            args += ["--input_seeds", self.options.seed_dirs[self.test]]
+
+        if self.test is not None:
+            command: List[str] = backend.harness_command(self.ws, out_dir, self.test, args)
+        elif self.ws.prebuilt or self.options.tmpfs_size or len(args) > 0:
+            command = backend.default_command(self.ws, out_dir, args)
+        else:
+            return None
+
+        # outputs on tmpfs are flushed once more after the fuzzer exits, before the container is stopped
+        if self.options.tmpfs_size:
+            return backend.hold_command(command)
+        return command
+
+
+    def start(self, resume: bool = False) -> None:
+        self.container = backend.run_worker(self.client, self.image, self.name,
+            command=self.command(resume),
+            cpuset=self.cpuset,
+            tmpfs_size=self.options.tmpfs_size)
+
+        # outputs on tmpfs are flushed, which also enforces the remaining timeout
+        if self.options.tmpfs_size:
+            remaining: Optional[int] = None
+            if self.deadline is not None:
+                remaining = max(1, int(self.deadline - time.time()))
+            self.flusher = OutputFlusher(self.container, config.TMPFS_OUTPUT_DIR, self.out_dir, timeout=remaining)
+            self.flusher.start()
+
+
+    def stop(self) -> None:
+        """
+        Stops worker, after its outputs are flushed.
+        """
+        if self.flusher is not None:
+            self.flusher.stop()
+            self.flusher = None
+
+        try:
+            self.container.stop()
+        except Exception as e:
+            LOGGER.debug("Unable to stop worker `{}`: {}".format(self.name, e))
+
+
+    @metrics.timed("restart_worker")
+    def restart(self) -> None:
+        """
+        Relaunches worker with its current options, resuming from its outputs.
+        """
+        LOGGER.info("Relaunching worker `{}`.".format(self.name))
+        self.stop()
+        try:
+            self.container.remove()
+        except Exception as e:
+            LOGGER.debug("Unable to remove worker `{}`: {}".format(self.name, e))
+        self.start(resume=True)
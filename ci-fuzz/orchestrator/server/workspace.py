@@ -0,0 +1,183 @@
+"""
+workspace.py
+
+    DESCRIPTION:
+        Parses a workspace from the shared testbed volume, exposing its manifest and
+        configuration to the orchestrator. DeepState is not required to be installed
+        alongside the orchestrator, so configurations are parsed with configparser.
+
+    USAGE:
+        ws = Workspace(config.TESTBED, "json")
+        tests = ws.enumerate_tests()
+"""
+import os
+import re
+import json
+import configparser
+
+from typing import Optional, List, Dict, Any
+
+
+# matches DeepState `TEST(Unit, Name)` declarations in a harness
+TEST_REGEX = re.compile(r"\bTEST\s*\(\s*(\w+)\s*,\s*(\w+)\s*\)")
+
+# matches both C and C++ style comments, in order to skip over commented out tests
+COMMENT_REGEX = re.compile(r"/\*.*?\*/|//[^\n]*", re.DOTALL)
+
+
+class WorkspaceError(Exception):
+    pass
+
+
+class Workspace(object):
+    """
+    A Workspace represents a single directory in the testbed with a configuration and harness(es).
+    """
+
+    def __init__(self, testbed: str, name: str, conf_name: str = "config.ini",
+                 executor: Optional[str] = None) -> None:
+        """
+        Initializes a workspace from the testbed path, parsing its configuration.
+
+        :param testbed: path to shared testbed volume
+        :param name: name of workspace directory in testbed
+        :param conf_name: name of configuration file in workspace
+        :param executor: optional executor to fuzz with other than the manifest's, which must be compiled into the image
+        """
+
+        self.name: str = name
+        self.path: str = os.path.join(testbed, name)
+        if not os.path.isdir(self.path):
+            raise WorkspaceError("workspace `{}` does not exist in testbed.".format(name))
+
+        self.conf_path: str = os.path.join(self.path, conf_name)
+        if not os.path.isfile(self.conf_path):
+            raise WorkspaceError("no configuration found for workspace `{}`.".format(name))
+
+        self.config = configparser.ConfigParser(interpolation=None)
+        self.config.read(self.conf_path)
+
+        if not self.config.has_section("manifest"):
+            raise WorkspaceError("No manifest section defined for workspace `{}`.".format(name))
+
+        self._executor: Optional[str] = None
+        if executor is not None and executor != self.executor:
+            if executor not in self.executors:
+                raise WorkspaceError("executor `{}` is not compiled into workspace `{}`.".format(executor, name))
+            self._executor = executor
+
+
+    def get(self, section: str, key: str, default: Optional[Any] = None) -> Any:
+        """
+        Helper that retrieves a raw configuration value, returning a default if not set.
+        """
+        if not self.config.has_option(section, key):
+            return default
+        return self.config.get(section, key)
+
+
+    def getboolean(self, section: str, key: str, default: bool = False) -> bool:
+        if not self.config.has_option(section, key):
+            return default
+        return self.config.getboolean(section, key)
+
+
+    @property
+    def manifest(self) -> Dict[str, str]:
+        return dict(self.config["manifest"])
+
+
+    @property
+    def executor(self) -> str:
+        return self._executor or self.manifest["executor"]
+
+
+    @property
+    def executors(self) -> List[str]:
+        """
+        Every executor the harness is compiled for in the workspace image, which any job can fuzz with.
+        """
+        executors: List[str] = [self.manifest["executor"]]
+        for executor in json.loads(self.get("manifest", "executors", "[]")):
+            if executor not in executors:
+                executors.append(executor)
+        return executors
+
+
+    @property
+    def user(self) -> str:
+        """
+        User in workspace image, whose home directory the workspace is copied to.
+        """
+        return self.get("manifest", "hostname", "fuzzer")
+
+
+    @property
+    def provision_steps(self) -> List[str]:
+        return json.loads(self.get("manifest", "provision_steps", "[]"))
+
+
+    @property
+    def harness(self) -> Optional[str]:
+        """
+        Name of harness to compile. Both `compile_test` and `compile_harness` are
+        used across the bundled suites, so either is accepted.
+        """
+        return self.get("compile", "compile_test", self.get("compile", "compile_harness"))
+
+
+    @property
+    def timeout(self) -> int:
+        return int(self.get("test", "timeout", 0) or 0)
+
+
+    @property
+    def compile_mode(self) -> str:
+        return self.get("manifest", "compile_mode", "fork")
+
+
+    @property
+    def prebuilt(self) -> bool:
+        """
+        Whether the harness is compiled into the image at build time, rather than by the executor.
+        """
+        return self.getboolean("manifest", "multiplex") or self.compile_mode == "persistent" \
+            or len(self.executors) > 1
+
+
+    @property
+    def sanitizer(self) -> Optional[str]:
+        """
+        Sanitizers a second build of the harness is compiled with (ie. `address,undefined`), for
+        cross-validating outputs of the fast build that is fuzzed. None if not declared.
+        """
+        return self.get("manifest", "sanitizer") or None
+
+
+    @property
+    def no_fork(self) -> bool:
+        """
+        Whether inputs are executed without forking, which is always the case for persistent harnesses.
+        """
+        return self.getboolean("test", "no_fork") or self.compile_mode == "persistent"
+
+
+    def test_dir(self, key: str, default: str) -> str:
+        """
+        Returns the absolute path to a `[test]` directory option in the workspace, ie. `input_seeds`.
+        """
+        return os.path.join(self.path, self.get("test", key, default))
+
+
+    def enumerate_tests(self) -> List[str]:
+        """
+        Parses out all `TEST()` units from the workspace harness, and returns their names as
+        DeepState expects them to be selected with `--which_test` (ie. `Unit_Name`).
+        """
+        if self.harness is None:
+            raise WorkspaceError("no harness to compile defined for workspace `{}`.".format(self.name))
+
+        with open(os.path.join(self.path, self.harness), "r") as f:
+            source: str = COMMENT_REGEX.sub("", f.read())
+
+        return ["{}_{}".format(unit, name) for (unit, name) in TEST_REGEX.findall(source)]
@@ -0,0 +1,55 @@
+"""
+conftest.py
+
+    DESCRIPTION:
+        Shared fixtures for orchestrator tests. Tests run against the `server` package in
+        this tree, with workspaces written to a temporary testbed rather than `$TESTBED`.
+
+    USAGE:
+        $ cd orchestrator && python -m pytest tests
+"""
+import os
+import sys
+import textwrap
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from server.workspace import Workspace
+
+
+HARNESS = """
+#include <deepstate/DeepState.hpp>
+
+TEST(Parser, Empty) {}
+TEST(Parser, Nested) {}
+// TEST(Parser, Disabled) {}
+"""
+
+
+@pytest.fixture
+def make_workspace(tmp_path):
+    """
+    Returns a factory writing a workspace with a manifest and harness to a temporary testbed.
+    """
+    def make(name="json", manifest="", test="", harness=HARNESS):
+        path = tmp_path / name
+        os.makedirs(str(path / "input"), exist_ok=True)
+        (path / "config.ini").write_text(textwrap.dedent("""
+            [manifest]
+            name = {name}
+            executor = afl
+            {manifest}
+
+            [compile]
+            compile_test = harness.cpp
+
+            [test]
+            input_seeds = input
+            output_test_dir = out
+            {test}
+        """).format(name=name, manifest=textwrap.dedent(manifest).strip(), test=textwrap.dedent(test).strip()))
+        (path / "harness.cpp").write_text(harness)
+        return Workspace(str(tmp_path), name)
+    return make
@@ -0,0 +1,97 @@
+"""
+test_artifacts.py
+
+    DESCRIPTION:
+        Tests for streaming artifact archives, including resuming from an offset and files changing
+        after the snapshot.
+"""
+import io
+import os
+import tarfile
+
+import pytest
+
+from server import artifacts
+from server.artifacts import ArtifactArchive, SnapshotStore
+
+
+def write_outputs(tmp_path):
+    out_dirs = dict()
+    for (worker, crashes) in [("w0", {"id:000000": b"a" * 700, "id:000001": b"b"}), ("w1", {"id:000000": b"b"})]:
+        os.makedirs(str(tmp_path / worker / "crashes"))
+        for (name, data) in crashes.items():
+            (tmp_path / worker / "crashes" / name).write_bytes(data)
+        out_dirs[worker] = str(tmp_path / worker)
+    return out_dirs
+
+
+def read_archive(data):
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r") as archive:
+        return dict((m.name, archive.extractfile(m).read()) for m in archive.getmembers())
+
+
+def test_stream_deduplicates(tmp_path):
+    archive = ArtifactArchive.snapshot(write_outputs(tmp_path), ["crashes"])
+    data = b"".join(archive.stream())
+    assert len(data) == archive.size
+    assert read_archive(data) == dict({
+        "w0/crashes/id:000000": b"a" * 700,
+        "w0/crashes/id:000001": b"b",
+    })
+
+
+def test_stream_resumes_from_offset(tmp_path):
+    out_dirs = write_outputs(tmp_path)
+    snapshots = SnapshotStore(str(tmp_path / "pulls"), ttl=60)
+    archive = ArtifactArchive.snapshot(out_dirs, ["crashes"])
+    token = snapshots.save("ci_json:crashes", archive)
+    data = b"".join(archive.stream())
+
+    # a flushed output keeping an mtime within the snapshot does not change the resumed layout
+    flushed = tmp_path / "w1" / "crashes" / "id:000001"
+    flushed.write_bytes(b"late")
+    os.utime(str(flushed), (archive.until - 1, archive.until - 1))
+
+    resumed = snapshots.load("ci_json:crashes", token)
+    assert resumed.size == archive.size
+    for offset in [1, 512, 700, len(data) - 1]:
+        assert data[:offset] + b"".join(resumed.stream(offset)) == data
+
+
+def test_snapshot_store_rejects_unknown(tmp_path):
+    snapshots = SnapshotStore(str(tmp_path / "pulls"), ttl=60)
+    token = snapshots.save("ci_json:crashes", ArtifactArchive.snapshot(write_outputs(tmp_path), ["crashes"]))
+
+    assert snapshots.load("ci_json:crashes,hangs,corpus", token) is None
+    assert snapshots.load("ci_json:crashes", "0" * 32) is None
+    assert snapshots.load("ci_json:crashes", "../../etc/passwd") is None
+
+    # expired snapshots are pruned when others are saved
+    path = os.path.join(snapshots.root, "{}.json".format(token))
+    os.utime(path, (0, 0))
+    snapshots.save("ci_xml:crashes", ArtifactArchive([], 0.0))
+    assert snapshots.load("ci_json:crashes", token) is None
+
+
+def test_stream_zero_fills_changed_files(tmp_path):
+    out_dirs = write_outputs(tmp_path)
+    archive = ArtifactArchive.snapshot(out_dirs, ["crashes"])
+
+    os.remove(str(tmp_path / "w0" / "crashes" / "id:000000"))
+    (tmp_path / "w0" / "crashes" / "id:000001").write_bytes(b"")
+
+    data = b"".join(archive.stream())
+    assert len(data) == archive.size
+    assert read_archive(data) == dict({
+        "w0/crashes/id:000000": bytes(700),
+        "w0/crashes/id:000001": bytes(1),
+    })
+
+
+def test_parse_range():
+    assert artifacts.parse_range(None) == 0
+    assert artifacts.parse_range("") == 0
+    assert artifacts.parse_range("bytes=1024-") == 1024
+    for header in ["bytes=abc-", "bytes=0-100", "bytes=-100", "items=10-", "bytes=1-,5-"]:
+        with pytest.raises(ValueError):
+            artifacts.parse_range(header)
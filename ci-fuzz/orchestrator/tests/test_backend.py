@@ -0,0 +1,65 @@
+"""
+test_backend.py
+
+    DESCRIPTION:
+        Tests for worker commands reconstructed from workspace configurations.
+"""
+import os
+
+from server import backend
+from server.workspace import Workspace
+
+
+def test_prebuilt_harness_forwards_test_options(make_workspace):
+    ws = make_workspace(manifest="compile_mode = persistent", test="""
+        timeout = 600
+        runtime_dir = runtime
+        no_fork = False
+        dictionary =
+        which_test = Parser_Empty
+    """)
+
+    command = backend.default_command(ws, "/fuzzbed/out", ["--exec_timeout", "40"])
+    assert command[:5] == ["deepstate-afl", "--input_seeds", "json/input", "--output_test_dir", "/fuzzbed/out"]
+    assert command[command.index("--timeout") + 1] == "600"
+    assert command[command.index("--runtime_dir") + 1] == "json/runtime"
+    assert command[command.index("--which_test") + 1] == "Parser_Empty"
+    assert command.count("--no_fork") == 1
+    assert "--dictionary" not in command
+
+    # job arguments come after, overriding configured ones
+    assert command.index("--exec_timeout") > command.index("--timeout")
+    assert command[-1] == "json/harness.afl"
+
+
+def test_multiplexed_test_is_bounded_by_scheduler(make_workspace):
+    ws = make_workspace(manifest="multiplex = True", test="timeout = 600\nwhich_test = Parser_Empty")
+    command = backend.harness_command(ws, "/out", "Parser_Nested")
+    assert "--timeout" not in command
+    assert command.count("--which_test") == 1
+    assert command[command.index("--which_test") + 1] == "Parser_Nested"
+
+
+def test_unbounded_timeout_is_not_forwarded(make_workspace):
+    ws = make_workspace(manifest="compile_mode = persistent", test="timeout = 0")
+    assert "--timeout" not in backend.default_command(ws, "/out")
+
+
+def test_default_command_uses_config(make_workspace):
+    ws = make_workspace(test="timeout = 600")
+    assert backend.default_command(ws, "/out", ["--dictionary", "d"]) == \
+        ["deepstate-afl", "--config", "config.ini", "--output_test_dir", "/out", "--dictionary", "d"]
+
+
+def test_binaries_written_by_frontends(make_workspace):
+    ws = make_workspace(manifest='executors = ["honggfuzz", "angora", "fuzzer"]')
+    testbed = os.path.dirname(ws.path)
+
+    assert backend.harness_command(ws, "/out")[-1] == "json/harness.afl"
+    assert backend.harness_command(Workspace(testbed, "json", executor="honggfuzz"), "/out")[-1] == "json/harness.hfuzz"
+    assert backend.harness_binary(Workspace(testbed, "json", executor="fuzzer")) == "json/harness.fuzzer"
+
+    # Angora fuzzes its fast build, given its taint tracking build by argument
+    command = backend.harness_command(Workspace(testbed, "json", executor="angora"), "/out")
+    assert command[0] == "deepstate-angora" and command[-1] == "json/harness.fast.angora"
+    assert command[command.index("--taint_binary") + 1] == "json/harness.taint.angora"
@@ -0,0 +1,109 @@
+"""
+test_calibrate.py
+
+    DESCRIPTION:
+        Tests for calibrating execution timeouts from seed timings, and re-tuning them from hang rates.
+"""
+from server import config
+from server import calibrate
+from server.calibrate import ExecTimeout
+
+
+class FakeClient(object):
+    """
+    Engine whose calibration container prints canned timings, in nanoseconds.
+    """
+
+    def __init__(self, output=b"", error=None):
+        self.output = output
+        self.error = error
+        self.scripts = []
+        self.containers = self
+
+    def run(self, image, command, **kwargs):
+        self.scripts.append(command[-1])
+        if self.error is not None:
+            raise self.error
+        return self.output
+
+
+def prebuilt_workspace(make_workspace, seeds=2):
+    ws = make_workspace(manifest="compile_mode = persistent")
+    for i in range(seeds):
+        with open(ws.test_dir("input_seeds", "in") + "/seed{}".format(i), "wb") as f:
+            f.write(b"x")
+    return ws
+
+
+def test_percentile():
+    samples = [float(ms) for ms in range(1, 101)]
+    assert calibrate.percentile(samples, 99) == 99.0
+    assert calibrate.percentile(samples, 50) == 50.0
+    assert calibrate.percentile(samples, 100) == 100.0
+    assert calibrate.percentile([3.0], 99) == 3.0
+    assert calibrate.percentile([5.0, 1.0], 0) == 1.0
+
+
+def test_calibrate_from_percentile(make_workspace):
+    ws = prebuilt_workspace(make_workspace)
+
+    # 99 seeds at 10ms and an outlier at 120ms, with an unparsable line
+    timings = ["10000000"] * 99 + ["120000000", "garbage"]
+    client = FakeClient("\n".join(timings).encode("utf-8"))
+    assert calibrate.calibrate(client, ws, "fuzzbed/json") == 10 * config.EXEC_TIMEOUT_MULTIPLIER
+    assert "--input_test_file" in client.scripts[0]
+
+
+def test_calibrate_clamped(make_workspace):
+    ws = prebuilt_workspace(make_workspace)
+    assert calibrate.calibrate(FakeClient(b"1000\n"), ws, "fuzzbed/json") == config.EXEC_TIMEOUT_MIN
+    assert calibrate.calibrate(FakeClient(b"60000000000\n"), ws, "fuzzbed/json") == config.EXEC_TIMEOUT_MAX
+
+
+def test_calibrate_skipped(make_workspace):
+    # executor compiles the harness itself, so there is no prebuilt binary to measure
+    client = FakeClient(b"1000000\n")
+    assert calibrate.calibrate(client, make_workspace(), "fuzzbed/json") is None
+    assert client.scripts == []
+
+    assert calibrate.calibrate(client, prebuilt_workspace(make_workspace, seeds=0), "fuzzbed/json") is None
+    assert calibrate.calibrate(FakeClient(b""), prebuilt_workspace(make_workspace), "fuzzbed/json") is None
+    assert calibrate.calibrate(FakeClient(error=RuntimeError("no engine")), prebuilt_workspace(make_workspace),
+        "fuzzbed/json") is None
+
+
+def test_retune_on_hang_rate():
+    tuner = ExecTimeout(100)
+    assert not tuner.update({"total_tmout": "0", "execs_done": "1000"})
+
+    # 1% of executions since last update timed out
+    assert not tuner.update({"total_tmout": "10", "execs_done": "2000"})
+    assert tuner.value == 100
+
+    # 20% timed out, so the timeout is raised and counters restart with the relaunched worker
+    assert tuner.update({"total_tmout": "210", "execs_done": "3000"})
+    assert tuner.value == 100 * config.EXEC_TIMEOUT_RETUNE_FACTOR
+    assert tuner.retunes == 1
+    assert not tuner.update({"total_tmout": "500", "execs_done": "3500"})
+
+
+def test_retune_from_total_hangs():
+    tuner = ExecTimeout(100)
+    assert not tuner.update({"total_hangs": "0", "execs_done": "1000"})
+    assert tuner.update({"total_hangs": "100", "execs_done": "2000"})
+    assert not ExecTimeout(100).update({"execs_done": "100"})
+
+    # unique hangs are not a rate of executions, so they never re-tune the timeout
+    tuner = ExecTimeout(100)
+    assert not tuner.update({"unique_hangs": "0", "paths_total": "100", "execs_done": "1000"})
+    assert not tuner.update({"unique_hangs": "10", "paths_total": "110", "execs_done": "1100"})
+
+
+def test_retune_capped():
+    tuner = ExecTimeout(config.EXEC_TIMEOUT_MAX // 2 + 1)
+    tuner.update({"total_tmout": "0", "execs_done": "100"})
+    assert tuner.update({"total_tmout": "100", "execs_done": "200"})
+    assert tuner.value == config.EXEC_TIMEOUT_MAX
+
+    tuner.update({"total_tmout": "100", "execs_done": "200"})
+    assert not tuner.update({"total_tmout": "200", "execs_done": "300"})
@@ -0,0 +1,148 @@
+"""
+test_corpus.py
+
+    DESCRIPTION:
+        Tests for the content-addressed corpus store, its manifests, views and tar import and export.
+"""
+import io
+import os
+import tarfile
+import hashlib
+
+import pytest
+
+from server import corpus
+from server.corpus import CorpusStore, CorpusError
+
+
+def make_tar(files):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as archive:
+        for (name, data) in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    buf.seek(0)
+    return buf
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CorpusStore(str(tmp_path / "corpus"))
+
+
+def test_put_deduplicates(store, tmp_path):
+    digests = store.put_many([b"seed", b"other", b"seed"])
+    assert digests[0] == digests[2] == hashlib.sha256(b"seed").hexdigest()
+    assert store.get(digests[1]) == b"other"
+
+    # overlapping inputs of another workspace are stored once
+    store.add("json", {"input/a": b"seed"})
+    store.add("xml", {"input/b": b"seed"})
+    assert store._db().execute("SELECT COUNT(*) FROM objects").fetchone()[0] == 2
+    assert store.missing([digests[0], "0" * 64]) == ["0" * 64]
+
+    with pytest.raises(CorpusError):
+        store.get("0" * 64)
+
+
+def test_segments_roll_over(store, monkeypatch):
+    monkeypatch.setattr(corpus, "SEGMENT_SIZE", 16)
+    blobs = [os.urandom(64) for _ in range(3)]
+    digests = store.put_many(blobs)
+
+    assert len(os.listdir(store.segment_dir)) == 3
+    assert [store.get(digest) for digest in digests] == blobs
+
+
+def test_manifest_prefix(store):
+    store.add("json", {"in_1/a": b"a", "inX1/b": b"b", "in_1/sub/c": b"c", "in_10/d": b"d"})
+    assert sorted(store.manifest("json", "in_1").keys()) == ["in_1/a", "in_1/sub/c"]
+    assert sorted(store.manifest("json", "in_1/").keys()) == ["in_1/a", "in_1/sub/c"]
+    assert len(store.manifest("json")) == 4
+    assert store.manifest("xml") == dict()
+
+
+def test_replace(store):
+    store.add("json", {"best/a": b"a", "best/b": b"b", "input/c": b"c"})
+    assert store.replace("json", "best", {"b": b"b", "d": b"d"}) == 2
+    assert sorted(store.manifest("json").keys()) == ["best/b", "best/d", "input/c"]
+
+
+def test_meta(store):
+    assert store.get_meta("json", "harness_hash") is None
+    store.set_meta("json", "harness_hash", "abc")
+    store.set_meta("json", "harness_hash", "def")
+    assert store.get_meta("json", "harness_hash") == "def"
+    assert store.get_meta("xml", "harness_hash") is None
+
+
+def test_materialize(store, tmp_path):
+    store.add("json", {"input/a": b"a", "input/sub/b": b"b", "other/c": b"c"})
+    dest = tmp_path / "view"
+    assert store.materialize("json", str(dest), "input") == 2
+    assert (dest / "a").read_bytes() == b"a"
+    assert (dest / "sub" / "b").read_bytes() == b"b"
+    assert not (dest / "c").exists()
+
+    # views are hardlinks into the object cache, which existing files are left in place of
+    assert os.stat(str(dest / "a")).st_ino == os.stat(store.extract(hashlib.sha256(b"a").hexdigest())).st_ino
+    (dest / "a").unlink()
+    (dest / "a").write_bytes(b"edited")
+    store.materialize("json", str(dest), "input")
+    assert (dest / "a").read_bytes() == b"edited"
+
+
+def test_evict_unlinked_objects(tmp_path):
+    store = CorpusStore(str(tmp_path / "corpus"), cache_size=2)
+    store.add("json", {"input/a": b"a", "input/b": b"b", "other/c": b"c", "other/d": b"d"})
+    paths = dict((name, store._object_path(hashlib.sha256(name.encode()).hexdigest())) for name in "abcd")
+
+    # objects linked into a view are kept regardless of the cap, and are read-only
+    view = tmp_path / "view"
+    store.materialize("json", str(view), "input")
+    for name in "cd":
+        store.extract(hashlib.sha256(name.encode()).hexdigest())
+    os.utime(paths["c"], (0, 0))
+    os.utime(paths["a"], (1, 1))
+    assert store.evict() == 0
+    assert not os.access(paths["a"], os.W_OK) or os.geteuid() == 0
+
+    # once a view is removed its objects only held by the cache are evicted, least recently extracted first
+    store.cache_size = 1
+    (view / "a").unlink()
+    assert store.evict() == 2
+    assert sorted(name for (name, path) in paths.items() if os.path.exists(path)) == ["b", "d"]
+
+    # and are extracted again on demand
+    assert store.materialize("json", str(tmp_path / "again"), "input") == 2
+    assert (tmp_path / "again" / "a").read_bytes() == b"a"
+
+
+def test_import_dir(store, tmp_path):
+    seeds = tmp_path / "seeds"
+    os.makedirs(str(seeds / "nested"))
+    (seeds / "a").write_bytes(b"a")
+    (seeds / "nested" / "b").write_bytes(b"b")
+    os.symlink(str(seeds / "a"), str(seeds / "link"))
+
+    assert store.import_dir("json", str(seeds), "input", batch=1) == 2
+    assert sorted(store.manifest("json", "input").keys()) == ["input/a", "input/nested/b"]
+
+
+def test_import_export_tar(store):
+    files = dict({"a": b"a", "nested/b": b"b" * 1000})
+    assert store.import_tar("json", make_tar(files), "input") == 2
+
+    out = io.BytesIO()
+    assert store.export_tar("json", out, "input") == 2
+    out.seek(0)
+    with tarfile.open(fileobj=out, mode="r") as archive:
+        assert dict((m.name, archive.extractfile(m).read()) for m in archive.getmembers()) == files
+
+
+def test_import_tar_rejects_escaping_paths(store):
+    with pytest.raises(CorpusError):
+        store.import_tar("json", make_tar({"../escape": b"x"}), "input")
+    with pytest.raises(CorpusError):
+        store.import_tar("json", make_tar({"/etc/passwd": b"x"}), "input")
@@ -0,0 +1,65 @@
+"""
+test_crossval.py
+
+    DESCRIPTION:
+        Tests for bucketing cross-validated outputs, with executions against the sanitizer build faked.
+"""
+import os
+
+from server import crossval
+from server.crossval import CrossValidator
+
+
+ASAN_REPORT = """
+==1==ERROR: AddressSanitizer: heap-buffer-overflow on address 0x602000000011
+    #0 0x4f2a1b in __asan_memcpy
+    #1 0x4f2a1c in Parser_Nested /harness.cpp:26:5
+"""
+
+
+def make_validator(ws, results):
+    validator = CrossValidator(None, None, "ci_json", ws, "fuzzbed/json", lambda: [], lambda: True, lambda fields: None)
+    validator._execute = lambda path, test: results[os.path.basename(path)]
+    return validator
+
+
+def write_output(tmp_path, worker, kind, name, data):
+    out_dir = tmp_path / "out" / worker / kind
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / name).write_bytes(data)
+    return str(out_dir / name)
+
+
+def test_signature():
+    assert crossval.signature(ASAN_REPORT, 1) == "AddressSanitizer:heap-buffer-overflow:Parser_Nested"
+    assert crossval.signature("harness.cpp:12:5: runtime error: signed integer overflow: 1 + 2", 1) \
+        == "UndefinedBehaviorSanitizer:signed integer overflow:harness.cpp:12"
+    assert crossval.signature("", 139) == "exit:139"
+    assert crossval.signature("", 124) is None
+    assert crossval.signature("", 0) is None
+
+
+def test_unreproduced_crashes_bucketed_by_content(make_workspace, tmp_path):
+    ws = make_workspace()
+    validator = make_validator(ws, dict({"id:000000,sig:06": ("", 0)}))
+
+    # the same AFL name across workers is a distinct crash for each, unless their contents match
+    validator._validate("crashes", write_output(tmp_path, "Parser_Empty", "crashes", "id:000000,sig:06", b"a"), "Parser_Empty")
+    validator._validate("crashes", write_output(tmp_path, "Parser_Nested", "crashes", "id:000000,sig:06", b"b"), "Parser_Nested")
+    validator._validate("crashes", write_output(tmp_path, "Parser_Other", "crashes", "id:000000,sig:06", b"b"), None)
+
+    assert len(validator.buckets) == 2
+    assert all(key.startswith("unreproduced:") for key in validator.buckets.keys())
+    assert sorted(bucket.count for bucket in validator.buckets.values()) == [1, 1]
+
+
+def test_sanitizer_failures_saved(make_workspace, tmp_path):
+    ws = make_workspace()
+    validator = make_validator(ws, dict({"id:000003": (ASAN_REPORT, 1), "id:000004": (ASAN_REPORT, 1)}))
+    validator._validate("queue", write_output(tmp_path, "w0", "queue", "id:000003", b"x"), None)
+    validator._validate("crashes", write_output(tmp_path, "w0", "crashes", "id:000004", b"y"), None)
+
+    (bucket,) = validator.buckets.values()
+    assert bucket.count == 2
+    assert bucket.found_by == {"fuzzer", "sanitizer"}
+    assert os.listdir(os.path.join(validator.out_dir, "crashes")) == ["{}_{}".format(bucket.key, "11f6ad8ec52a")]
@@ -0,0 +1,116 @@
+"""
+test_dictionary.py
+
+    DESCRIPTION:
+        Tests for extracting and caching fuzzing dictionaries, against a fake engine serving a harness binary.
+"""
+import io
+import os
+import tarfile
+
+import pytest
+
+from server import config
+from server import dictionary
+
+
+HARNESS = """
+#include <deepstate/DeepState.hpp>
+
+TEST(Parser, Magic) {
+    if (header == 0x1337beef && strcmp(key, "version") == 0) {}
+}
+"""
+
+
+class FakeClient(object):
+    """
+    Engine whose image holds a harness binary, counting containers created and run.
+    """
+
+    class Container(object):
+        def __init__(self, binary):
+            self.binary = binary
+
+        def get_archive(self, path):
+            buf = io.BytesIO()
+            with tarfile.open(fileobj=buf, mode="w") as archive:
+                info = tarfile.TarInfo(os.path.basename(path))
+                info.size = len(self.binary)
+                archive.addfile(info, io.BytesIO(self.binary))
+            return ([buf.getvalue()], dict())
+
+        def remove(self):
+            pass
+
+    def __init__(self, binary=b"\x7fELF\x00ParserMagicToken\x00"):
+        self.binary = binary
+        self.created = 0
+        self.runs = 0
+        self.containers = self
+
+    def create(self, image, command):
+        self.created += 1
+        return FakeClient.Container(self.binary)
+
+    def run(self, image, command, remove=False):
+        self.runs += 1
+        return b"  401000:\tcmpl   $0xdeadbeef,%eax\n"
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DICTIONARY_CACHE_DIR", str(tmp_path / "dicts"))
+
+
+def prebuilt_workspace(make_workspace, tmp_path):
+    ws = make_workspace(manifest="compile_mode = persistent", harness=HARNESS)
+    (tmp_path / "json" / "input" / "a").write_bytes(b"key=value")
+    return ws
+
+
+def test_extracts_tokens(make_workspace, tmp_path):
+    ws = prebuilt_workspace(make_workspace, tmp_path)
+    client = FakeClient()
+    with open(dictionary.build(client, ws, "fuzzbed/json"), "r") as f:
+        tokens = f.read()
+
+    assert '"version"' in tokens
+    assert '"\\xef\\xbe7\\x13"' in tokens
+    assert '"ParserMagicToken"' in tokens
+    assert '"\\xef\\xbe\\xad\\xde"' in tokens
+    assert client.runs == 1
+
+
+def test_cache_hit_skips_disassembly(make_workspace, tmp_path):
+    ws = prebuilt_workspace(make_workspace, tmp_path)
+    client = FakeClient()
+    path = dictionary.build(client, ws, "fuzzbed/json")
+
+    assert dictionary.build(client, ws, "fuzzbed/json") == path
+    assert client.runs == 1
+
+    # a rebuilt binary is a miss
+    assert dictionary.build(FakeClient(b"\x7fELF\x00OtherToken\x00"), ws, "fuzzbed/json") != path
+
+
+def test_cache_keyed_on_seeds(make_workspace, tmp_path):
+    ws = prebuilt_workspace(make_workspace, tmp_path)
+    client = FakeClient()
+    path = dictionary.build(client, ws, "fuzzbed/json")
+
+    (tmp_path / "json" / "input" / "b").write_bytes(b"other=value")
+    assert dictionary.build(client, ws, "fuzzbed/json") != path
+    assert client.runs == 2
+
+
+def test_source_only(make_workspace):
+    ws = make_workspace(harness=HARNESS)
+    client = FakeClient()
+    path = dictionary.build(client, ws, "fuzzbed/json")
+    assert client.created == 0 and client.runs == 0
+    assert dictionary.build(client, ws, "fuzzbed/json") == path
+
+
+def test_unsupported_or_disabled(make_workspace):
+    assert dictionary.build(FakeClient(), make_workspace(manifest="dictionary = false"), "fuzzbed/json") is None
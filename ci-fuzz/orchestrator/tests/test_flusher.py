@@ -0,0 +1,154 @@
+"""
+test_flusher.py
+
+    DESCRIPTION:
+        Tests for flushing tmpfs outputs, against a fake container archiving a local directory.
+"""
+import io
+import os
+import time
+import tarfile
+
+from server import backend
+from server.flusher import OutputFlusher
+
+
+class FakeContainer(object):
+    """
+    Container whose tmpfs is a local directory, archived as `tar` and the engine would.
+    """
+
+    def __init__(self, src, tar_exit_code=0):
+        self.src = src
+        self.status = "running"
+        self.tar_exit_code = tar_exit_code
+        self.exited = False
+        self.stopped = False
+
+    def reload(self):
+        pass
+
+    def _archive(self, arcname):
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w") as archive:
+            archive.add(self.src, arcname=arcname)
+        return buf.getvalue()
+
+    def exec_run(self, command, demux=False):
+        if command[0] == "test":
+            return (0 if self.exited and command[-1] == backend.EXITED_MARKER else 1, None)
+
+        assert demux
+        return (self.tar_exit_code, (self._archive("."), b"tar: ./queue: file changed as we read it\n"))
+
+    def get_archive(self, path):
+        assert path == "/fuzzbed/out"
+        return (iter([self._archive("out")]), dict())
+
+    def stop(self):
+        self.stopped = True
+        self.status = "exited"
+
+
+def write_outputs(src):
+    os.makedirs(os.path.join(src, "queue"))
+    with open(os.path.join(src, "queue", "id:000000"), "wb") as f:
+        f.write(b"input")
+    with open(os.path.join(src, ".cur_input"), "wb") as f:
+        f.write(b"skipped")
+
+
+def test_flush_keeps_stderr_out_of_archive(tmp_path):
+    src, dest = str(tmp_path / "tmpfs"), str(tmp_path / "out")
+    write_outputs(src)
+    flusher = OutputFlusher(FakeContainer(src), "/fuzzbed/out", dest)
+
+    assert flusher.flush() == 1
+    assert open(os.path.join(dest, "queue", "id:000000"), "rb").read() == b"input"
+    assert not os.path.exists(os.path.join(dest, ".cur_input"))
+
+
+def test_flush_tolerates_changed_files(tmp_path):
+    src, dest = str(tmp_path / "tmpfs"), str(tmp_path / "out")
+    write_outputs(src)
+    flusher = OutputFlusher(FakeContainer(src, tar_exit_code=1), "/fuzzbed/out", dest)
+    assert flusher.flush() == 1
+
+    flusher = OutputFlusher(FakeContainer(src, tar_exit_code=2), "/fuzzbed/out", str(tmp_path / "failed"))
+    assert flusher.flush() == 0
+    assert flusher.last_flush == 0
+
+
+def test_flush_skips_files_older_than_last_flush(tmp_path):
+    src, dest = str(tmp_path / "tmpfs"), str(tmp_path / "out")
+    write_outputs(src)
+    old = time.time() - 600
+    os.utime(os.path.join(src, "queue", "id:000000"), (old, old))
+
+    flusher = OutputFlusher(FakeContainer(src), "/fuzzbed/out", dest)
+    flusher.last_flush = int(time.time()) - 60
+    assert flusher.flush() == 0
+
+
+def test_flush_rejects_unsafe_members(tmp_path):
+    src, dest = str(tmp_path / "tmpfs"), str(tmp_path / "out")
+    write_outputs(src)
+    container = FakeContainer(src)
+
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as archive:
+        for name in ["../escape", "/tmp/absolute", "./queue/../../escape", "./queue/id:000001"]:
+            info = tarfile.TarInfo(name)
+            info.size = 1
+            info.mtime = int(time.time())
+            archive.addfile(info, io.BytesIO(b"x"))
+        link = tarfile.TarInfo("./queue/link")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "/etc/passwd"
+        archive.addfile(link)
+    container._archive = lambda arcname: buf.getvalue()
+
+    flusher = OutputFlusher(container, "/fuzzbed/out", dest)
+    assert flusher.flush() == 1
+    assert os.listdir(dest) == ["queue"] and os.listdir(os.path.join(dest, "queue")) == ["id:000001"]
+    assert not os.path.exists(str(tmp_path / "escape"))
+
+
+def test_final_flush_after_container_exits(tmp_path):
+    src, dest = str(tmp_path / "tmpfs"), str(tmp_path / "out")
+    write_outputs(src)
+    container = FakeContainer(src)
+    container.status = "exited"
+
+    flusher = OutputFlusher(container, "/fuzzbed/out", dest, interval=0)
+    flusher.run()
+    assert open(os.path.join(dest, "queue", "id:000000"), "rb").read() == b"input"
+    assert not container.stopped
+
+
+def test_worker_stopped_once_fuzzer_exits(tmp_path):
+    src, dest = str(tmp_path / "tmpfs"), str(tmp_path / "out")
+    write_outputs(src)
+    container = FakeContainer(src)
+    container.exited = True
+
+    flusher = OutputFlusher(container, "/fuzzbed/out", dest, interval=0)
+    flusher.run()
+    assert os.path.isfile(os.path.join(dest, "queue", "id:000000"))
+    assert container.stopped
+
+
+def test_hold_command():
+    command = backend.hold_command(["deepstate-afl", "--timeout", "60"])
+    assert command[:2] == ["sh", "-c"]
+    assert backend.EXITED_MARKER in command[2]
+    assert command[4:] == ["deepstate-afl", "--timeout", "60"]
+
+
+def test_worker_holds_tmpfs_outputs(make_workspace):
+    from server.worker import Worker, WorkerOptions
+
+    ws = make_workspace(test="timeout = 60")
+    command = Worker(None, "w", ws, "fuzzbed/json", WorkerOptions(tmpfs_size="256m")).command()
+    assert command[:2] == ["sh", "-c"] and command[4:7] == ["deepstate-afl", "--config", "config.ini"]
+    assert Worker(None, "w", ws, "fuzzbed/json", WorkerOptions()).command() is None
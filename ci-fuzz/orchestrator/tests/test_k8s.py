@@ -0,0 +1,110 @@
+"""
+test_k8s.py
+
+    DESCRIPTION:
+        Golden-file tests for rendered Kubernetes Jobs, and tests for sizing and validation. Goldens
+        are regenerated with `FUZZBED_UPDATE_GOLDEN=1`.
+"""
+import os
+
+import pytest
+
+from server import config
+from server import k8s
+
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+GIB = 1024 * 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def k8s_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TESTBED", str(tmp_path))
+    monkeypatch.setattr(config, "K8S_REGISTRY", "")
+
+
+def assert_golden(name, rendered, tmp_path):
+    # workspaces are written to a temporary testbed, rendered as if mounted at `/tests`
+    rendered = rendered.replace(str(tmp_path), "/tests")
+    path = os.path.join(GOLDEN_DIR, name)
+    if os.environ.get("FUZZBED_UPDATE_GOLDEN"):
+        with open(path, "w") as f:
+            f.write(rendered)
+
+    with open(path, "r") as f:
+        assert rendered == f.read()
+
+
+def test_render_single(make_workspace, tmp_path):
+    ws = make_workspace(name="ci_OpenSSL", manifest="compile_mode = persistent\nmemory = 3g", test="timeout = 7200")
+    rendered = k8s.render(ws, usage={"peak_memory": str(2 * GIB), "peak_cpu": "0.42"})
+    assert_golden("single.yml", rendered, tmp_path)
+
+
+def test_render_multiplexed(make_workspace, tmp_path):
+    ws = make_workspace(name="json", manifest="multiplex = True\ncores = 1", test="timeout = 600")
+    rendered = k8s.render(ws)
+    assert_golden("multiplexed.yml", rendered, tmp_path)
+
+
+def test_render_default(make_workspace, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "K8S_REGISTRY", "registry:5000/")
+    ws = make_workspace(name="json", test="timeout = 600")
+    rendered = k8s.render(ws, name="nightly-json")
+    assert_golden("default.yml", rendered, tmp_path)
+
+
+def test_multiplexed_budget_split_over_cores(make_workspace):
+    ws = make_workspace(manifest="multiplex = True\ncores = 1", test="timeout = 600")
+    documents = k8s.render(ws).split("---\n")
+    assert len(documents) == 2
+    assert all('"--timeout", "300"' in document for document in documents)
+
+    # without `cores`, every test fuzzes for the whole timeout
+    ws = make_workspace(name="all", manifest="multiplex = True", test="timeout = 600")
+    assert all('"--timeout", "600"' in document for document in k8s.render(ws).split("---\n"))
+
+
+def test_resources_limit_one_core(make_workspace):
+    ws = make_workspace(manifest="multiplex = True\ncores = 8")
+    resources = k8s.Resources(ws, {"peak_cpu": "3.5"})
+    assert (resources.cpu_request, resources.cpu_limit) == (1000, 1000)
+
+    resources = k8s.Resources(ws, {"peak_cpu": "0.01"})
+    assert (resources.cpu_request, resources.cpu_limit) == (config.K8S_MIN_CPU, 1000)
+
+
+def test_resources_memory_floor(make_workspace):
+    ws = make_workspace(manifest="memory = 4Gi")
+    assert k8s.Resources(ws, {"peak_memory": str(GIB)}).memory_limit == 4096
+    assert k8s.Resources(ws, {"peak_memory": str(8 * GIB)}).memory_limit == int(8192 * config.K8S_MEMORY_HEADROOM)
+    assert k8s.Resources(make_workspace(name="other")).memory_limit == config.K8S_DEFAULT_MEMORY
+
+
+def test_parse_size():
+    assert k8s.parse_size("512m") == 512
+    assert k8s.parse_size("2Gi") == 2048
+    assert k8s.parse_size("1536kb") == 2
+    with pytest.raises(k8s.RenderError):
+        k8s.parse_size("lots")
+
+
+def test_job_name():
+    assert k8s.job_name("ci_OpenSSL") == "fuzzbed-ci-openssl"
+    assert len(k8s.job_name("x" * 100)) == k8s.NAME_MAX_LENGTH
+
+    # names truncated to the same prefix stay distinct
+    names = [k8s._sanitize("fuzzbed-{}-Parser_{}".format("x" * 60, test)) for test in ["Empty", "Nested"]]
+    assert names[0] != names[1]
+    assert all(len(name) <= k8s.NAME_MAX_LENGTH and k8s.NAME_REGEX.match(name) for name in names)
+
+
+def test_render_rejects_invalid_values(make_workspace, monkeypatch):
+    ws = make_workspace()
+    with pytest.raises(k8s.RenderError, match="DNS-1123"):
+        k8s.render(ws, name="Not_Valid")
+
+    monkeypatch.setattr(config, "K8S_REGISTRY", "Registry With Spaces")
+    with pytest.raises(k8s.RenderError, match="image"):
+        k8s.render(ws)
@@ -0,0 +1,121 @@
+"""
+test_listing.py
+
+    DESCRIPTION:
+        Tests for paginated job listings, filters, projection and the compact encoding.
+"""
+import pytest
+
+from server import listing
+from server.listing import JobListing, ListingError
+
+
+# a page encoded compactly, as decoded by `fuzzbed_cli.compact` (see fuzzbed-cli/tests/test_compact.py)
+COMPACT_PAGE = (
+    b"FBC1\x00\x00\x00\x05\x00\x08Y2lfeG1s\x00\x02\x00\x04name\x00\rcrashes_found"
+    b"\x00\x00\x00\x02\x00\x07ci_json\x00\x012\x00\x06ci_xml\xff\xff"
+)
+
+
+def summaries():
+    jobs = dict()
+    for (name, workspace, executor, state) in [
+        ("ci_json", "json", "afl", "running"),
+        ("ci_xml", "xml", "afl", "exited"),
+        ("ci_yaml", "yaml", "honggfuzz", "running"),
+        ("ci_zlib", "zlib", "afl", "running"),
+        ("ci_avro", "avro", "libfuzzer", "removed"),
+    ]:
+        jobs[name] = dict({"name": name, "workspace": workspace, "executor": executor, "state": state})
+    return jobs
+
+
+class FakeClient(object):
+
+    class Container(object):
+        def __init__(self, name, status):
+            self.name = name
+            self.status = status
+
+    def __init__(self):
+        self.queries = 0
+        self.containers = self
+
+    def list(self, all=False):
+        self.queries += 1
+        return [FakeClient.Container("ci_json", "running")]
+
+
+def test_page_through_all_jobs():
+    query = JobListing(dict(), [], limit=2)
+    names, cursor = [], None
+    while True:
+        page, total, cursor = query.page(summaries(), cursor)
+        assert total == 5
+        names += [summary["name"] for summary in page]
+        if cursor is None:
+            break
+    assert names == sorted(summaries().keys())
+
+
+def test_page_filters():
+    query = JobListing(dict({"executor": ["afl"], "state": ["running", "exited"]}), [], limit=10)
+    page, total, cursor = query.page(summaries(), None)
+    assert [summary["name"] for summary in page] == ["ci_json", "ci_xml", "ci_zlib"]
+    assert total == 3
+    assert cursor is None
+
+
+def test_cursor_after_removed_job():
+    query = JobListing(dict(), [], limit=2)
+    _, _, cursor = query.page(summaries(), None)
+
+    # the last job of a page is gone by the time the next page is requested
+    jobs = summaries()
+    del jobs[listing.decode_cursor(cursor)]
+    page, total, _ = query.page(jobs, cursor)
+    assert [summary["name"] for summary in page] == ["ci_xml", "ci_yaml"]
+    assert total == 4
+
+
+def test_from_args():
+    query = JobListing.from_args(dict({"state": "running,exited", "fields": "name,crashes_found", "limit": "500"}), 100)
+    assert query.filters == dict({"state": ["running", "exited"]})
+    assert query.fields == ["name", "crashes_found"]
+    assert query.recorded_fields == ["crashes_found"]
+    assert query.limit == 100
+
+    assert JobListing.from_args(dict(), 100).fields == listing.DEFAULT_FIELDS
+    assert JobListing.from_args(dict({"limit": "0"}), 100).limit == 1
+
+
+def test_invalid_queries():
+    with pytest.raises(ListingError):
+        JobListing(dict({"name": ["ci_json"]}), [], limit=10)
+    with pytest.raises(ListingError):
+        JobListing.from_args(dict({"limit": "ten"}), 100)
+    with pytest.raises(ListingError):
+        JobListing(dict(), [], limit=10).page(summaries(), "not a cursor!")
+
+
+def test_project():
+    query = JobListing(dict(), ["name", "state", "crashes_found", "uptime"], limit=10)
+    assert query.project(summaries()["ci_json"], dict({"crashes_found": "2"})) == dict({
+        "name": "ci_json",
+        "state": "running",
+        "crashes_found": "2",
+        "uptime": None
+    })
+
+
+def test_encode_compact():
+    rows = [{"name": "ci_json", "crashes_found": "2"}, {"name": "ci_xml", "crashes_found": None}]
+    assert listing.encode_compact(["name", "crashes_found"], rows, 5, listing.encode_cursor("ci_xml")) == COMPACT_PAGE
+
+
+def test_container_states_cached():
+    client = FakeClient()
+    states = listing.ContainerStates(client, ttl=60)
+    assert states.get() == dict({"ci_json": "running"})
+    assert states.get() == dict({"ci_json": "running"})
+    assert client.queries == 1
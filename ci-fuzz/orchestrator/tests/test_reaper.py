@@ -0,0 +1,43 @@
+"""
+test_reaper.py
+
+    DESCRIPTION:
+        Tests for reaping jobs once they are settled for longer than the retention period.
+"""
+import time
+
+from server.reaper import JobReaper
+
+
+def test_reaps_after_retention():
+    jobs = dict({"ci_json": False, "ci_xml": True})
+    removed = dict()
+
+    def remove(job_name, since):
+        removed[job_name] = since
+        del jobs[job_name]
+
+    reaper = JobReaper(lambda: list(jobs.keys()), lambda name: jobs[name], remove, retention=60)
+    assert reaper.reap() == []
+    assert "ci_xml" in reaper._since and "ci_json" not in reaper._since
+
+    # settled for longer than the retention period
+    reaper._since["ci_xml"] -= 60
+    assert reaper.reap() == ["ci_xml"]
+    assert abs(removed["ci_xml"] - (time.time() - 60)) < 5
+    assert list(jobs.keys()) == ["ci_json"] and reaper._since == dict()
+
+
+def test_relaunched_job_kept():
+    jobs = dict({"ci_json": False})
+    reaper = JobReaper(lambda: list(jobs.keys()), lambda name: jobs[name], lambda name, since: None, retention=0)
+
+    # a job seen settled before is running again, ie. a relaunched worker, which restarts its retention period
+    reaper._since["ci_json"] = 0
+    assert reaper.reap() == []
+    assert reaper._since == dict()
+
+    # jobs removed by other means are forgotten
+    reaper._since["ci_xml"] = 0
+    reaper.reap()
+    assert "ci_xml" not in reaper._since
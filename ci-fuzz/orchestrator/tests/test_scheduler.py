@@ -0,0 +1,28 @@
+"""
+test_scheduler.py
+
+    DESCRIPTION:
+        Tests for launching multiplexed tests, without a Docker engine.
+"""
+from server import backend
+from server.worker import WorkerOptions
+from server import scheduler as sched
+
+
+def test_launch_seeds_each_test(make_workspace, monkeypatch):
+    commands = dict()
+    monkeypatch.setattr(backend, "run_worker", lambda client, image, name, command=None, **kwargs:
+        commands.__setitem__(name, command))
+
+    ws = make_workspace()
+    options = WorkerOptions(exec_timeout=100, seed_dirs={"Parser_Nested": "/tests/.fuzzbed/warm/json/seeds/job/Parser_Nested"})
+    scheduler = sched.TestScheduler(None, "job", ws, "fuzzbed/json", options, cores=2)
+    for (core, run) in enumerate(scheduler.runs.values()):
+        scheduler._launch(run, core)
+
+    # tests without a best corpus keep the workspace's seeds
+    assert commands["job_Parser_Empty"].count("--input_seeds") == 1
+    nested = commands["job_Parser_Nested"]
+    assert nested.count("--input_seeds") == 2
+    assert nested[nested.index("--input_seeds", 3) + 1] == "/tests/.fuzzbed/warm/json/seeds/job/Parser_Nested"
+    assert nested[nested.index("--exec_timeout") + 1] == "100"
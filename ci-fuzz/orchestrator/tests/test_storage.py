@@ -0,0 +1,178 @@
+"""
+test_storage.py
+
+    DESCRIPTION:
+        Tests the storage layer against the in-memory stand-in selected by `memory://`, and that its
+        scripts behave as their Lua counterparts run by Redis. Lua scripts are run under Lua 5.1 (as
+        embedded in Redis) through `lupa` if installed, against the stand-in's data.
+
+    USAGE:
+        $ cd orchestrator && python -m pytest tests/test_storage.py
+"""
+import json
+
+import pytest
+
+from server import storage as store
+from server.stats import StatsRecorder
+from server.storage import Storage, MemoryRedis
+
+
+class LuaRedis(object):
+    """
+    Stand-in running the storage layer's Lua scripts as Redis would, with `redis.call` and `cjson`
+    served from the in-memory stand-in.
+    """
+
+    def __init__(self):
+        lua51 = pytest.importorskip("lupa.lua51")
+        self.store = MemoryRedis()
+        self.lua = lua51.LuaRuntime()
+
+        commands = dict({
+            "HGET": lambda key, field: self.store.hget(key, field) or False,
+            "HSET": lambda key, *pairs: self.store.hset(key, mapping=dict(zip(pairs[::2], pairs[1::2]))),
+            "SMEMBERS": lambda key: self.lua.table_from(sorted(self.store.smembers(key))),
+        })
+        self.lua.globals().redis = self.lua.table_from({"call": lambda command, *args: commands[command](*args)})
+        self.lua.globals().cjson = self.lua.table_from({"decode": lambda value: self.lua.table_from(json.loads(value))})
+
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+
+    def register_script(self, lua):
+        script = self.lua.eval("function(KEYS, ARGV)\n{}\nend".format(lua))
+
+        # arguments are sent as strings, and Lua numbers are returned as integers
+        def run(keys, args):
+            result = script(self.lua.table_from(keys), self.lua.table_from([str(arg) for arg in args]))
+            if isinstance(result, (int, float)):
+                return int(result)
+            return [int(result[i]) for i in range(1, len(result) + 1)]
+        return run
+
+
+@pytest.fixture(params=["memory", "lua"])
+def storage(request):
+    if request.param == "memory":
+        return Storage.from_url("memory://")
+    return Storage(LuaRedis())
+
+
+def populate(storage):
+    storage.record_job("ci_json_1", {"workspace": "json", "crash_buckets": json.dumps({"asan:a": 1, "asan:b": 2})})
+    storage.record_job("ci_json_2", {"workspace": "json", "crash_buckets": json.dumps({"asan:b": 1, "ubsan:c": 1})})
+    storage.record_job("ci_json_3", {"workspace": "json"})
+    storage.record_job("ci_xml_1", {"workspace": "xml", "crash_buckets": json.dumps({"asan:d": 1})})
+    storage.record_stats(dict({
+        "ci_json_1": {"execs_done": "1000", "unique_crashes": "3"},
+        "ci_json_2": {"execs_done": "500", "unique_crashes": "1"},
+        "ci_xml_1": {"execs_done": "70", "unique_crashes": "9"},
+    }))
+
+
+def test_from_url_memory():
+    assert isinstance(Storage.from_url("memory://").client, MemoryRedis)
+
+
+def test_record_job_indexes_target(storage):
+    populate(storage)
+    assert storage.client.smembers("target:json") == {"ci_json_1", "ci_json_2", "ci_json_3"}
+
+    # recording fields without a workspace does not index the job again
+    storage.record_job("ci_json_1", {"exec_timeout": "50"})
+    assert storage.client.smembers("target:json") == {"ci_json_1", "ci_json_2", "ci_json_3"}
+    assert storage.job_info(["ci_json_1"])[0]["exec_timeout"] == "50"
+
+
+def test_job_info_and_fields(storage):
+    populate(storage)
+    infos = storage.job_info(["ci_xml_1", "missing"])
+    assert infos[0]["workspace"] == "xml"
+    assert infos[1] == dict()
+
+    assert storage.job_fields(["ci_json_3", "missing"], ["workspace", "crash_buckets"]) == [
+        {"workspace": "json", "crash_buckets": None},
+        {"workspace": None, "crash_buckets": None},
+    ]
+    assert storage.job_fields(["ci_json_3"], []) == [dict()]
+    assert storage.job_field("ci_xml_1", "workspace") == "xml"
+    assert storage.job_field("missing", "workspace") is None
+
+
+def test_job_stats(storage):
+    populate(storage)
+    assert storage.job_stats(["ci_json_2", "ci_json_3"]) == [
+        {"execs_done": "500", "unique_crashes": "1"},
+        dict(),
+    ]
+
+
+def test_stats_recorder_forgets_inactive_jobs(tmp_path):
+    class Worker(object):
+        def __init__(self, name, execs_done):
+            self.name = name
+            self.out_dir = str(tmp_path / name)
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "fuzzer_stats").write_text("execs_done : {}\n".format(execs_done))
+
+    storage = Storage.from_url("memory://")
+    jobs = dict({"ci_json": [Worker("ci_json_0", 10), Worker("ci_json_1", 5)], "ci_xml": [Worker("ci_xml", 7)]})
+    recorder = StatsRecorder(jobs=lambda: dict(jobs), record=storage.record_stats)
+
+    # multiplexed workers that are gone still count towards their job
+    storage.record_stats(recorder.collect())
+    jobs["ci_json"].pop()
+    assert recorder.collect()["ci_json"] == dict({"execs_done": "15"})
+
+    # a reaped job keeps its last recorded statistics
+    del jobs["ci_xml"]
+    assert "ci_xml" not in recorder.collect()
+    assert sorted(recorder._seen.keys()) == ["ci_json"]
+    assert storage.job_stats(["ci_xml"]) == [{"execs_done": "7"}]
+
+
+def test_record_usage_keeps_peaks(storage):
+    storage.record_usage("json", 1024, 0.5)
+    storage.record_usage("json", 4096, 0.25)
+    storage.record_usage("json", 2048, 1.5)
+
+    (json_usage, xml_usage) = storage.usages(["json", "xml"])
+    assert int(json_usage["peak_memory"]) == 4096
+    assert float(json_usage["peak_cpu"]) == 1.5
+    assert xml_usage == dict()
+
+
+def test_target_totals(storage):
+    populate(storage)
+    assert storage.target_totals("json") == dict({
+        "jobs": 3,
+        "execs_done": 1500,
+        "unique_crashes": 4,
+        "crash_buckets": 3
+    })
+    assert storage.target_totals("missing") == dict({
+        "jobs": 0,
+        "execs_done": 0,
+        "unique_crashes": 0,
+        "crash_buckets": 0
+    })
+
+
+def test_scripts_match_lua():
+    memory, lua = Storage.from_url("memory://"), Storage(LuaRedis())
+    assert set(store.SCRIPTS.keys()) == {"usage_max", "target_totals"}
+
+    for storage in [memory, lua]:
+        populate(storage)
+        for (peak_memory, peak_cpu) in [(3 << 30, 0.75), (1 << 20, 1.25), (2 << 30, 0.5)]:
+            storage.record_usage("json", peak_memory, peak_cpu)
+
+    for ws_name in ["json", "xml", "missing"]:
+        assert memory.target_totals(ws_name) == lua.target_totals(ws_name)
+
+    (memory_usage,), (lua_usage,) = memory.usages(["json"]), lua.usages(["json"])
+    assert int(memory_usage["peak_memory"]) == int(lua_usage["peak_memory"]) == 3 << 30
+    assert float(memory_usage["peak_cpu"]) == float(lua_usage["peak_cpu"]) == 1.25
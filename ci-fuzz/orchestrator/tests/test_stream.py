@@ -0,0 +1,108 @@
+"""
+test_stream.py
+
+    DESCRIPTION:
+        Tests for streaming job events, against fake workers whose containers stream canned log lines.
+"""
+import json
+import time
+
+from server.stream import JobStream
+
+
+class FakeContainer(object):
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def logs(self, stream=True, follow=True, since=None):
+        lines, self.lines = self.lines, []
+        return iter(lines)
+
+
+class FakeWorker(object):
+
+    def __init__(self, name, out_dir, container=None):
+        self.name = name
+        self.out_dir = out_dir
+        self.container = container
+
+    @property
+    def running(self):
+        return False
+
+
+class FakeWatcher(object):
+
+    def __init__(self):
+        self.subscribers = dict()
+        self._next_token = 0
+
+    def subscribe(self, root, callback):
+        self._next_token += 1
+        self.subscribers[self._next_token] = (root, callback)
+        return self._next_token
+
+    def unsubscribe(self, token):
+        self.subscribers.pop(token, None)
+
+
+def collect_logs(events, count, timeout=5.0):
+    """
+    Reads events until a number of log lines are streamed, or a timeout elapses.
+    """
+    lines = []
+    deadline = time.time() + timeout
+    while len(lines) < count and time.time() < deadline:
+        event = next(events)
+        if event.startswith("event: log"):
+            lines.append(json.loads(event.split("data: ", 1)[1])["line"])
+    return lines
+
+
+def make_stream(jobs, watcher):
+    stream = JobStream(jobs, watcher)
+    stream.interval = 0.01
+    return stream
+
+
+def test_follows_workers_launched_later(tmp_path):
+    watcher = FakeWatcher()
+    launched = dict({"ci_json": []})
+    events = make_stream(lambda: launched, watcher).events()
+
+    assert collect_logs(events, 1, timeout=0.1) == []
+    assert len(watcher.subscribers) == 0
+
+    # a multiplexed test launched after the stream started
+    launched["ci_json"].append(FakeWorker("ci_json_Parser_Empty", str(tmp_path), FakeContainer([b"started\n"])))
+    assert collect_logs(events, 1) == ["started"]
+    assert [root for (root, _) in watcher.subscribers.values()] == [str(tmp_path)]
+
+    events.close()
+    assert len(watcher.subscribers) == 0
+
+
+def test_follows_slow_relaunch(tmp_path):
+    worker = FakeWorker("ci_json", str(tmp_path), FakeContainer([b"first\n"]))
+    events = make_stream(lambda: {"ci_json": [worker]}, FakeWatcher()).events()
+    assert collect_logs(events, 1) == ["first"]
+
+    # relaunch outlasting several intervals, before the new container is swapped in
+    worker.container = None
+    time.sleep(0.1)
+    worker.container = FakeContainer([b"second\n"])
+    assert collect_logs(events, 1) == ["second"]
+    events.close()
+
+
+def test_follows_replaced_worker(tmp_path):
+    watcher = FakeWatcher()
+    current = dict({"ci_json": [FakeWorker("ci_json", str(tmp_path), FakeContainer([b"first\n"]))]})
+    events = make_stream(lambda: current, watcher).events()
+    assert collect_logs(events, 1) == ["first"]
+
+    current["ci_json"] = [FakeWorker("ci_json", str(tmp_path), FakeContainer([b"second\n"]))]
+    assert collect_logs(events, 1) == ["second"]
+    assert len(watcher.subscribers) == 1
+    events.close()
@@ -0,0 +1,104 @@
+"""
+test_sync.py
+
+    DESCRIPTION:
+        Tests for the receiving end of the delta sync protocol, with chunks framed as `fuzzbed-cli push` frames them.
+"""
+import io
+import os
+import stat
+import hashlib
+
+import pytest
+
+from server import sync
+from server.corpus import CorpusStore
+from server.sync import SyncError
+
+
+def frame(*blocks):
+    return io.BytesIO(b"".join(sync.FRAME_HEADER.pack(hashlib.sha256(block).digest(), len(block)) + block
+                               for block in blocks))
+
+
+def entry(*blocks, mode=0o644):
+    return dict({"mode": mode, "chunks": [hashlib.sha256(block).hexdigest() for block in blocks]})
+
+
+@pytest.fixture
+def chunks(tmp_path):
+    return CorpusStore(str(tmp_path / "chunks"))
+
+
+def test_receive_chunks(chunks):
+    assert sync.receive_chunks(chunks, frame(b"a", b"b", b"c"), batch=2) == 3
+    assert chunks.missing([hashlib.sha256(b).hexdigest() for b in [b"a", b"b", b"c", b"d"]]) \
+        == [hashlib.sha256(b"d").hexdigest()]
+    assert sync.receive_chunks(chunks, io.BytesIO(b"")) == 0
+
+
+def test_receive_rejects_corrupt_frames(chunks):
+    data = frame(b"chunk").getvalue()
+    with pytest.raises(SyncError):
+        sync.receive_chunks(chunks, io.BytesIO(data[:10]))
+    with pytest.raises(SyncError):
+        sync.receive_chunks(chunks, io.BytesIO(data[:-1]))
+    with pytest.raises(SyncError):
+        sync.receive_chunks(chunks, io.BytesIO(data[:-1] + b"X"))
+
+
+def test_commit_rewrites_changed_files(chunks, tmp_path):
+    ws_path = str(tmp_path / "json")
+    sync.receive_chunks(chunks, frame(b"[test]\n", b"int main", b"() {}", b"seed"))
+
+    manifest = dict({
+        "config.ini": entry(b"[test]\n"),
+        "harness.cpp": entry(b"int main", b"() {}"),
+        "input/seed": entry(b"seed", mode=0o755),
+    })
+    assert sync.commit(chunks, ws_path, manifest) == dict({"written": 3, "unchanged": 0, "removed": 0})
+    with open(os.path.join(ws_path, "harness.cpp"), "rb") as f:
+        assert f.read() == b"int main() {}"
+    assert stat.S_IMODE(os.stat(os.path.join(ws_path, "input", "seed")).st_mode) == 0o755
+
+    assert sync.commit(chunks, ws_path, manifest) == dict({"written": 0, "unchanged": 3, "removed": 0})
+
+    # edit the harness and drop the seed
+    sync.receive_chunks(chunks, frame(b"() { return 1; }"))
+    manifest["harness.cpp"] = entry(b"int main", b"() { return 1; }")
+    del manifest["input/seed"]
+    assert sync.commit(chunks, ws_path, manifest) == dict({"written": 1, "unchanged": 1, "removed": 1})
+    assert not os.path.exists(os.path.join(ws_path, "input", "seed"))
+
+    # files removed out of band are rewritten
+    os.remove(os.path.join(ws_path, "config.ini"))
+    assert sync.commit(chunks, ws_path, manifest)["written"] == 1
+
+
+def test_commit_requires_chunks(chunks, tmp_path):
+    with pytest.raises(SyncError):
+        sync.commit(chunks, str(tmp_path / "json"), dict({"harness.cpp": entry(b"never uploaded")}))
+
+
+def test_commit_rejects_escaping_paths(chunks, tmp_path):
+    sync.receive_chunks(chunks, frame(b"x"))
+    for rel_path in ["../escape", "/etc/escape", "input/../../escape"]:
+        with pytest.raises(SyncError):
+            sync.commit(chunks, str(tmp_path / "json"), dict({rel_path: entry(b"x")}))
+    assert not os.path.exists(str(tmp_path / "escape"))
+
+
+def test_parse_payloads():
+    digest = hashlib.sha256(b"x").hexdigest()
+    assert sync.parse_chunks(dict({"chunks": [digest]})) == [digest]
+    for payload in [None, [], dict(), dict({"chunks": "abc"}), dict({"chunks": ["abc"]}), dict({"chunks": [1]})]:
+        with pytest.raises(SyncError):
+            sync.parse_chunks(payload)
+
+    manifest = dict({"harness.cpp": entry(b"x"), "input/seed": dict({"chunks": []})})
+    assert sync.parse_manifest(dict({"files": manifest})) == manifest
+    for payload in [None, dict(), dict({"files": []}), dict({"files": {"a": []}}),
+                    dict({"files": {"a": {"mode": 0o644}}}), dict({"files": {"a": {"chunks": ["x"]}}}),
+                    dict({"files": {"a": {"chunks": [], "mode": "rwx"}}})]:
+        with pytest.raises(SyncError):
+            sync.parse_manifest(payload)
@@ -0,0 +1,87 @@
+"""
+test_warmstart.py
+
+    DESCRIPTION:
+        Tests for best corpora of targets, minimized without a Docker engine (by keeping the smallest inputs).
+"""
+import os
+
+import pytest
+
+from server import config
+from server.corpus import CorpusStore
+from server.warmstart import BestCorpus, MANIFEST_NAME, HARNESS_TARGET, harness_hash
+
+
+@pytest.fixture
+def best(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "WARMSTART_DIR", str(tmp_path / "warm"))
+    return BestCorpus(None, CorpusStore(str(tmp_path / "corpus")))
+
+
+def write_queue(path, inputs):
+    os.makedirs(str(path), exist_ok=True)
+    for (name, data) in inputs.items():
+        (path / name).write_bytes(data)
+    return str(path)
+
+
+def test_merge_unions_queues_by_content(best, make_workspace, tmp_path):
+    ws = make_workspace()
+    best.merge(ws, "fuzzbed/json", {None: [
+        write_queue(tmp_path / "a", {"id:000000": b"{}", "id:000001": b"[1]", "README.txt": b"skipped"}),
+        write_queue(tmp_path / "b", {"id:000000": b"[1]", ".state": b"skipped"}),
+    ]})
+
+    files = best.corpus.manifest(MANIFEST_NAME.format(ws.name), HARNESS_TARGET)
+    assert len(files) == 2
+    assert best.corpus.get_meta(MANIFEST_NAME.format(ws.name), HARNESS_TARGET) == harness_hash(None, ws, "fuzzbed/json")
+
+
+def test_merge_caps_to_smallest_inputs(best, make_workspace, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "WARMSTART_MAX_INPUTS", 2)
+    ws = make_workspace()
+    best.merge(ws, "fuzzbed/json", {"Parser_Empty": [
+        write_queue(tmp_path / "q", {"a": b"x" * 30, "b": b"x", "c": b"x" * 10, "d": b"x" * 20})]})
+
+    manifest = MANIFEST_NAME.format(ws.name)
+    assert sorted(best.corpus.get(h) for h in best.corpus.manifest(manifest, "Parser_Empty").values()) == [b"x", b"x" * 10]
+
+
+def test_seed_per_job_with_workspace_seeds(best, make_workspace, tmp_path):
+    ws = make_workspace()
+    (tmp_path / "json" / "input" / "seed").write_bytes(b"seed")
+    best.merge(ws, "fuzzbed/json", {None: [write_queue(tmp_path / "q", {"id:000000": b"found"})]})
+
+    first = best.seed(ws, "fuzzbed/json", "job_a", [None, "Parser_Nested"])
+    second = best.seed(ws, "fuzzbed/json", "job_b", [None])
+
+    # only targets with a best corpus are seeded, each job in its own directory
+    assert list(first.keys()) == [None]
+    assert first[None] != second[None]
+    assert sorted(open(os.path.join(first[None], name), "rb").read() for name in os.listdir(first[None])) == \
+        [b"found", b"seed"]
+
+    best.release(ws, "job_a")
+    assert not os.path.exists(first[None])
+    assert os.path.isdir(second[None])
+
+
+def test_stale_corpus_is_reminimized(best, make_workspace, tmp_path, monkeypatch):
+    ws = make_workspace()
+    best.merge(ws, "fuzzbed/json", {None: [write_queue(tmp_path / "q", {"a": b"aaaa", "b": b"b"})]})
+    manifest = MANIFEST_NAME.format(ws.name)
+    best.corpus.set_meta(manifest, HARNESS_TARGET, "stale")
+
+    monkeypatch.setattr(config, "WARMSTART_MAX_INPUTS", 1)
+    best.seed(ws, "fuzzbed/json", "job", [None])
+
+    assert best.corpus.get_meta(manifest, HARNESS_TARGET) == harness_hash(None, ws, "fuzzbed/json")
+    assert [best.corpus.get(h) for h in best.corpus.manifest(manifest, HARNESS_TARGET).values()] == [b"b"]
+
+
+def test_harness_hash_follows_source(make_workspace, tmp_path):
+    ws = make_workspace()
+    before = harness_hash(None, ws, "fuzzbed/json")
+    (tmp_path / "json" / "harness.cpp").write_text("TEST(Parser, Changed) {}")
+    assert harness_hash(None, ws, "fuzzbed/json") != before
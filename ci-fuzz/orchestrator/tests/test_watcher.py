@@ -0,0 +1,137 @@
+"""
+test_watcher.py
+
+    DESCRIPTION:
+        Tests for following output trees for new files, with inotify and with the scan fallback, against
+        files written to a temporary directory.
+"""
+import os
+import time
+import select
+
+import pytest
+
+from server.watcher import ArtifactWatcher
+
+
+@pytest.fixture
+def watcher():
+    watcher = ArtifactWatcher()
+    yield watcher
+    if watcher._fd >= 0:
+        os.close(watcher._fd)
+
+
+def pump(watcher):
+    """
+    Reads inotify events on the calling thread until none arrive for a while.
+    """
+    while len(select.select([watcher._fd], [], [], 0.2)[0]) > 0:
+        watcher._read_events()
+
+
+def scan(watcher):
+    """
+    Scans trees followed without inotify once, as the watcher thread would on its interval.
+    """
+    for (root, since) in list(watcher._scanned.items()):
+        bound = time.time()
+        watcher._scan(root, since)
+        watcher._scanned[root] = bound
+
+
+def write(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_inotify_follows_new_files(watcher, tmp_path):
+    if watcher._fd < 0:
+        pytest.skip("inotify is unavailable")
+
+    root = str(tmp_path / "json" / "out")
+    events = set()
+    watcher.subscribe(root, events.add)
+    assert len(watcher._scanned) == 0
+
+    # root does not exist yet, and is watched once created along with the directories under it
+    write(os.path.join(root, "crashes", "id:000000"))
+    write(str(tmp_path / "json" / "other"))
+    pump(watcher)
+    assert events == {os.path.join(root, "crashes", "id:000000")}
+
+    # files moved into place are reported, as AFL does for its queue
+    write(str(tmp_path / "staged"))
+    os.makedirs(os.path.join(root, "queue"))
+    pump(watcher)
+    os.rename(str(tmp_path / "staged"), os.path.join(root, "queue", "id:000000"))
+    write(os.path.join(root, "crashes", "id:000001"))
+    pump(watcher)
+    assert events == {os.path.join(root, "crashes", "id:000000"), os.path.join(root, "crashes", "id:000001"),
+                      os.path.join(root, "queue", "id:000000")}
+    assert os.path.join(root, "crashes") in watcher._wds
+
+
+@pytest.mark.parametrize("fallback", ["watch_limit", "no_inotify"])
+def test_scan_fallback_follows_new_files(watcher, tmp_path, monkeypatch, fallback):
+    if fallback == "watch_limit":
+        monkeypatch.setattr(watcher, "_add_watch", lambda path: False)
+        monkeypatch.setattr(watcher, "_fd", max(watcher._fd, 0))
+    else:
+        monkeypatch.setattr(watcher, "_fd", -1)
+
+    root = str(tmp_path / "out")
+    events = []
+    watcher.subscribe(root, events.append)
+    assert root in watcher._scanned and watcher.watches == 0
+
+    # bound is backdated past the filesystem's timestamp granularity
+    watcher._scanned[root] -= 1
+    write(os.path.join(root, "crashes", "id:000000"))
+    scan(watcher)
+    assert events == [os.path.join(root, "crashes", "id:000000")]
+
+    # only files changed since the last scan are reported, and unchanged directories are not listed
+    watcher._scanned[root] = time.time() + 1
+    scan(watcher)
+    assert len(events) == 1
+    assert os.path.join(root, "crashes") in watcher._subdirs
+
+
+def test_unsubscribe_releases_roots(watcher, tmp_path):
+    root, other = str(tmp_path / "json" / "out"), str(tmp_path / "xml" / "out")
+    os.makedirs(root)
+    os.makedirs(other)
+    events = []
+    first = watcher.subscribe(root, events.append)
+    second = watcher.subscribe(root, events.append)
+    watcher.subscribe(other, lambda path: None)
+
+    # the tree is followed until its last subscriber leaves
+    watcher.unsubscribe(first)
+    assert watcher._roots[root] == 1
+    watcher.unsubscribe(second)
+    watcher.unsubscribe(second)
+    assert list(watcher._roots.keys()) == [other]
+    assert not any(path == root or path.startswith(root + os.sep) for path in watcher._wds.keys())
+    assert root not in watcher._scanned
+
+    write(os.path.join(root, "crashes", "id:000000"))
+    if watcher._fd >= 0:
+        pump(watcher)
+    scan(watcher)
+    assert events == []
+
+
+def test_unsubscribe_releases_scanned_roots(watcher, tmp_path, monkeypatch):
+    monkeypatch.setattr(watcher, "_fd", -1)
+    root = str(tmp_path / "out")
+    write(os.path.join(root, "queue", "id:000000"))
+
+    token = watcher.subscribe(root, lambda path: None)
+    scan(watcher)
+    assert len(watcher._subdirs) == 2
+
+    watcher.unsubscribe(token)
+    assert watcher._scanned == dict() and watcher._subdirs == dict() and watcher._roots == dict()